@@ -1,11 +1,15 @@
 import streamlit as st
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
+import numpy as np
 from textblob import TextBlob
-from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
 import random
-from datetime import datetime, timedelta
+from datetime import datetime
+
+from civic.cache import cached_scores
+from civic.charts import show_chart
+from civic.profiling import stage
+from civic.scoring import vader_compound
+from civic.synthetic import generate_posts
 
 # Configure the page
 st.set_page_config(
@@ -53,9 +57,6 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-# Initialize sentiment analyzers
-vader_analyzer = SentimentIntensityAnalyzer()
-
 # Title
 st.markdown('<h1 class="main-header">🏛️ Civic Sentiment Dashboard</h1>', unsafe_allow_html=True)
 st.markdown("Analyze public opinion about civic topics using NLP sentiment analysis.")
@@ -108,15 +109,19 @@ def generate_mock_tweets(topic, count=30):
         f"Curious to see how {topic.lower()} will evolve."
     ]
     
+    columns = generate_posts(
+        count,
+        topics=[topic],
+        templates={topic: {"positive": positive_phrases, "neutral": neutral_phrases, "negative": negative_phrases}},
+        sentiment_mix=dict.fromkeys(["positive", "neutral", "negative"], 1),
+        text_format="{text}",
+        engagement_median=20,
+        max_engagement=100
+    )
+    retweets = np.minimum(columns["engagement"] // 2, 50)
+    
     for i in range(count):
-        sentiment = random.choice(sentiments)
-        
-        if sentiment == "Positive":
-            text = random.choice(positive_phrases)
-        elif sentiment == "Negative":
-            text = random.choice(negative_phrases)
-        else:
-            text = random.choice(neutral_phrases)
+        text = columns["text"][i]
         
         # Add hashtags occasionally
         if i % 5 == 0:
@@ -125,54 +130,78 @@ def generate_mock_tweets(topic, count=30):
         tweets.append({
             "id": i + 1,
             "text": text,
-            "user": f"user_{random.randint(1000, 9999)}",
-            "created_at": datetime.now() - timedelta(hours=random.randint(1, 168)),
-            "sentiment": sentiment,
-            "retweet_count": random.randint(0, 50),
-            "favorite_count": random.randint(0, 100)
+            "user": columns['user'][i],
+            "created_at": columns["created_at"][i].astype(datetime),
+            "sentiment": sentiments[["positive", "negative", "neutral"].index(columns["sentiment_class"][i])],
+            "retweet_count": int(retweets[i]),
+            "favorite_count": int(columns["engagement"][i])
         })
     
     return tweets
 
 # Function to analyze sentiment with TextBlob
-def analyze_sentiment_textblob(text):
-    analysis = TextBlob(text)
-    polarity = analysis.sentiment.polarity
-    
+def textblob_polarity(text):
+    return TextBlob(text).sentiment.polarity
+
+def textblob_label(polarity):
     if polarity > 0.1:
-        return "Positive", polarity
+        return "Positive"
     elif polarity < -0.1:
-        return "Negative", polarity
+        return "Negative"
     else:
-        return "Neutral", polarity
+        return "Neutral"
+
+def analyze_sentiment_textblob(texts):
+    """(label, polarity) per text, looked up in the sentiment cache in one batch"""
+    polarities = cached_scores("textblob", list(texts), textblob_polarity)
+    return [(textblob_label(polarity), polarity) for polarity in polarities]
 
 # Function to analyze sentiment with VADER
-def analyze_sentiment_vader(text):
-    scores = vader_analyzer.polarity_scores(text)
-    compound = scores['compound']
-    
+def vader_label(compound):
     if compound >= 0.05:
-        return "Positive", compound
+        return "Positive"
     elif compound <= -0.05:
-        return "Negative", compound
+        return "Negative"
     else:
-        return "Neutral", compound
+        return "Neutral"
+
+def analyze_sentiment_vader(texts):
+    """(label, compound score) per text, looked up in the sentiment cache in one batch"""
+    compounds = cached_scores("vader", list(texts), vader_compound)
+    return [(vader_label(compound), compound) for compound in compounds]
+
+# Chart drawing; ``counts`` is [positive, negative, neutral]
+SENTIMENT_LABELS = ['Positive', 'Negative', 'Neutral']
+SENTIMENT_COLORS = ['#00C851', '#ff4444', '#ffbb33']
+
+def draw_sentiment_pie(ax, counts):
+    ax.pie(counts, labels=SENTIMENT_LABELS, autopct='%1.1f%%', colors=SENTIMENT_COLORS, startangle=90)
+    ax.axis('equal')
+
+def draw_sentiment_bars(ax, counts):
+    ax.bar(SENTIMENT_LABELS, counts, color=SENTIMENT_COLORS)
+    ax.set_ylabel('Number of Posts')
+    ax.set_title('Sentiment Analysis Results')
+    ax.tick_params(axis='x', labelrotation=45)
 
 # Main analysis
 if st.sidebar.button("Analyze Sentiment"):
     with st.spinner(f"Analyzing sentiment about {analysis_topic}..."):
         # Generate mock tweets
-        tweets = generate_mock_tweets(analysis_topic, 30)
+        with stage("generate"):
+            tweets = generate_mock_tweets(analysis_topic, 30)
         
-        # Analyze sentiment for each tweet
-        for tweet in tweets:
+        # Analyze sentiment for all tweets in one cached batch
+        with stage("score"):
+            texts = [tweet["text"] for tweet in tweets]
             if analysis_method == "TextBlob":
-                sentiment, score = analyze_sentiment_textblob(tweet["text"])
+                results = analyze_sentiment_textblob(texts)
             else:
-                sentiment, score = analyze_sentiment_vader(tweet["text"])
+                results = analyze_sentiment_vader(texts)
             
-            tweet["sentiment"] = sentiment
-            tweet["sentiment_score"] = score
+            for tweet, (sentiment, score) in zip(tweets, results):
+                tweet["sentiment"] = sentiment
+                tweet["sentiment_score"] = score
         
         # Convert to DataFrame
         df = pd.DataFrame(tweets)
@@ -221,24 +250,16 @@ if st.sidebar.button("Analyze Sentiment"):
         with col1:
             # Pie chart
             st.subheader("Sentiment Distribution")
-            fig, ax = plt.subplots(figsize=(8, 6))
             sentiment_counts = [positive_tweets, negative_tweets, neutral_tweets]
-            labels = ['Positive', 'Negative', 'Neutral']
-            colors = ['#00C851', '#ff4444', '#ffbb33']
             
-            ax.pie(sentiment_counts, labels=labels, autopct='%1.1f%%', colors=colors, startangle=90)
-            ax.axis('equal')
-            st.pyplot(fig)
+            with stage("charts"):
+                show_chart("sentiment_pie", sentiment_counts, draw_sentiment_pie, figsize=(8, 6))
         
         with col2:
             # Bar chart
             st.subheader("Sentiment Counts")
-            fig, ax = plt.subplots(figsize=(8, 6))
-            ax.bar(labels, sentiment_counts, color=colors)
-            ax.set_ylabel('Number of Posts')
-            ax.set_title('Sentiment Analysis Results')
-            plt.xticks(rotation=45)
-            st.pyplot(fig)
+            with stage("charts"):
+                show_chart("sentiment_bars", sentiment_counts, draw_sentiment_bars, figsize=(8, 6))
         
         # Display sample posts
         st.subheader("📝 Sample Public Posts")
@@ -0,0 +1 @@
+"""Offline benchmarks for the civic scoring and analytics hot paths."""
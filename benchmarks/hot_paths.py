@@ -0,0 +1,265 @@
+"""Micro-benchmarks for scoring, topic classification and risk analytics.
+
+Each benchmark runs one hot-path call over a seeded synthetic workload
+(``civic.synthetic``) at several sizes and reports throughput, p50/p99
+wall time per call and peak traced memory. Everything runs offline. The
+workload's texts are mostly distinct (about 85% at 1M posts), so scoring
+and topic timings measure VADER and the classifier rather than dedup.
+
+Run the suite, write results and compare them against the stored baseline::
+
+    python -m benchmarks.hot_paths --out results.json --compare benchmarks/baseline.json
+
+Refresh the baseline with ``--save-baseline`` in an environment installed
+from ``requirements.txt``; the report records library versions, CPU and a
+calibration time. A benchmark regresses when its throughput, scaled by the
+ratio of the two calibration times, drops by more than ``--threshold``
+(default 20%) relative to the baseline; the command then exits with
+status 1.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from civic.analytics import detect_community_needs, predict_civil_unrest_risk
+from civic.cache import SentimentCache
+from civic.scoring import score_texts
+from civic.synthetic import DEFAULT_NOW, WORKLOAD_TEXT_VARIANTS, generate_posts
+from civic.topics import classify_topics, load_model
+
+DEFAULT_SIZES = (1_000, 100_000, 1_000_000)
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+DEFAULT_THRESHOLD = 0.2
+SEED = 20240601
+
+# Fixed clock so every run sees the same synthetic timestamps
+WORKLOAD_NOW = DEFAULT_NOW
+# Timed runs of the calibration loop; the median is kept
+CALIBRATION_RUNS = 5
+# Calls shorter than this are timed in batches so timer and scheduler noise averages out
+MIN_SAMPLE_S = 0.02
+
+
+def repeats_for(size):
+    """Timed calls per benchmark: many at small sizes, a few from 100k up"""
+    if size <= 10_000:
+        return 50
+    if size <= 100_000:
+        return 5
+    return 3
+
+
+def build_workload(size):
+    """Seeded posts plus the scored columns the analytics functions read"""
+    columns = generate_posts(size, seed=SEED, now=WORKLOAD_NOW, text_variants=WORKLOAD_TEXT_VARIANTS)
+    texts = np.asarray(columns["text"], dtype=object)
+    scores = score_texts(texts, scheme="civic", cache=SentimentCache())
+    frame = pd.DataFrame({
+        "topic": columns["focus_area"],
+        "sentiment_score": scores["sentiment_score"],
+        "risk_level": pd.Categorical(scores["risk_level"]),
+        "urgency_level": scores["urgency_level"],
+    })
+    return {"texts": texts, "topics": list(columns["focus_area"].categories), "frame": frame,
+            "distinct_texts": len(columns["text"].categories)}
+
+
+def calibrate(runs=CALIBRATION_RUNS):
+    """Median seconds for a fixed mix of Python string work and NumPy sorting.
+
+    Stands in for the machine's speed on the same kind of work as the
+    benchmarks, so reports from different machines can be compared.
+    """
+    rng = np.random.default_rng(SEED)
+    values = rng.random(1_000_000)
+    words = [f"word{i}" for i in range(200_000)]
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        np.sort(values)
+        " ".join(words).lower().split()
+        sum(len(word) for word in words)
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings))
+
+
+def cpu_model():
+    """CPU model name, or the platform's processor string when it is not exposed"""
+    try:
+        with open("/proc/cpuinfo", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("model name"):
+                    return line.split(":", 1)[1].strip()
+    except OSError:
+        pass
+    return platform.processor() or platform.machine()
+
+
+# name -> (setup(workload) -> per-call state, call(workload, state))
+BENCHMARKS = {
+    "score_texts": (
+        lambda workload: SentimentCache(),
+        lambda workload, cache: score_texts(workload["texts"], scheme="civic", cache=cache),
+    ),
+    "classify_topics": (
+        lambda workload: None,
+        lambda workload, _: classify_topics(workload["texts"], workload["topics"]),
+    ),
+    "predict_civil_unrest_risk": (
+        lambda workload: None,
+        lambda workload, _: predict_civil_unrest_risk(workload["frame"]),
+    ),
+    "detect_community_needs": (
+        lambda workload: None,
+        lambda workload, _: detect_community_needs(workload["frame"]),
+    ),
+}
+
+
+def run_benchmark(name, workload, size, repeats):
+    """Time ``repeats`` calls, then trace one more call for peak memory.
+
+    ``score_texts`` gets a fresh in-memory cache per call so every call
+    scores its distinct texts instead of reading the previous call's cache.
+    Calls faster than ``MIN_SAMPLE_S`` are repeated within each timed
+    sample and the sample divided by the batch size.
+    """
+    setup, call = BENCHMARKS[name]
+    # Warm-up call: lazy imports, model loading, regex compilation
+    state = setup(workload)
+    start = time.perf_counter()
+    call(workload, state)
+    batch = max(1, int(MIN_SAMPLE_S / max(time.perf_counter() - start, 1e-9)))
+
+    timings = []
+    for _ in range(repeats):
+        states = [setup(workload) for _ in range(batch)]
+        start = time.perf_counter()
+        for state in states:
+            call(workload, state)
+        timings.append((time.perf_counter() - start) / batch)
+
+    state = setup(workload)
+    tracemalloc.start()
+    try:
+        call(workload, state)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    timings = np.asarray(timings)
+    p50 = float(np.percentile(timings, 50))
+    return {
+        "benchmark": name,
+        "size": size,
+        "repeats": repeats,
+        "batch": batch,
+        "throughput_per_s": size / p50 if p50 > 0 else float("inf"),
+        "p50_ms": p50 * 1000,
+        "p99_ms": float(np.percentile(timings, 99)) * 1000,
+        "peak_memory_mb": peak / 1e6,
+    }
+
+
+def run_suite(sizes=DEFAULT_SIZES, names=None, log=print):
+    """Run every selected benchmark at every size"""
+    load_model()
+    results = []
+    for size in sizes:
+        workload = build_workload(size)
+        for name in names or BENCHMARKS:
+            result = run_benchmark(name, workload, size, repeats_for(size))
+            result["distinct_texts"] = workload["distinct_texts"]
+            log(f"{name:<28} {size:>9,}  {result['throughput_per_s']:>14,.0f} posts/s  "
+                f"p50 {result['p50_ms']:>9.2f} ms  p99 {result['p99_ms']:>9.2f} ms  "
+                f"peak {result['peak_memory_mb']:>8.1f} MB")
+            results.append(result)
+    return {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "machine": platform.machine(),
+        "cpu": cpu_model(),
+        "cpu_count": os.cpu_count(),
+        "calibration_s": calibrate(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "pyarrow": pa.__version__,
+        "results": results,
+    }
+
+
+def speed_ratio(report, baseline):
+    """How much faster the baseline machine ran the calibration loop (1.0 if either report lacks it)"""
+    if report.get("calibration_s") and baseline.get("calibration_s"):
+        return report["calibration_s"] / baseline["calibration_s"]
+    return 1.0
+
+
+def compare(report, baseline, threshold=DEFAULT_THRESHOLD):
+    """Regressions of ``report`` against ``baseline``.
+
+    Returns ``(name, size, baseline_throughput, throughput, change)`` for
+    every benchmark whose throughput fell by more than ``threshold``, with
+    the baseline throughput scaled to this machine by ``speed_ratio``.
+    Benchmarks missing from the baseline are skipped.
+    """
+    previous = {(r["benchmark"], r["size"]): r for r in baseline["results"]}
+    ratio = speed_ratio(report, baseline)
+    regressions = []
+    for result in report["results"]:
+        before = previous.get((result["benchmark"], result["size"]))
+        if before is None:
+            continue
+        expected = before["throughput_per_s"] / ratio
+        change = result["throughput_per_s"] / expected - 1
+        if change < -threshold:
+            regressions.append((result["benchmark"], result["size"],
+                                expected, result["throughput_per_s"], change))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the civic scoring and analytics hot paths")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES))
+    parser.add_argument("--only", nargs="+", choices=list(BENCHMARKS), help="run a subset of benchmarks")
+    parser.add_argument("--out", help="write the JSON report here")
+    parser.add_argument("--compare", metavar="BASELINE", help="fail on regressions against this report")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="allowed fractional throughput drop (default 0.2)")
+    parser.add_argument("--save-baseline", action="store_true", help=f"overwrite {DEFAULT_BASELINE}")
+    args = parser.parse_args(argv)
+
+    report = run_suite(args.sizes, args.only)
+    for path in filter(None, [args.out, DEFAULT_BASELINE if args.save_baseline else None]):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Wrote {path}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        for library in ("numpy", "pandas", "pyarrow"):
+            if baseline.get(library) not in (None, report[library]):
+                print(f"Note: baseline used {library} {baseline[library]}, this run {report[library]}")
+        print(f"Baseline scaled by calibration: this machine is {1 / speed_ratio(report, baseline):.2f}x "
+              f"the baseline's speed ({baseline.get('cpu', 'unknown CPU')})")
+        regressions = compare(report, baseline, args.threshold)
+        for name, size, before, after, change in regressions:
+            print(f"REGRESSION {name} @ {size:,}: {before:,.0f} -> {after:,.0f} posts/s ({change:+.0%})")
+        if regressions:
+            return 1
+        print(f"No regressions beyond {args.threshold:.0%} against {args.compare}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,156 @@
+"""Behaviour check for ``civic.http_client.CachedHttpClient`` against a local server.
+
+Starts ``http.server`` on localhost (HTTP/1.1 keep-alive) and drives a
+fresh client through the cases the Twitter and News fetchers rely on:
+
+- a second call inside the TTL is served from the cache
+- a call after the TTL has run out goes back to the network
+- ``ttl=0`` always goes to the network and stores nothing
+- a 503 is retried and the following 200 returned
+- repeated 429s give up after ``max_attempts`` and return the last 429
+- every request rides the same pooled connection
+
+Backoff is shortened so the whole run takes well under a second::
+
+    python -m benchmarks.http_client_check
+
+Exits with status 1 when any case fails.
+"""
+import argparse
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from civic.http_client import CachedHttpClient
+
+SHORT_TTL = 0.2
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    """Answers ``/ok``, ``/flaky`` (503 first, then 200) and ``/limited`` (always 429)"""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        server = self.server
+        url = urlparse(self.path)
+        with server.lock:
+            server.hits[url.path] = server.hits.get(url.path, 0) + 1
+            server.peers.add(self.client_address)
+            hits = server.hits[url.path]
+
+        if url.path == "/flaky" and hits == 1:
+            status = 503
+        elif url.path == "/limited":
+            status = 429
+        else:
+            status = 200
+        body = json.dumps({"path": url.path, "hit": hits, "query": parse_qs(url.query)}).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_server():
+    """Fixture server on a free localhost port, serving from a daemon thread"""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FixtureHandler)
+    server.lock = threading.Lock()
+    server.hits = {}
+    server.peers = set()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def run_checks(max_attempts=3):
+    """``(name, passed, detail)`` for every case, each against a fresh client"""
+    server = start_server()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+
+    def client():
+        return CachedHttpClient(pool_size=1, max_attempts=max_attempts, backoff=0.01, max_backoff=0.05)
+
+    results = []
+    try:
+        # Cache hit inside the TTL
+        http = client()
+        first = http.get_json(f"{base}/ok", params={"q": "cache"}, ttl=60)
+        second = http.get_json(f"{base}/ok", params={"q": "cache"}, ttl=60)
+        results.append(("ttl cache hit", first == second and http.network_calls == 1 and http.cache_hits == 1,
+                        f"network_calls={http.network_calls} cache_hits={http.cache_hits}"))
+
+        # Expiry after the TTL
+        http = client()
+        http.get_json(f"{base}/ok", params={"q": "expiry"}, ttl=SHORT_TTL)
+        time.sleep(SHORT_TTL * 1.5)
+        status, payload = http.get_json(f"{base}/ok", params={"q": "expiry"}, ttl=SHORT_TTL)
+        results.append(("ttl expiry", status == 200 and http.network_calls == 2 and http.cache_hits == 0,
+                        f"network_calls={http.network_calls} cache_hits={http.cache_hits}"))
+
+        # ttl=0 bypasses the cache in both directions
+        http = client()
+        http.get_json(f"{base}/ok", params={"q": "bypass"}, ttl=0)
+        http.get_json(f"{base}/ok", params={"q": "bypass"}, ttl=0)
+        http.get_json(f"{base}/ok", params={"q": "bypass"}, ttl=60)
+        results.append(("ttl=0 bypass", http.network_calls == 3 and http.cache_hits == 0,
+                        f"network_calls={http.network_calls} cache_hits={http.cache_hits}"))
+
+        # 503 then 200
+        http = client()
+        status, payload = http.get_json(f"{base}/flaky", ttl=0)
+        results.append(("retry 503 then success", status == 200 and payload["hit"] == 2 and http.network_calls == 2,
+                        f"status={status} network_calls={http.network_calls}"))
+
+        # 429 on every attempt: give up and return the last response
+        http = client()
+        started = time.perf_counter()
+        status, payload = http.get_json(f"{base}/limited", ttl=60)
+        elapsed = time.perf_counter() - started
+        cached = http.get_json(f"{base}/limited", ttl=60)[0]
+        results.append(("give up after repeated 429",
+                        status == 429 and payload["hit"] == max_attempts and cached == 429
+                        and http.network_calls == 2 * max_attempts,
+                        f"status={status} attempts={payload['hit']} network_calls={http.network_calls} "
+                        f"{elapsed * 1000:.0f} ms"))
+
+        # One keep-alive connection for a run of requests
+        http = client()
+        with server.lock:
+            server.peers.clear()
+        for index in range(10):
+            http.get_json(f"{base}/ok", params={"q": index}, ttl=0)
+        with server.lock:
+            peers = len(server.peers)
+        results.append(("session reuses its connection", peers == 1 and http.network_calls == 10,
+                        f"{http.network_calls} requests over {peers} connection(s)"))
+    finally:
+        server.shutdown()
+        server.server_close()
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check the shared HTTP client against a localhost server")
+    parser.add_argument("--max-attempts", type=int, default=3, help="client attempts before giving up (default 3)")
+    args = parser.parse_args(argv)
+
+    results = run_checks(args.max_attempts)
+    for name, passed, detail in results:
+        print(f"{'ok  ' if passed else 'FAIL'} {name:<32} {detail}")
+    failed = [name for name, passed, _ in results if not passed]
+    if failed:
+        print(f"{len(failed)} of {len(results)} checks failed")
+        return 1
+    print(f"All {len(results)} checks passed")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
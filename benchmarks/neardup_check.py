@@ -0,0 +1,87 @@
+"""Behaviour check for ``civic.neardup`` on short civic posts.
+
+Runs the Twitter and News fetchers' collapse step (civic sentiment scores,
+then ``collapse``) over hand-written pairs:
+
+- short posts that differ by one opinion word and have opposite sentiment
+  stay apart
+- a near-identical pair given opposite sentiment scores stays apart
+- copy-pasted posts (a "BREAKING:" prefix, an extra hashtag, changed case
+  and punctuation) collapse into their first post::
+
+    python -m benchmarks.neardup_check
+
+Exits with status 1 when any case fails.
+"""
+import sys
+
+from civic.neardup import collapse
+from civic.scoring import score_texts
+
+# Same wording, opposite sentiment: never one cluster
+OPPOSITE_PAIRS = [
+    ("Hospital wait times in Chicago are unacceptable", "Hospital wait times in Chicago are great"),
+    ("The new bus line downtown is a disaster", "The new bus line downtown is wonderful"),
+    ("Love the new bike lanes on Milwaukee Ave", "Hate the new bike lanes on Milwaukee Ave"),
+    ("Rent relief program in Austin is a huge success", "Rent relief program in Austin is a huge failure"),
+    ("Police response in our neighborhood was excellent tonight",
+     "Police response in our neighborhood was terrible tonight"),
+]
+
+# Copies of one post: always one cluster
+COPIED_PAIRS = [
+    ("The city council voted tonight to expand the downtown bus network, adding three new routes by September",
+     "BREAKING: The city council voted tonight to expand the downtown bus network, adding three new routes by September"),
+    ("Sign the petition to keep the Lincoln Park branch library open on weekends, it matters to our kids",
+     "sign the petition to keep the Lincoln Park branch library open on weekends!! it matters to our kids #SaveOurLibrary"),
+    ("Water main break on 5th Street, avoid the area while crews repair it this afternoon",
+     "Water main break on 5th Street - avoid the area while crews repair it this afternoon."),
+]
+
+
+def _collapse(texts):
+    keys = [f"post_{index}" for index in range(len(texts))]
+    scores = score_texts(texts, scheme="civic")["sentiment_score"]
+    return collapse(texts, keys, scores)
+
+
+def run_checks():
+    """``(name, passed, detail)`` for every case"""
+    results = []
+    for first, second in OPPOSITE_PAIRS:
+        leaders, sizes, _ = _collapse([first, second])
+        results.append((f"apart: {second[:40]}", len(leaders) == 2, f"sizes={sizes.tolist()}"))
+
+    text = COPIED_PAIRS[0][0]
+    leaders, sizes, _ = collapse([text, text + " today"], ["a", "b"], [0.5, -0.5])
+    results.append(("apart: same text, opposite scores", len(leaders) == 2, f"sizes={sizes.tolist()}"))
+
+    for first, second in COPIED_PAIRS:
+        leaders, sizes, duplicates = _collapse([first, second])
+        results.append((f"merged: {first[:40]}",
+                        leaders.tolist() == [0] and duplicates == [["post_1"]],
+                        f"sizes={sizes.tolist()} duplicates={duplicates}"))
+
+    # All of the above in one batch: every copied pair is one cluster and
+    # every opposite pair two
+    texts = [text for pair in OPPOSITE_PAIRS + COPIED_PAIRS for text in pair]
+    leaders, sizes, _ = _collapse(texts)
+    expected = 2 * len(OPPOSITE_PAIRS) + len(COPIED_PAIRS)
+    results.append(("one batch", len(leaders) == expected, f"{len(leaders)} clusters, expected {expected}"))
+    return results
+
+
+def main():
+    results = run_checks()
+    for name, passed, detail in results:
+        print(f"{'ok  ' if passed else 'FAIL'} {name:<48} {detail}")
+    failed = [name for name, passed, _ in results if not passed]
+    if failed:
+        print(f"{len(failed)} of {len(results)} checks failed")
+        return 1
+    print(f"All {len(results)} checks passed")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
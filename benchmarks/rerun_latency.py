@@ -0,0 +1,257 @@
+"""End-to-end rerun latency of the three dashboards under ``AppTest``.
+
+Each app is driven through a scripted sequence of widget changes (pick a
+city, toggle the heatmap, move the alert threshold, click "Analyze
+Sentiment", ...). Every step is one full script rerun; the harness records
+its wall time and the per-stage breakdown the apps report through
+``civic.profiling``. Twitter and News requests are answered from the JSON
+fixtures in ``benchmarks/fixtures`` instead of the network.
+
+Run every scenario three times and write a report::
+
+    python -m benchmarks.rerun_latency --repeats 3 --out rerun_latency.json
+
+``--compare`` fails (exit status 1) when a step's median wall time grew by
+more than ``--threshold`` relative to an earlier report.
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import sys
+import tempfile
+import time
+import warnings
+from datetime import datetime
+from unittest import mock
+
+# Fresh sentiment cache per harness run unless the caller picked one
+os.environ.setdefault("CIVIC_CACHE_DIR", tempfile.mkdtemp(prefix="civic-rerun-"))
+
+import numpy as np
+import streamlit as st
+import streamlit.logger as streamlit_logger
+from streamlit.testing.v1 import AppTest
+
+from civic.profiling import stage_timer
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+DEFAULT_THRESHOLD = 0.25
+RUN_TIMEOUT = 120
+
+# Deprecation notices from streamlit-folium and bare-mode warnings would bury the report
+warnings.filterwarnings("ignore", category=DeprecationWarning)
+
+
+class FixtureClient:
+    """Stands in for ``CachedHttpClient``, serving recorded API responses.
+
+    Twitter pages are replayed in order and cycled, with tweet ids made
+    unique per page, so any tweet budget can be served.
+    """
+
+    def __init__(self, fixture_dir=FIXTURE_DIR):
+        with open(os.path.join(fixture_dir, "twitter_recent_search.json"), encoding="utf-8") as f:
+            self.twitter_pages = json.load(f)["pages"]
+        with open(os.path.join(fixture_dir, "news_everything.json"), encoding="utf-8") as f:
+            self.news = json.load(f)
+        self.calls = 0
+
+    def get_json(self, url, params=None, headers=None, ttl=None):
+        self.calls += 1
+        params = params or {}
+        if "api.twitter.com" in url:
+            return 200, self._twitter_page(params)
+        if "newsapi.org" in url:
+            return 200, {**self.news, "articles": self.news["articles"][:params.get("pageSize", 30)]}
+        return 404, None
+
+    def _twitter_page(self, params):
+        token = params.get("next_token")
+        number = int(token.rsplit("-", 1)[1]) if token else 0
+        template = self.twitter_pages[number % len(self.twitter_pages)]
+        tweets = [
+            {**tweet, "id": f"{tweet['id']}{number:04d}"}
+            for tweet in template["data"]
+        ]
+        size = params.get("max_results", 100)
+        tweets = (tweets * (size // len(tweets) + 1))[:size]
+        return {**template, "data": tweets, "meta": {"result_count": size, "next_token": f"page-{number + 1}"}}
+
+    def clear_cache(self):
+        pass
+
+
+def _widget(at, kind, label):
+    for widget in getattr(at.sidebar, kind):
+        if widget.label == label:
+            return widget
+    raise LookupError(f"no {kind} labelled {label!r}")
+
+
+def _set(kind, label, value):
+    return lambda at: _widget(at, kind, label).set_value(value)
+
+
+def _click(label):
+    return lambda at: _widget(at, "button", label).click()
+
+
+def _steps(*actions):
+    def run_all(at):
+        for action in actions:
+            action(at)
+    return run_all
+
+
+# app -> [(step name, action applied before the rerun)]; the first step is the cold load
+SCENARIOS = {
+    "app.py": [
+        ("initial load", None),
+        ("select topic", _set("selectbox", "Select a topic to analyze:", "Healthcare")),
+        ("click Analyze Sentiment", _click("Analyze Sentiment")),
+        ("VADER + Analyze Sentiment", _steps(
+            _set("radio", "Sentiment Analysis Method:", "VADER"), _click("Analyze Sentiment"))),
+    ],
+    "emotional_weather_map.py": [
+        ("initial load", None),
+        ("change city", _set("selectbox", "Select City:", "Chicago")),
+        ("heatmap off", _set("checkbox", "Show Emotion Heatmap", False)),
+        ("heatmap on", _set("checkbox", "Show Emotion Heatmap", True)),
+        ("alert threshold 35", _set("slider", "Alert Threshold (% Negative):", 35)),
+        ("alert threshold 75", _set("slider", "Alert Threshold (% Negative):", 75)),
+        ("time range 24h", _set("selectbox", "Time Range:", "Last 24 hours")),
+    ],
+    "emotional_weather_map_pro.py": [
+        ("initial load", None),
+        ("add News API", _set("multiselect", "Data Sources:", ["Mock Civic Data", "Twitter API", "News API"])),
+        ("change city", _set("selectbox", "Target City:", "Chicago")),
+        ("tweet budget 300", _set("slider", "Max Tweets per Refresh:", 300)),
+        ("prediction off", _set("checkbox", "Enable Civil Unrest Prediction", False)),
+        ("Refresh Data Now", _click("🔄 Refresh Data Now")),
+    ],
+}
+
+# Credentials the apps look up; the fixture client ignores them
+FIXTURE_SECRETS = {"TWITTER_BEARER_TOKEN": "fixture-token"}
+
+
+def run_scenario(app, steps):
+    """One pass over a scenario from a cold Streamlit cache"""
+    st.cache_data.clear()
+    st.cache_resource.clear()
+    at = AppTest.from_file(os.path.join(REPO_DIR, app), default_timeout=RUN_TIMEOUT)
+    for key, value in FIXTURE_SECRETS.items():
+        at.secrets[key] = value
+
+    records = []
+    for name, action in steps:
+        if action is not None:
+            action(at)
+        stage_timer.reset()
+        start = time.perf_counter()
+        at.run()
+        wall = time.perf_counter() - start
+        records.append({
+            "step": name,
+            "wall_ms": wall * 1000,
+            "stages_ms": {stage: info["seconds"] * 1000 for stage, info in stage_timer.snapshot().items()},
+            "exceptions": [exception.message for exception in at.exception],
+        })
+    return records
+
+
+def summarize(passes):
+    """Median/max wall time and median stage times per step across passes"""
+    steps = []
+    for records in zip(*passes):
+        walls = np.array([record["wall_ms"] for record in records])
+        stage_names = list(dict.fromkeys(stage for record in records for stage in record["stages_ms"]))
+        steps.append({
+            "step": records[0]["step"],
+            "p50_ms": float(np.median(walls)),
+            "max_ms": float(walls.max()),
+            "runs_ms": walls.tolist(),
+            "stages_p50_ms": {
+                stage: float(np.median([record["stages_ms"].get(stage, 0.0) for record in records]))
+                for stage in stage_names
+            },
+            "exceptions": sorted({message for record in records for message in record["exceptions"]}),
+        })
+    return steps
+
+
+def run_suite(apps=None, repeats=3, log=print):
+    client = FixtureClient()
+    streamlit_logger.set_log_level(logging.ERROR)
+    report = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "machine": platform.machine(),
+        "streamlit": st.__version__,
+        "repeats": repeats,
+        "apps": {},
+    }
+    with mock.patch("civic.http_client.shared_client", return_value=client):
+        for app in apps or SCENARIOS:
+            passes = [run_scenario(app, SCENARIOS[app]) for _ in range(repeats)]
+            report["apps"][app] = summarize(passes)
+            log(app)
+            for step in report["apps"][app]:
+                stages = ", ".join(f"{stage} {ms:.0f}" for stage, ms in step["stages_p50_ms"].items())
+                flag = "  EXCEPTION" if step["exceptions"] else ""
+                log(f"  {step['step']:<28} p50 {step['p50_ms']:>8.0f} ms  max {step['max_ms']:>8.0f} ms"
+                    f"  [{stages}]{flag}")
+    return report
+
+
+def compare(report, baseline, threshold=DEFAULT_THRESHOLD):
+    """Steps whose median wall time grew by more than ``threshold``"""
+    regressions = []
+    for app, steps in report["apps"].items():
+        previous = {step["step"]: step for step in baseline.get("apps", {}).get(app, [])}
+        for step in steps:
+            before = previous.get(step["step"])
+            if before is None or before["p50_ms"] <= 0:
+                continue
+            change = step["p50_ms"] / before["p50_ms"] - 1
+            if change > threshold:
+                regressions.append((app, step["step"], before["p50_ms"], step["p50_ms"], change))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure dashboard rerun latency with AppTest")
+    parser.add_argument("--apps", nargs="+", choices=list(SCENARIOS), help="apps to drive (default: all)")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--out", help="write the JSON report here")
+    parser.add_argument("--compare", metavar="REPORT", help="fail on slowdowns against this report")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="allowed fractional growth of a step's median (default 0.25)")
+    args = parser.parse_args(argv)
+
+    report = run_suite(args.apps, args.repeats)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Wrote {args.out}")
+
+    failed = [(app, step["step"]) for app, steps in report["apps"].items() for step in steps if step["exceptions"]]
+    for app, step in failed:
+        print(f"EXCEPTION {app}: {step}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.threshold)
+        for app, step, before, after, change in regressions:
+            print(f"REGRESSION {app} / {step}: {before:.0f} -> {after:.0f} ms ({change:+.0%})")
+        if regressions:
+            return 1
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
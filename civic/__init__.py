@@ -0,0 +1,6 @@
+"""Shared analysis engine for the civic sentiment dashboards.
+
+The Streamlit apps (`app.py`, `emotional_weather_map.py`,
+`emotional_weather_map_pro.py`) build their UI at import time, so anything
+that needs to be reused or measured outside a running app lives here.
+"""
@@ -0,0 +1,133 @@
+"""Aggregations over scored posts."""
+import numpy as np
+import pandas as pd
+
+from civic.analytics import community_needs_from_totals, unrest_risk_from_counts
+
+# Posts below this compound score count as negative everywhere in the dashboards
+NEGATIVE_THRESHOLD = -0.1
+
+
+class RunningSummary:
+    """Totals maintained page by page while a stream is still loading"""
+
+    def __init__(self):
+        self.count = 0
+        self.sentiment_sum = 0.0
+        self.negative_count = 0
+        self.high_risk_count = 0
+
+    def update(self, sentiment_scores, risk_levels=(), weights=None):
+        """Fold one page of scores (and optional risk levels) into the totals.
+
+        ``weights`` counts each post that many times, e.g. the size of the
+        near-duplicate cluster it represents.
+        """
+        scores = np.asarray(sentiment_scores, dtype=float)
+        weights = np.ones(len(scores)) if weights is None else _weights(weights)
+        self.count += int(weights.sum())
+        self.sentiment_sum += float(scores @ weights)
+        self.negative_count += int(weights[scores < NEGATIVE_THRESHOLD].sum())
+        if len(risk_levels):
+            self.high_risk_count += int(weights[np.asarray(risk_levels, dtype=object) == "High"].sum())
+
+    @property
+    def mean_sentiment(self):
+        return self.sentiment_sum / self.count if self.count else 0.0
+
+    @property
+    def negative_pct(self):
+        return self.negative_count / self.count * 100 if self.count else 0.0
+
+
+def _weights(values):
+    """Post weights as floats; missing weights (e.g. sources without clustering) count once"""
+    return pd.Series(values, dtype=float).fillna(1.0).to_numpy()
+
+
+class DashboardTotals:
+    """Dashboard metrics kept as sums, so new posts are merged in without revisiting old ones"""
+
+    def __init__(self):
+        self.summary = RunningSummary()
+        self.distinct_count = 0
+        self.urgency_count = 0
+        self.source_counts = {}
+        self.topic_counts = {}
+        self.topic_sentiment_sums = {}
+
+    def update(self, posts):
+        """Fold a ``PostStore`` batch into the totals.
+
+        Posts with a ``cluster_size`` count that many times, since each
+        stands for a cluster of near-duplicates; ``distinct_count`` counts
+        them once.
+        """
+        if not len(posts):
+            return self
+        columns = set(posts.columns)
+        scores = np.nan_to_num(posts.column("sentiment_score").astype(float))
+        weights = _weights(posts.column("cluster_size")) if "cluster_size" in columns else np.ones(len(posts))
+        self.summary.update(scores, posts.column("risk_level") if "risk_level" in columns else (), weights)
+        self.distinct_count += len(posts)
+        if "urgency_level" in columns:
+            urgent = pd.Series(posts.column("urgency_level")).fillna(False).astype(bool).to_numpy()
+            self.urgency_count += int(weights[urgent].sum())
+
+        source_codes, sources = pd.factorize(pd.Series(posts.column("source"), dtype=object))
+        source_counts = np.bincount(source_codes[source_codes >= 0], weights=weights[source_codes >= 0],
+                                    minlength=len(sources))
+        for source, count in zip(sources, source_counts):
+            self.source_counts[source] = self.source_counts.get(source, 0) + int(count)
+
+        # Posts without a topic are grouped as "General", as in ``detect_community_needs``
+        topics = (pd.Series(posts.column("topic"), dtype=object).fillna("General") if "topic" in columns
+                  else pd.Series(["General"] * len(posts), dtype=object))
+        codes, names = pd.factorize(topics)
+        counts = np.bincount(codes, weights=weights, minlength=len(names))
+        sums = np.bincount(codes, weights=scores * weights, minlength=len(names))
+        for topic, count, total in zip(names, counts, sums):
+            self.topic_counts[topic] = self.topic_counts.get(topic, 0) + int(count)
+            self.topic_sentiment_sums[topic] = self.topic_sentiment_sums.get(topic, 0.0) + float(total)
+        return self
+
+    @classmethod
+    def from_groups(cls, groups):
+        """Totals from pre-aggregated rows with ``source``, ``topic``, ``post_count``,
+        ``sentiment_sum``, ``negative_count``, ``high_risk_count``, ``urgency_count``
+        and optionally ``distinct_count``"""
+        totals = cls()
+        summary = totals.summary
+        for row in groups.itertuples(index=False):
+            summary.count += int(row.post_count)
+            totals.distinct_count += int(getattr(row, "distinct_count", row.post_count))
+            summary.sentiment_sum += float(row.sentiment_sum)
+            summary.negative_count += int(row.negative_count)
+            summary.high_risk_count += int(row.high_risk_count)
+            totals.urgency_count += int(row.urgency_count)
+            totals.source_counts[row.source] = totals.source_counts.get(row.source, 0) + int(row.post_count)
+            totals.topic_counts[row.topic] = totals.topic_counts.get(row.topic, 0) + int(row.post_count)
+            totals.topic_sentiment_sums[row.topic] = (
+                totals.topic_sentiment_sums.get(row.topic, 0.0) + float(row.sentiment_sum)
+            )
+        return totals
+
+    def source_breakdown(self):
+        """Posts per source, largest first (like ``value_counts``)"""
+        counts = pd.Series(self.source_counts, name="count", dtype=np.int64)
+        return counts.rename_axis("source").sort_values(ascending=False, kind="stable")
+
+    def topic_sentiment(self):
+        """Mean sentiment per topic, lowest first"""
+        topics = sorted(self.topic_counts)
+        means = [self.topic_sentiment_sums[topic] / self.topic_counts[topic] for topic in topics]
+        return pd.Series(means, index=pd.Index(topics, name="topic"), name="sentiment_score").sort_values()
+
+    def unrest_risk(self):
+        return unrest_risk_from_counts(self.summary.count, self.summary.high_risk_count, self.urgency_count)
+
+    def community_needs(self):
+        topics = sorted(self.topic_counts)
+        return community_needs_from_totals(
+            topics, [self.topic_counts[topic] for topic in topics], [self.topic_sentiment_sums[topic] for topic in topics]
+        )
@@ -0,0 +1,88 @@
+"""Civic risk and needs analytics over a DataFrame of scored posts."""
+import numpy as np
+import pandas as pd
+
+
+def predict_civil_unrest_risk(df):
+    """Predict civil unrest risk based on emotional data"""
+    if df is None or len(df) == 0:
+        return {"risk_level": "Low", "confidence": 0.0, "factors": []}
+
+    high_risk_count = int((df['risk_level'] == 'High').sum()) if 'risk_level' in df else 0
+    urgency_count = int(df['urgency_level'].fillna(False).astype(bool).sum()) if 'urgency_level' in df else 0
+    return unrest_risk_from_counts(len(df), high_risk_count, urgency_count)
+
+
+def unrest_risk_from_counts(total_posts, high_risk_count, urgency_count):
+    """``predict_civil_unrest_risk`` from running totals instead of a DataFrame"""
+    if total_posts == 0:
+        return {"risk_level": "Low", "confidence": 0.0, "factors": []}
+
+    risk_ratio = high_risk_count / total_posts
+
+    if risk_ratio > 0.3:
+        risk_level = "High"
+        confidence = min(risk_ratio * 2, 0.95)
+    elif risk_ratio > 0.15:
+        risk_level = "Medium"
+        confidence = risk_ratio * 1.5
+    else:
+        risk_level = "Low"
+        confidence = 1 - risk_ratio
+
+    factors = []
+    if risk_ratio > 0.2:
+        factors.append("High volume of negative sentiment")
+    if urgency_count > 5:
+        factors.append("Multiple urgent community concerns")
+    if high_risk_count > 10:
+        factors.append("Significant civil unrest indicators")
+
+    return {
+        "risk_level": risk_level,
+        "confidence": confidence,
+        "factors": factors,
+        "high_risk_count": high_risk_count,
+        "total_posts": total_posts
+    }
+
+
+def detect_community_needs(df):
+    """Detect specific community needs (topics with sustained negative sentiment)"""
+    if df is None or len(df) == 0:
+        return []
+
+    topics = pd.Categorical(df['topic']) if 'topic' in df else pd.Categorical(np.full(len(df), 'General'))
+    codes = topics.codes.astype(np.int64)
+    names = list(topics.categories)
+    if (codes < 0).any():
+        # Posts without a topic are grouped as "General"
+        if 'General' not in names:
+            names.append('General')
+        codes = np.where(codes < 0, names.index('General'), codes)
+
+    sentiments = df['sentiment_score'].fillna(0).to_numpy(dtype=float)
+    post_count = np.bincount(codes, minlength=len(names))
+    sentiment_sum = np.bincount(codes, weights=sentiments, minlength=len(names))
+    return community_needs_from_totals(names, post_count, sentiment_sum)
+
+
+def community_needs_from_totals(topics, post_count, sentiment_sum):
+    """``detect_community_needs`` from per-topic post counts and sentiment sums"""
+    # Identify needs (topics with high negative sentiment)
+    needs = []
+    for topic, count, total in zip(topics, post_count, sentiment_sum):
+        if count == 0:
+            continue
+        avg_sentiment = total / count
+        if avg_sentiment < -0.2 and count > 5:
+            severity = "High" if avg_sentiment < -0.4 else "Medium"
+            needs.append({
+                "topic": topic,
+                "severity": severity,
+                "avg_sentiment": avg_sentiment,
+                "post_count": int(count),
+                "recommendation": f"Address {topic.lower()} concerns in community outreach"
+            })
+
+    return sorted(needs, key=lambda x: x['avg_sentiment'])[:5]  # Top 5 needs
@@ -0,0 +1,213 @@
+"""Append-only Parquet history of scored posts.
+
+Posts are written under ``root/city=<city>/date=<YYYY-MM-DD>/`` (the UTC
+date of the post), sorted by topic and time inside each file so row-group
+statistics stay narrow. ``PostArchive.read`` prunes whole partitions by city
+and date before opening any file, then lets the Parquet reader skip row
+groups whose topic or time range cannot match, so "last 30 days, Chicago,
+Housing" touches only Chicago's last 30 date directories.
+"""
+import glob
+import os
+import threading
+import uuid
+from datetime import date, datetime, timedelta, timezone
+from urllib.parse import unquote
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+
+from civic.cache import DEFAULT_CACHE_DIR
+from civic.store import CATEGORICAL_COLUMNS, PostStore
+
+# Rows per Parquet row group (and per buffered write)
+ROW_GROUP_SIZE = 64_000
+
+PARTITIONING = ds.partitioning(pa.schema([("city", pa.string()), ("date", pa.date32())]), flavor="hive")
+
+_FORMAT = ds.ParquetFileFormat()
+_WRITE_OPTIONS = _FORMAT.make_write_options(compression="zstd")
+
+
+def default_archive_dir():
+    """Archive directory under ``$CIVIC_CACHE_DIR`` (or ~/.cache)"""
+    return os.path.join(os.environ.get("CIVIC_CACHE_DIR", DEFAULT_CACHE_DIR), "archive")
+
+
+def _utc(moment):
+    """Timestamp scalar in UTC; naive datetimes are read as local time"""
+    moment = pd.Timestamp(moment)
+    if moment.tzinfo is None:
+        moment = moment.tz_localize(datetime.now().astimezone().tzinfo)
+    return pa.scalar(moment.tz_convert("UTC"), type=pa.timestamp("us", tz="UTC"))
+
+
+def _utc_date(moment):
+    """UTC calendar date of a timestamp, i.e. the partition it falls in"""
+    return _utc(moment).as_py().date()
+
+
+def _plain_strings(table):
+    """Decode dictionary columns; each file keeps Parquet's own dictionary encoding"""
+    for i, field in enumerate(table.schema):
+        if pa.types.is_dictionary(field.type):
+            table = table.set_column(i, field.name, table.column(i).cast(field.type.value_type))
+    return table
+
+
+class PostArchive:
+    """Partitioned Parquet archive of ``PostStore`` batches.
+
+    ``append`` buffers posts and writes them once a row group's worth is
+    pending; ``flush`` writes whatever is left. Files are never rewritten
+    except by ``compact``.
+    """
+
+    def __init__(self, root, time_column="timestamp", row_group_size=ROW_GROUP_SIZE):
+        self.root = root
+        self.time_column = time_column
+        self.row_group_size = row_group_size
+        self._pending = []
+        self._pending_rows = 0
+        self._lock = threading.Lock()
+
+    def append(self, posts):
+        """Queue a batch (it needs ``city`` and the time column)"""
+        if not len(posts):
+            return
+        missing = {"city", self.time_column} - set(posts.columns)
+        if missing:
+            raise ValueError(f"archived posts need {sorted(missing)} columns")
+        with self._lock:
+            self._pending.append(_plain_strings(posts.table))
+            self._pending_rows += len(posts)
+            if self._pending_rows >= self.row_group_size:
+                self._flush()
+
+    def flush(self):
+        """Write every queued post"""
+        with self._lock:
+            self._flush()
+
+    def _flush(self):
+        if not self._pending:
+            return
+        table = pa.concat_tables(self._pending, promote_options="permissive")
+        self._pending, self._pending_rows = [], 0
+        self._write(table)
+
+    def _write(self, table, basename=None):
+        stamps = table.column(self.time_column)
+        table = table.append_column("date", pc.cast(stamps, pa.date32()))
+        sort_keys = [("city", "ascending"), ("date", "ascending")]
+        if "topic" in table.column_names:
+            sort_keys.append(("topic", "ascending"))
+        table = table.sort_by(sort_keys + [(self.time_column, "ascending")])
+        ds.write_dataset(
+            table,
+            self.root,
+            format=_FORMAT,
+            file_options=_WRITE_OPTIONS,
+            partitioning=PARTITIONING,
+            basename_template=basename or f"part-{uuid.uuid4().hex}-{{i}}.parquet",
+            existing_data_behavior="overwrite_or_ignore",
+            max_rows_per_group=self.row_group_size,
+            min_rows_per_group=min(self.row_group_size, len(table)),
+        )
+
+    def _partitions(self, cities=None, start=None, end=None):
+        """``(city, date, directory)`` for each partition matching ``cities`` and
+        the date range, listing only the city directories asked for"""
+        first = _utc_date(start) if start is not None else None
+        last = _utc_date(end) if end is not None else None
+        if not os.path.isdir(self.root):
+            return
+        for city_entry in sorted(os.scandir(self.root), key=lambda entry: entry.name):
+            if not (city_entry.is_dir() and city_entry.name.startswith("city=")):
+                continue
+            city = unquote(city_entry.name[len("city="):])
+            if cities is not None and city not in cities:
+                continue
+            for date_entry in sorted(os.scandir(city_entry.path), key=lambda entry: entry.name):
+                if not (date_entry.is_dir() and date_entry.name.startswith("date=")):
+                    continue
+                day = date.fromisoformat(date_entry.name[len("date="):])
+                if (first is None or day >= first) and (last is None or day <= last):
+                    yield city, day, date_entry.path
+
+    def files(self, cities=None, start=None, end=None):
+        """Parquet files in the partitions matching ``cities`` and the date range"""
+        return [
+            path
+            for _, _, directory in self._partitions(cities, start, end)
+            for path in sorted(glob.glob(os.path.join(directory, "*.parquet")))
+        ]
+
+    def _open(self, paths):
+        """Dataset over ``paths`` with one schema unified from all their footers,
+        since fields differ between sources (e.g. only News has ``url``)"""
+        discovered = ds.dataset(paths, format=_FORMAT, partitioning=PARTITIONING, partition_base_dir=self.root)
+        fragments = list(discovered.get_fragments())
+        schema = pa.unify_schemas(
+            [fragment.physical_schema for fragment in fragments] + [PARTITIONING.schema],
+            promote_options="permissive",
+        )
+        return ds.FileSystemDataset(fragments, schema, _FORMAT, discovered.filesystem)
+
+    def read(self, cities=None, topics=None, start=None, end=None, columns=None):
+        """Archived posts for ``cities`` and ``topics`` created in ``[start, end)``.
+
+        ``None`` leaves a dimension unfiltered. Returns a ``PostStore`` sorted
+        by time, with the store's dictionary encoding.
+        """
+        paths = self.files(cities, start, end)
+        if not paths:
+            return PostStore()
+
+        # City and date are already settled by the directories; topic and
+        # time are checked against row-group statistics before any row is read
+        expression = ds.scalar(True)
+        if topics is not None:
+            expression &= ds.field("topic").isin(list(topics))
+        if start is not None:
+            expression &= ds.field(self.time_column) >= _utc(start)
+        if end is not None:
+            expression &= ds.field(self.time_column) < _utc(end)
+
+        table = self._open(paths).to_table(columns=columns, filter=expression)
+        if "date" in table.column_names and (columns is None or "date" not in columns):
+            table = table.drop_columns(["date"])
+        if self.time_column in table.column_names:
+            table = table.sort_by(self.time_column)
+        for i, name in enumerate(table.column_names):
+            if name in CATEGORICAL_COLUMNS and not pa.types.is_dictionary(table.schema.field(i).type):
+                table = table.set_column(i, name, pc.dictionary_encode(table.column(i)))
+        return PostStore(table.unify_dictionaries())
+
+    def read_recent(self, days, cities=None, topics=None, columns=None, now=None):
+        """Posts from the last ``days`` days"""
+        now = now or datetime.now(timezone.utc)
+        return self.read(cities, topics, now - timedelta(days=days), None, columns)
+
+    def compact(self, before=None):
+        """Merge partitions written in several small appends into row-group-sized files.
+
+        Only dates before ``before`` (default: today, UTC) are touched, so
+        partitions still receiving posts are left alone. Returns how many
+        partitions were merged.
+        """
+        last = _utc_date(before or datetime.now(timezone.utc))
+        compacted = 0
+        for _, day, directory in list(self._partitions()):
+            paths = sorted(glob.glob(os.path.join(directory, "*.parquet")))
+            if day >= last or len(paths) < 2:
+                continue
+            table = self._open(paths).to_table().drop_columns(["date"])
+            # Write the merged file before removing the parts it replaces
+            self._write(table, basename=f"compact-{uuid.uuid4().hex}-{{i}}.parquet")
+            for path in paths:
+                os.remove(path)
+            compacted += 1
+        return compacted
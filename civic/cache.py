@@ -0,0 +1,212 @@
+"""Content-addressed memoization for sentiment scores.
+
+Scores are keyed by a BLAKE2 hash of (analyzer, analyzer version, normalized
+text) and kept in two tiers: a bounded in-memory LRU shared by every session
+in the process, and a SQLite file that survives restarts.
+
+``data_fingerprint`` hashes DataFrames, arrays and plain values into the
+keys used by the map and chart caches.
+"""
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import unicodedata
+from importlib import metadata
+
+import numpy as np
+import pandas as pd
+from cachetools import LRUCache
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "civic-sentiment")
+
+# Packages whose installed version is folded into the key for each analyzer,
+# so upgrading a lexicon never serves stale scores
+ANALYZER_PACKAGES = {
+    "vader": "vaderSentiment",
+    "textblob": "textblob",
+}
+
+# SQLite caps bound parameters per statement; stay well below it
+_SQL_CHUNK = 500
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_text(text):
+    """Normalize text for hashing without changing what the analyzers see.
+
+    Case and punctuation are kept because VADER scores both.
+    """
+    return _WHITESPACE.sub(" ", unicodedata.normalize("NFC", text)).strip()
+
+
+def analyzer_version(analyzer):
+    """Installed version of the package behind an analyzer name"""
+    package = ANALYZER_PACKAGES.get(analyzer, analyzer)
+    try:
+        return metadata.version(package)
+    except metadata.PackageNotFoundError:
+        return "unknown"
+
+
+def cache_key(analyzer, version, text):
+    """Stable content hash for one (analyzer, version, text) triple"""
+    payload = "\x1f".join((analyzer, version, normalize_text(text)))
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=16).hexdigest()
+
+
+class _CountingLRU(LRUCache):
+    """LRUCache that counts entries pushed out by the size bound"""
+
+    def __init__(self, maxsize):
+        super().__init__(maxsize)
+        self.evictions = 0
+
+    def popitem(self):
+        self.evictions += 1
+        return super().popitem()
+
+
+class SentimentCache:
+    """Two-tier score cache: in-memory LRU in front of a SQLite table.
+
+    Pass ``path=None`` for a memory-only cache. All methods are thread-safe,
+    since Streamlit serves each session from its own thread.
+    """
+
+    def __init__(self, path=None, max_entries=100_000):
+        self._lock = threading.Lock()
+        self._memory = _CountingLRU(max_entries)
+        self._versions = {}
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._db = None
+        if path is not None:
+            try:
+                os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+                self._db = sqlite3.connect(path, check_same_thread=False)
+                self._db.execute("PRAGMA journal_mode=WAL")
+                self._db.execute(
+                    "CREATE TABLE IF NOT EXISTS scores (key TEXT PRIMARY KEY, value REAL NOT NULL)"
+                )
+                self._db.commit()
+            except (OSError, sqlite3.Error):
+                # Read-only or missing home directory: fall back to memory only
+                self._db = None
+
+    def _version(self, analyzer):
+        if analyzer not in self._versions:
+            self._versions[analyzer] = analyzer_version(analyzer)
+        return self._versions[analyzer]
+
+    def get_many(self, analyzer, texts):
+        """Return ``{text: score}`` for every text already cached"""
+        version = self._version(analyzer)
+        keys = {text: cache_key(analyzer, version, text) for text in texts}
+        found = {}
+        with self._lock:
+            pending = {}
+            for text, key in keys.items():
+                value = self._memory.get(key)
+                if value is None:
+                    pending.setdefault(key, []).append(text)
+                else:
+                    found[text] = value
+
+            if pending and self._db is not None:
+                pending_keys = list(pending)
+                for start in range(0, len(pending_keys), _SQL_CHUNK):
+                    chunk = pending_keys[start:start + _SQL_CHUNK]
+                    rows = self._db.execute(
+                        f"SELECT key, value FROM scores WHERE key IN ({','.join('?' * len(chunk))})",
+                        chunk,
+                    ).fetchall()
+                    for key, value in rows:
+                        self._memory[key] = value
+                        self.disk_hits += 1
+                        for text in pending.pop(key):
+                            found[text] = value
+
+            self.hits += len(found)
+            self.misses += sum(len(group) for group in pending.values())
+        return found
+
+    def put_many(self, analyzer, scores):
+        """Store ``{text: score}`` in both tiers"""
+        if not scores:
+            return
+        version = self._version(analyzer)
+        rows = [(cache_key(analyzer, version, text), float(value)) for text, value in scores.items()]
+        with self._lock:
+            for key, value in rows:
+                self._memory[key] = value
+            if self._db is not None:
+                try:
+                    self._db.executemany("INSERT OR REPLACE INTO scores (key, value) VALUES (?, ?)", rows)
+                    self._db.commit()
+                except sqlite3.Error:
+                    pass
+
+    def stats(self):
+        """Hit/miss/eviction counters and current tier sizes"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self._memory.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "memory_entries": len(self._memory),
+            }
+
+
+_default_cache = None
+_default_lock = threading.Lock()
+
+
+def default_cache():
+    """Process-wide cache stored under ``$CIVIC_CACHE_DIR`` (or ~/.cache)"""
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            cache_dir = os.environ.get("CIVIC_CACHE_DIR", DEFAULT_CACHE_DIR)
+            _default_cache = SentimentCache(os.path.join(cache_dir, "sentiment.sqlite3"))
+        return _default_cache
+
+
+def cached_scores(analyzer, texts, score_fn, cache=None):
+    """Score texts, calling ``score_fn`` only for texts not already cached.
+
+    Returns a list of scores aligned with ``texts``.
+    """
+    cache = cache or default_cache()
+    known = cache.get_many(analyzer, texts)
+    computed = {}
+    for text in texts:
+        if text not in known and text not in computed:
+            computed[text] = score_fn(text)
+    cache.put_many(analyzer, computed)
+    known.update(computed)
+    return [known[text] for text in texts]
+
+
+def data_fingerprint(*parts):
+    """Stable hex digest of DataFrames, arrays and JSON-able values"""
+    digest = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        if isinstance(part, (pd.DataFrame, pd.Series)):
+            digest.update(pd.util.hash_pandas_object(part, index=True).to_numpy().tobytes())
+            if isinstance(part, pd.DataFrame):
+                digest.update(repr(list(part.columns)).encode())
+        elif isinstance(part, np.ndarray):
+            digest.update(repr((part.dtype.str, part.shape)).encode())
+            digest.update(np.ascontiguousarray(part).tobytes())
+        else:
+            digest.update(json.dumps(part, sort_keys=True, default=str).encode())
+        digest.update(b"\x1f")
+    return digest.hexdigest()
@@ -0,0 +1,59 @@
+"""Cached, leak-free Matplotlib charts for the dashboards.
+
+Charts are drawn on ``matplotlib.figure.Figure`` objects created directly,
+not through ``pyplot``, so no global figure registry keeps them alive after
+rendering. The rendered PNG is cached under a fingerprint of the chart name,
+the plotted data and the figure size: a rerun with unchanged data sends the
+cached image without drawing or rasterizing anything.
+"""
+import io
+import threading
+
+import streamlit as st
+from cachetools import LRUCache
+from matplotlib.figure import Figure
+
+from civic.cache import data_fingerprint
+
+DPI = 150
+
+_png_cache = LRUCache(maxsize=64)
+_png_lock = threading.Lock()
+
+
+def render_png(name, data, draw, figsize=(8, 6)):
+    """PNG bytes of ``draw(ax, data)``, cached by ``name``, ``data`` and ``figsize``.
+
+    ``draw`` must only depend on ``data`` (and constants), since ``data`` is
+    what the cache key is computed from.
+    """
+    key = data_fingerprint(name, data, list(figsize))
+    with _png_lock:
+        png = _png_cache.get(key)
+    if png is None:
+        fig = Figure(figsize=figsize)
+        try:
+            draw(fig.subplots(), data)
+            buffer = io.BytesIO()
+            fig.savefig(buffer, format="png", dpi=DPI, bbox_inches="tight")
+            png = buffer.getvalue()
+        finally:
+            fig.clear()
+        with _png_lock:
+            _png_cache[key] = png
+    return png
+
+
+def show_chart(name, data, draw, figsize=(8, 6)):
+    """Render (or reuse) a chart and place it in the page"""
+    st.image(render_png(name, data, draw, figsize), width="stretch")
+
+
+def chart_cache_stats():
+    with _png_lock:
+        return {"entries": len(_png_cache), "bytes": sum(len(png) for png in _png_cache.values())}
+
+
+def clear_chart_cache():
+    with _png_lock:
+        _png_cache.clear()
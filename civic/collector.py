@@ -0,0 +1,176 @@
+"""Headless collector: polls the post sources and fills the local store.
+
+Runs outside Streamlit, so fetching, scoring and aggregation happen once per
+schedule tick instead of once per dashboard session::
+
+    python -m civic.collector --cities "New York" Chicago --interval 300
+    python -m civic.collector --topic-set Housing,Transportation --once
+
+Each (city, topic set) is a feed. Every pass fetches the feed's sources
+concurrently through ``civic.ingest.fetch_all`` and writes only posts whose
+``id`` is not stored yet, along with their hourly rollups, to
+``civic.localstore.LocalStore``, and appends them to the Parquet history in
+``civic.archive.PostArchive``. Tweets and articles a feed has already taken
+in are recognized by fingerprint in a persistent ``civic.dedup.SeenIndex``
+and dropped before scoring; near-duplicates are scored once and weighted by
+their cluster size (``civic.neardup``). Twitter and News credentials come from the
+``TWITTER_BEARER_TOKEN`` and ``NEWS_API_KEY`` environment variables; without
+them those sources fall back to mock posts, as in the dashboard.
+"""
+import argparse
+import logging
+import os
+import time
+from datetime import datetime, timezone
+
+from civic.archive import PostArchive, default_archive_dir
+from civic.dedup import SeenIndex, duplicate_keys
+from civic.ingest import fetch_all
+from civic.localstore import LocalStore, default_store_path
+from civic.sources import (
+    CIVIC_ISSUES, LogNotifier, fetch_news_data, fetch_twitter_data, generate_mock_social_data,
+)
+from civic.store import PostStore
+
+# Source names match the Pro dashboard's "Data Sources" choices
+SOURCES = {
+    "mock": "Mock Civic Data",
+    "twitter": "Twitter API",
+    "news": "News API",
+}
+
+# Per-source deadlines (seconds), as in the Pro dashboard
+SOURCE_TIMEOUTS = {
+    "Mock Civic Data": 5,
+    "Twitter API": 10,
+    "News API": 10,
+}
+
+logger = logging.getLogger("civic.collector")
+
+
+class Feed:
+    """One (city, topic set) the collector polls"""
+
+    def __init__(self, city, topics, sources, twitter_budget=100, news_count=30, mock_count=100):
+        self.city = city
+        self.topics = list(topics)
+        self.sources = list(sources)
+        self.twitter_budget = twitter_budget
+        self.news_count = news_count
+        self.mock_count = mock_count
+        self.name = None
+        self.seen = None
+
+    def fetchers(self, notify):
+        """Zero-argument fetchers for ``fetch_all``, keyed by source name.
+
+        Each pass asks the APIs again (``ttl=0`` bypasses the response cache);
+        items already in ``self.seen`` are dropped before scoring.
+        """
+        bearer_token = os.environ.get("TWITTER_BEARER_TOKEN", "")
+        api_key = os.environ.get("NEWS_API_KEY", "")
+        available = {
+            "Mock Civic Data": lambda: generate_mock_social_data(self.city, self.topics, self.mock_count, "Civic Platform"),
+            "Twitter API": lambda: fetch_twitter_data(
+                self.city, self.topics, self.twitter_budget, 0, notify, bearer_token, self.seen),
+            "News API": lambda: fetch_news_data(
+                self.city, self.topics, self.news_count, 0, notify, api_key, self.seen),
+        }
+        return {name: available[name] for name in self.sources}
+
+
+def collect(store, feed, notify=None, archive=None):
+    """Fetch one feed once, store its new posts and queue them for ``archive``;
+    returns how many were new"""
+    started_at = datetime.now(timezone.utc)
+    results, status = fetch_all(feed.fetchers(notify or LogNotifier()), SOURCE_TIMEOUTS)
+    posts = PostStore.concat([results[name] for name in feed.sources if name in results])
+    new_posts = store.write(feed.name, posts)
+    store.record_run(feed.name, started_at, datetime.now(timezone.utc), len(new_posts), status)
+    if feed.seen is not None and "fingerprint" in new_posts.columns:
+        feed.seen.add(list(new_posts.column("fingerprint")) + duplicate_keys(new_posts))
+    if archive is not None:
+        archive.append(new_posts)
+
+    failed = {name: state for name, state in status.items() if state != "ok"}
+    logger.info("%s: %d fetched, %d new%s", feed.name, len(posts), len(new_posts),
+                f" ({failed})" if failed else "")
+    return len(new_posts)
+
+
+def run(store, feeds, interval=None, archive=None, seen=None):
+    """Collect every feed, then repeat every ``interval`` seconds (once if ``None``).
+
+    New posts also go to ``archive``, flushed after every pass; partitions
+    of past days are compacted once a day. Each feed keeps its own scope
+    of the ``seen`` index.
+    """
+    for feed in feeds:
+        feed.name = store.register_feed(feed.city, feed.topics, feed.sources)
+        if seen is not None:
+            feed.seen = seen.scoped(feed.name)
+    compacted_on = None
+    while True:
+        started = time.monotonic()
+        for feed in feeds:
+            try:
+                collect(store, feed, archive=archive)
+            except Exception:
+                # A broken feed must not stop the others or the schedule
+                logger.exception("%s: collection failed", feed.name)
+        if archive is not None:
+            archive.flush()
+            today = datetime.now(timezone.utc).date()
+            if compacted_on != today:
+                archive.compact()
+                compacted_on = today
+        if interval is None:
+            return
+        time.sleep(max(0.0, interval - (time.monotonic() - started)))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Poll civic post sources into the local store")
+    parser.add_argument("--cities", nargs="+", default=["New York"])
+    parser.add_argument("--topic-set", action="append", dest="topic_sets", metavar="TOPICS",
+                        help="comma-separated topics polled as one feed per city; repeat for more feeds "
+                             "(default: every topic)")
+    parser.add_argument("--sources", nargs="+", choices=sorted(SOURCES), default=["mock", "twitter"])
+    parser.add_argument("--interval", type=float, default=300, help="seconds between passes")
+    parser.add_argument("--once", action="store_true", help="collect one pass and exit")
+    parser.add_argument("--db", default=None, help=f"SQLite file to write (default: {default_store_path()})")
+    parser.add_argument("--twitter-budget", type=int, default=100, help="max tweets per feed and pass")
+    parser.add_argument("--news-count", type=int, default=30, help="max articles per feed and pass")
+    parser.add_argument("--archive", default=None,
+                        help=f"Parquet history directory (default: {default_archive_dir()})")
+    parser.add_argument("--no-archive", action="store_true", help="keep posts in the SQLite store only")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    topic_sets = [
+        [topic.strip() for topic in topic_set.split(",") if topic.strip()] for topic_set in args.topic_sets
+    ] if args.topic_sets else [list(CIVIC_ISSUES)]
+    sources = [SOURCES[source] for source in args.sources]
+    feeds = [
+        Feed(city, topics, sources, args.twitter_budget, args.news_count)
+        for city in args.cities for topics in topic_sets
+    ]
+
+    store = LocalStore(args.db or default_store_path())
+    archive = None if args.no_archive else PostArchive(args.archive or default_archive_dir())
+    # The seen index lives in its own table of the same SQLite file
+    seen = SeenIndex(store.path)
+    logger.info("Collecting %d feed(s) into %s", len(feeds), store.path)
+    try:
+        run(store, feeds, None if args.once else args.interval, archive, seen)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        seen.close()
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
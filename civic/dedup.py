@@ -0,0 +1,225 @@
+"""Stable content fingerprints and a seen-set for dropping repeat items.
+
+A fingerprint is a BLAKE2 hash of an item's source id (tweet id, article
+URL, ...) and its normalized text, so it is the same in every process and
+after every restart. ``SeenIndex`` answers "seen before?" for a whole batch:
+a Bloom filter rules out most new items without touching the exact index
+(an in-memory set, or a SQLite table that survives restarts), which is
+consulted only for the Bloom filter's positives. Fetchers check it before
+scoring, so recurring pulls cost neither scoring time nor inflated counts.
+"""
+import hashlib
+import math
+import os
+import sqlite3
+import threading
+
+import numpy as np
+
+from civic.cache import normalize_text
+
+# SQLite caps bound parameters per statement; stay well below it
+_SQL_CHUNK = 500
+
+
+def fingerprint(source_id, text):
+    """Hex BLAKE2 digest of a source id and the item's normalized, case-folded text"""
+    payload = "\x1f".join((str(source_id), normalize_text(text or "").casefold()))
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def fingerprints(source_ids, texts):
+    """``fingerprint`` for aligned sequences of source ids and texts"""
+    return [fingerprint(source_id, text) for source_id, text in zip(source_ids, texts)]
+
+
+def duplicate_keys(posts):
+    """Fingerprints of the near-duplicates folded into a ``PostStore``'s posts
+    (its ``duplicates`` column, see ``civic.neardup``)"""
+    if "duplicates" not in posts.columns:
+        return []
+    return [key for keys in posts.column("duplicates") if keys is not None for key in keys]
+
+
+def _hash_pairs(keys):
+    """Two 64-bit hashes per fingerprint, taken from its own digest bytes"""
+    raw = np.frombuffer(bytes.fromhex("".join(keys)), dtype="<u8").reshape(len(keys), 2)
+    return raw[:, 0], raw[:, 1] | np.uint64(1)
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over hex fingerprints.
+
+    Sized for ``capacity`` keys at ``error_rate`` false positives; the bit
+    positions come from the fingerprint itself by double hashing.
+    """
+
+    def __init__(self, capacity, error_rate=0.01):
+        self.capacity = max(1, int(capacity))
+        self.error_rate = error_rate
+        self.size = max(64, int(math.ceil(-self.capacity * math.log(error_rate) / math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.size / self.capacity * math.log(2)))
+        self.bits = np.zeros((self.size + 7) // 8, dtype=np.uint8)
+        self.count = 0
+
+    def _positions(self, keys):
+        first, step = _hash_pairs(keys)
+        rounds = np.arange(self.hash_count, dtype=np.uint64)
+        with np.errstate(over="ignore"):
+            return (first[:, None] + rounds[None, :] * step[:, None]) % np.uint64(self.size)
+
+    def add(self, keys):
+        if not len(keys):
+            return
+        positions = self._positions(keys).ravel()
+        np.bitwise_or.at(self.bits, positions >> np.uint64(3), np.left_shift(1, positions & np.uint64(7)).astype(np.uint8))
+        self.count += len(keys)
+
+    def might_contain(self, keys):
+        """Boolean mask: ``False`` means the key was certainly never added"""
+        if not len(keys):
+            return np.zeros(0, dtype=bool)
+        positions = self._positions(keys)
+        hits = (self.bits[positions >> np.uint64(3)] >> (positions & np.uint64(7)).astype(np.uint8)) & 1
+        return hits.all(axis=1)
+
+
+class SeenIndex:
+    """Set of fingerprints already taken in, with a Bloom filter in front.
+
+    ``path=None`` keeps the exact index in memory; otherwise it is a SQLite
+    table, loaded into the Bloom filter on open. The filter is rebuilt at
+    twice the size when it fills up, so lookups stay mostly disk-free as the
+    index grows. All methods are thread-safe.
+    """
+
+    def __init__(self, path=None, capacity=100_000, error_rate=0.01):
+        self.path = path
+        self.error_rate = error_rate
+        self._lock = threading.Lock()
+        self._memory = set() if path is None else None
+        self._db = None
+        self.bloom_rejects = 0
+        self.exact_checks = 0
+        self.repeats = 0
+        if path is not None:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("CREATE TABLE IF NOT EXISTS seen (fingerprint TEXT PRIMARY KEY) WITHOUT ROWID")
+            self._db.commit()
+        self._bloom = BloomFilter(max(capacity, 2 * len(self)), error_rate)
+        self._bloom.add(self._all_keys())
+
+    def __len__(self):
+        if self._db is None:
+            return len(self._memory)
+        return self._db.execute("SELECT COUNT(*) FROM seen").fetchone()[0]
+
+    def _all_keys(self):
+        if self._db is None:
+            return list(self._memory)
+        return [key for (key,) in self._db.execute("SELECT fingerprint FROM seen")]
+
+    def _exact(self, keys):
+        """The subset of ``keys`` in the exact index"""
+        if self._db is None:
+            return {key for key in keys if key in self._memory}
+        found = set()
+        for start in range(0, len(keys), _SQL_CHUNK):
+            chunk = keys[start:start + _SQL_CHUNK]
+            rows = self._db.execute(
+                f"SELECT fingerprint FROM seen WHERE fingerprint IN ({','.join('?' * len(chunk))})", chunk
+            )
+            found.update(key for (key,) in rows)
+        return found
+
+    def _unseen(self, keys):
+        keys = list(keys)
+        maybe = self._bloom.might_contain(keys)
+        candidates = [key for key, hit in zip(keys, maybe) if hit]
+        self.bloom_rejects += len(keys) - len(candidates)
+        self.exact_checks += len(candidates)
+        known = self._exact(candidates) if candidates else set()
+
+        # Also keep only the first occurrence of a key within the batch
+        fresh = np.zeros(len(keys), dtype=bool)
+        taken = set()
+        for position, key in enumerate(keys):
+            if key not in known and key not in taken:
+                taken.add(key)
+                fresh[position] = True
+        self.repeats += len(keys) - int(fresh.sum())
+        return fresh
+
+    def _add(self, keys):
+        keys = list(dict.fromkeys(keys))
+        if not keys:
+            return
+        if self._db is None:
+            self._memory.update(keys)
+        else:
+            with self._db:
+                self._db.executemany("INSERT OR IGNORE INTO seen (fingerprint) VALUES (?)", [(key,) for key in keys])
+        if self._bloom.count + len(keys) > self._bloom.capacity:
+            self._bloom = BloomFilter(2 * (self._bloom.count + len(keys)), self.error_rate)
+            self._bloom.add(self._all_keys())
+        else:
+            self._bloom.add(keys)
+
+    def unseen(self, keys):
+        """Boolean mask of keys not in the index (first occurrence within the batch only)"""
+        with self._lock:
+            return self._unseen(keys)
+
+    def add(self, keys):
+        """Record keys as seen"""
+        with self._lock:
+            self._add(keys)
+
+    def claim(self, keys):
+        """``unseen`` and ``add`` in one step; returns the mask of keys that were new"""
+        with self._lock:
+            fresh = self._unseen(keys)
+            self._add([key for key, new in zip(keys, fresh) if new])
+            return fresh
+
+    def scoped(self, name):
+        """View of this index whose keys only count as seen within ``name``
+        (e.g. one collector feed), sharing the same storage"""
+        return ScopedSeenIndex(self, name)
+
+    def stats(self):
+        """Bloom rejections, exact-index lookups and repeats dropped so far"""
+        with self._lock:
+            return {
+                "bloom_rejects": self.bloom_rejects,
+                "exact_checks": self.exact_checks,
+                "repeats": self.repeats,
+                "bloom_capacity": self._bloom.capacity,
+            }
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+
+
+class ScopedSeenIndex:
+    """``SeenIndex`` view that namespaces keys by hashing them with a scope name"""
+
+    def __init__(self, index, name):
+        self.index = index
+        self.name = name
+
+    def _keys(self, keys):
+        return [fingerprint(self.name, key) for key in keys]
+
+    def unseen(self, keys):
+        return self.index.unseen(self._keys(keys))
+
+    def add(self, keys):
+        self.index.add(self._keys(keys))
+
+    def claim(self, keys):
+        return self.index.claim(self._keys(keys))
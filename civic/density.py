@@ -0,0 +1,97 @@
+"""Server-side sentiment density surfaces on a fixed lat/lng grid.
+
+Posts are binned onto a ``DensityGrid`` as they arrive (each batch is one
+``bincount``), so a surface over millions of posts is never recomputed from
+raw points. ``heat_points`` smooths the grid with a Gaussian kernel and
+block-sums it down to a client-sized grid: the browser receives at most
+``rows * cols`` weighted points however many posts went in.
+"""
+import numpy as np
+from scipy.ndimage import gaussian_filter
+
+DEFAULT_SHAPE = (256, 256)
+CLIENT_SHAPE = (64, 64)
+# Kernel width in fine-grid cells
+DEFAULT_SIGMA = 2.0
+
+
+def negative_weights(sentiment_scores):
+    """Per-post weight: how negative the post is (0 for neutral/positive)"""
+    return np.clip(-np.asarray(sentiment_scores, dtype=float), 0.0, None)
+
+
+class DensityGrid:
+    """Post counts and weight sums accumulated on a regular lat/lng grid"""
+
+    def __init__(self, bounds, shape=DEFAULT_SHAPE):
+        self.lat_min, self.lat_max, self.lng_min, self.lng_max = map(float, bounds)
+        self.shape = tuple(shape)
+        self.counts = np.zeros(self.shape, dtype=np.int64)
+        self.weights = np.zeros(self.shape)
+        self.dropped = 0
+
+    @classmethod
+    def around(cls, center, radius_deg=0.3, shape=DEFAULT_SHAPE):
+        """Square grid of ``radius_deg`` around a ``(lat, lng)`` center"""
+        lat, lng = center
+        return cls((lat - radius_deg, lat + radius_deg, lng - radius_deg, lng + radius_deg), shape)
+
+    def __len__(self):
+        return int(self.counts.sum())
+
+    def add(self, latitudes, longitudes, weights=None):
+        """Fold a batch of posts into the grid; points outside the bounds are counted as dropped"""
+        lat = np.asarray(latitudes, dtype=float)
+        lng = np.asarray(longitudes, dtype=float)
+        weights = np.ones(len(lat)) if weights is None else np.asarray(weights, dtype=float)
+        rows, cols = self.shape
+
+        row = np.floor((lat - self.lat_min) / (self.lat_max - self.lat_min) * rows)
+        col = np.floor((lng - self.lng_min) / (self.lng_max - self.lng_min) * cols)
+        inside = (row >= 0) & (row < rows) & (col >= 0) & (col < cols) & np.isfinite(weights)
+        self.dropped += int((~inside).sum())
+
+        cells = row[inside].astype(np.int64) * cols + col[inside].astype(np.int64)
+        self.counts += np.bincount(cells, minlength=rows * cols).reshape(self.shape)
+        self.weights += np.bincount(cells, weights=weights[inside], minlength=rows * cols).reshape(self.shape)
+        return self
+
+    def merge(self, other):
+        """Add another grid with the same bounds and shape"""
+        if (other.shape, other.lat_min, other.lat_max, other.lng_min, other.lng_max) != (
+                self.shape, self.lat_min, self.lat_max, self.lng_min, self.lng_max):
+            raise ValueError("density grids must share bounds and shape to merge")
+        self.counts += other.counts
+        self.weights += other.weights
+        self.dropped += other.dropped
+        return self
+
+    def surface(self, sigma=DEFAULT_SIGMA, weighted=True):
+        """Kernel density: the grid convolved with a Gaussian of ``sigma`` cells"""
+        grid = self.weights if weighted else self.counts.astype(float)
+        return gaussian_filter(grid, sigma=sigma, mode="constant")
+
+    def downsample(self, grid, shape=CLIENT_SHAPE):
+        """Block-sum ``grid`` to ``shape`` (each side must divide the grid's side)"""
+        rows, cols = self.shape
+        out_rows, out_cols = shape
+        if rows % out_rows or cols % out_cols:
+            raise ValueError(f"cannot downsample {self.shape} to {shape}")
+        return grid.reshape(out_rows, rows // out_rows, out_cols, cols // out_cols).sum(axis=(1, 3))
+
+    def heat_points(self, shape=CLIENT_SHAPE, sigma=DEFAULT_SIGMA, weighted=True, min_fraction=0.01):
+        """``[[lat, lng, weight], ...]`` for cell centers of the smoothed, downsampled surface.
+
+        Weights are scaled to a maximum of 1; cells below ``min_fraction`` of
+        the peak are left out.
+        """
+        coarse = self.downsample(self.surface(sigma, weighted), shape)
+        peak = coarse.max()
+        if peak <= 0:
+            return []
+        coarse = coarse / peak
+        out_rows, out_cols = shape
+        row, col = np.nonzero(coarse >= min_fraction)
+        lat = self.lat_min + (row + 0.5) * (self.lat_max - self.lat_min) / out_rows
+        lng = self.lng_min + (col + 0.5) * (self.lng_max - self.lng_min) / out_cols
+        return np.column_stack([lat, lng, coarse[row, col]]).round(5).tolist()
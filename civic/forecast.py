@@ -0,0 +1,201 @@
+"""Batched exponential-smoothing forecasts with prediction intervals.
+
+``HoltWinters`` is additive Holt-Winters with a damped trend (ETS(A,Ad,A))
+run over many series at once: every state is an array with one entry per
+series, so fitting thousands of region x emotion series is a loop over time
+steps, not over series. Smoothing parameters are chosen per series from a
+small grid by one-step-ahead squared error, all grid points evaluated in
+the same pass. ``update`` folds in newly closed buckets without refitting,
+and ``forecast`` returns the mean path with normal prediction intervals
+from the one-step error variance.
+
+``RollupForecast`` keeps such a model in step with the daily buckets of a
+``civic.timebuckets.HourlyRollup``.
+"""
+import threading
+from statistics import NormalDist
+
+import numpy as np
+import pandas as pd
+
+# Candidate smoothing parameters tried for every series (level, trend, season)
+ALPHAS = (0.1, 0.3, 0.5, 0.8)
+BETAS = (0.0, 0.05, 0.2)
+GAMMAS = (0.0, 0.1, 0.3)
+# Trend damping: the trend's effect fades over the horizon instead of running away
+DAMPING = 0.9
+# Weekly seasonality for daily buckets
+SEASON_LENGTH = 7
+
+
+def _grid(seasonal):
+    """Parameter combinations as three aligned arrays; the trend never adapts faster than the level"""
+    combos = [
+        (alpha, beta, gamma)
+        for alpha in ALPHAS for beta in BETAS if beta <= alpha
+        for gamma in (GAMMAS if seasonal else (0.0,)) if gamma <= 1 - alpha
+    ]
+    return tuple(np.array(values) for values in zip(*combos))
+
+
+class HoltWinters:
+    """Damped-trend additive Holt-Winters for a batch of series.
+
+    Seasonality is used when the history spans at least two seasons;
+    otherwise the model is damped-trend Holt. Call ``fit`` once with the
+    history, ``update`` as new buckets close and ``forecast`` any time.
+    """
+
+    def __init__(self, season_length=SEASON_LENGTH, damping=DAMPING):
+        self.season_length = season_length
+        self.damping = damping
+        self.seasonal = False
+        self.observations = 0
+
+    def _step(self, values, alpha, beta, gamma):
+        """Advance every state by one bucket; returns the one-step-ahead errors"""
+        position = self.observations % self.season.shape[-1]
+        season = self.season[..., position]
+        errors = values - (self.level + self.damping * self.trend + season)
+        self.level = self.level + self.damping * self.trend + alpha * errors
+        self.trend = self.damping * self.trend + beta * errors
+        self.season[..., position] = season + gamma * errors
+        self.observations += 1
+        return errors
+
+    def _initialize(self, history, shape):
+        """Starting states from the first season (or first few buckets) of ``history``"""
+        warmup = self.season_length if self.seasonal else min(3, history.shape[1])
+        start = history[:, :warmup].mean(axis=1) if warmup else np.zeros(len(history))
+        self.level = np.broadcast_to(start[:, None], shape).copy()
+        self.trend = np.zeros(shape)
+        if self.seasonal:
+            season = history[:, :self.season_length] - start[:, None]
+            self.season = np.broadcast_to(season[:, None, :], shape + (self.season_length,)).copy()
+        else:
+            self.season = np.zeros(shape + (1,))
+        self.observations = 0
+
+    def fit(self, history):
+        """Fit every row of ``history`` (series x buckets, oldest first); returns ``self``"""
+        history = np.asarray(history, dtype=float)
+        count, length = history.shape
+        self.seasonal = self.season_length > 1 and length >= 2 * self.season_length
+        alphas, betas, gammas = _grid(self.seasonal)
+
+        # Run all grid points side by side: states are (series, grid point)
+        self._initialize(history, (count, len(alphas)))
+        warmup = self.season_length if self.seasonal else 1
+        squared = np.zeros((count, len(alphas)))
+        for column in range(length):
+            errors = self._step(history[:, column, None], alphas, betas, gammas)
+            if column >= warmup:
+                squared += errors ** 2
+
+        # Keep each series' best grid point
+        best = squared.argmin(axis=1)
+        rows = np.arange(count)
+        self.alpha, self.beta, self.gamma = alphas[best], betas[best], gammas[best]
+        self.level, self.trend = self.level[rows, best], self.trend[rows, best]
+        self.season = self.season[rows, best]
+        self.squared_errors = squared[rows, best]
+        self.scored = max(0, length - warmup)
+        return self
+
+    def update(self, values):
+        """Fold newly closed buckets into the states: one value per series, or
+        series x buckets for several at once"""
+        values = np.asarray(values, dtype=float)
+        if values.ndim == 1:
+            values = values[:, None]
+        for column in values.T:
+            errors = self._step(column, self.alpha, self.beta, self.gamma)
+            self.squared_errors += errors ** 2
+            self.scored += 1
+        return self
+
+    @property
+    def sigma(self):
+        """Per-series standard deviation of the one-step-ahead errors"""
+        if not self.scored:
+            return np.zeros(len(self.level))
+        return np.sqrt(self.squared_errors / self.scored)
+
+    def forecast(self, horizon, coverage=0.8):
+        """``(mean, lower, upper)`` arrays of series x ``horizon`` buckets ahead.
+
+        Intervals are normal with the ETS(A,Ad,A) ``h``-step variance
+        ``sigma^2 * (1 + sum c_j^2)``, ``c_j = alpha + beta*phi_j + gamma*[j % m == 0]``.
+        """
+        steps = np.arange(1, horizon + 1)
+        # phi_h = phi + phi^2 + ... + phi^h
+        damped = np.cumsum(self.damping ** steps)
+        m = self.season.shape[-1]
+        positions = (self.observations + steps - 1) % m
+        mean = self.level[:, None] + damped[None, :] * self.trend[:, None] + self.season[:, positions]
+
+        seasonal_hit = (steps % m == 0) if self.seasonal else np.zeros(horizon, dtype=bool)
+        weights = (self.alpha[:, None] + self.beta[:, None] * damped[None, :]
+                   + self.gamma[:, None] * seasonal_hit[None, :])
+        # The h-step variance sums c_j^2 for j < h
+        spread = np.sqrt(1 + np.concatenate([np.zeros((len(mean), 1)), np.cumsum(weights ** 2, axis=1)[:, :-1]],
+                                            axis=1))
+        half_width = NormalDist().inv_cdf(0.5 + coverage / 2) * self.sigma[:, None] * spread
+        return mean, mean - half_width, mean + half_width
+
+
+class RollupForecast:
+    """Daily emotion-count forecasts per ``by`` value, kept in step with an ``HourlyRollup``.
+
+    ``refresh`` fits on the rollup's complete days the first time (or when
+    the set of series changes) and afterwards only folds in days that have
+    closed since. Counts are not negative, so means and bounds are clipped
+    at zero. Safe to share between threads.
+    """
+
+    def __init__(self, rollup, by="region", labels=None, history_days=None, **options):
+        self.rollup = rollup
+        self.by = by
+        self.labels = labels
+        self.history_days = history_days or rollup.capacity // 24
+        self.options = options
+        self.model = None
+        self.index = None
+        self.last_day = None
+        self._lock = threading.Lock()
+
+    def refresh(self):
+        """Bring the model up to the rollup's newest complete day; returns ``self``"""
+        with self._lock:
+            self._refresh()
+        return self
+
+    def _refresh(self):
+        closed = self.rollup.closed_day()
+        if closed is None or (self.model is not None and closed <= self.last_day):
+            return
+        history = self.rollup.daily_counts(self.history_days, by=self.by, labels=self.labels)
+        if self.model is None or not history.index.equals(self.index):
+            self.model = HoltWinters(**self.options).fit(history.to_numpy())
+            self.index = history.index
+        else:
+            # Only the days that closed since the last refresh
+            self.model.update(history.to_numpy()[:, max(0, history.shape[1] - (closed - self.last_day)):])
+        self.last_day = closed
+
+    def forecast(self, days=7, coverage=0.8):
+        """Long table of ``mean``, ``lower`` and ``upper`` per (``by`` value, emotion, day)"""
+        with self._lock:
+            self._refresh()
+            if self.model is None or not len(self.index):
+                return pd.DataFrame(columns=["mean", "lower", "upper"])
+            paths = self.model.forecast(days, coverage)
+            series, last_day = self.index, self.last_day
+        mean, lower, upper = (np.clip(values, 0, None) for values in paths)
+        dates = pd.DatetimeIndex(np.arange(last_day + 1, last_day + days + 1).astype("datetime64[D]"), name="day")
+        index = pd.MultiIndex.from_arrays(
+            [series.get_level_values(level).repeat(days) for level in range(series.nlevels)]
+            + [np.tile(dates, len(series))],
+            names=list(series.names) + ["day"],
+        )
+        return pd.DataFrame({"mean": mean.ravel(), "lower": lower.ravel(), "upper": upper.ravel()}, index=index)
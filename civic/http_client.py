@@ -0,0 +1,115 @@
+"""Shared HTTP client for the Twitter and News fetchers.
+
+One keep-alive ``requests.Session`` per process, explicit timeouts, jittered
+exponential backoff on 429/5xx and connection errors, and a response cache
+keyed by (endpoint, query params) so refreshes inside the update window make
+no network calls.
+"""
+import threading
+import time
+
+import requests
+from cachetools import LRUCache
+from requests.adapters import HTTPAdapter
+from tenacity import Retrying, retry_if_exception_type, stop_after_attempt, wait_random_exponential
+
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+# (connect, read) seconds
+DEFAULT_TIMEOUT = (3.05, 15)
+
+
+class RetryableResponse(Exception):
+    """Raised internally for responses worth retrying (429/5xx)"""
+
+    def __init__(self, response):
+        super().__init__(f"HTTP {response.status_code}")
+        self.response = response
+
+
+class CachedHttpClient:
+    """Pooled JSON GET client with retry and a per-call TTL response cache.
+
+    ``get_json`` returns ``(status_code, payload)``. Only 200 responses are
+    cached; ``ttl=None`` keeps an entry until it is evicted or the cache is
+    cleared, ``ttl=0`` bypasses the cache.
+    """
+
+    def __init__(self, pool_size=10, timeout=DEFAULT_TIMEOUT, max_attempts=4,
+                 backoff=0.5, max_backoff=8.0, cache_size=256):
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self._retrying = Retrying(
+            stop=stop_after_attempt(max_attempts),
+            wait=wait_random_exponential(multiplier=backoff, max=max_backoff),
+            retry=retry_if_exception_type(
+                (RetryableResponse, requests.ConnectionError, requests.Timeout)
+            ),
+            reraise=True,
+        )
+        self._cache = LRUCache(cache_size)
+        self._lock = threading.Lock()
+        self.network_calls = 0
+        self.cache_hits = 0
+
+    @staticmethod
+    def cache_key(url, params):
+        """Cache key for an endpoint and its query parameters (headers excluded)"""
+        return url, tuple(sorted((str(k), str(v)) for k, v in (params or {}).items()))
+
+    def _send(self, url, params, headers):
+        with self._lock:
+            self.network_calls += 1
+        response = self.session.get(url, params=params, headers=headers, timeout=self.timeout)
+        if response.status_code in RETRY_STATUS_CODES:
+            raise RetryableResponse(response)
+        return response
+
+    def get_json(self, url, params=None, headers=None, ttl=None):
+        """GET ``url`` and decode JSON, serving from cache inside the TTL"""
+        key = self.cache_key(url, params)
+        if ttl != 0:
+            with self._lock:
+                entry = self._cache.get(key)
+                if entry is not None and (entry[0] is None or entry[0] > time.monotonic()):
+                    self.cache_hits += 1
+                    return entry[1], entry[2]
+
+        try:
+            response = self._retrying(self._send, url, params, headers)
+        except RetryableResponse as e:
+            # Out of attempts: hand the last 429/5xx back to the caller
+            response = e.response
+
+        try:
+            payload = response.json()
+        except ValueError:
+            payload = None
+
+        if response.status_code == 200 and ttl != 0:
+            expires_at = None if ttl is None else time.monotonic() + ttl
+            with self._lock:
+                self._cache[key] = (expires_at, response.status_code, payload)
+
+        return response.status_code, payload
+
+    def clear_cache(self):
+        """Drop every cached response so the next call goes to the network"""
+        with self._lock:
+            self._cache.clear()
+
+
+_shared_client = None
+_shared_lock = threading.Lock()
+
+
+def shared_client():
+    """Process-wide client shared by every Streamlit session"""
+    global _shared_client
+    with _shared_lock:
+        if _shared_client is None:
+            _shared_client = CachedHttpClient()
+        return _shared_client
@@ -0,0 +1,78 @@
+"""Concurrent fan-out over data sources with per-source timeouts."""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from civic.profiling import stage
+
+DEFAULT_TIMEOUT = 10.0
+
+# Fetches given up on that are still running, by future; see ``abandoned_fetches``
+_abandoned = {}
+_abandoned_lock = threading.Lock()
+
+
+def _forget(future):
+    with _abandoned_lock:
+        _abandoned.pop(future, None)
+
+
+def abandoned_fetches():
+    """Names of timed-out fetches that are still running in the background"""
+    with _abandoned_lock:
+        return sorted(_abandoned.values())
+
+
+def fetch_all(fetchers, timeouts=None, default_timeout=DEFAULT_TIMEOUT, thread_setup=None):
+    """Run every source fetcher at once and keep whatever finishes in time.
+
+    ``fetchers`` maps a source name to a zero-argument callable. Each call
+    gets its own pool with one thread per source, so every fetch starts
+    immediately and its deadline from ``timeouts`` (seconds, measured from
+    the common start) is never spent queued behind another call's slow
+    source. Total latency is bounded by the slowest deadline rather than the
+    sum of all sources. ``thread_setup`` runs first inside every worker
+    thread, e.g. to attach the Streamlit script context. Each fetch is timed
+    as the profiling stage ``"fetch: <name>"``.
+
+    Returns ``(results, status)``: results for the sources that finished, and
+    a status per source of ``"ok"``, ``"timeout"`` or ``"error: <message>"``.
+    A fetch that times out cannot be interrupted; it finishes in the
+    background, its result is dropped, and until then it is listed by
+    ``abandoned_fetches``.
+    """
+    timeouts = timeouts or {}
+    if not fetchers:
+        return {}, {}
+
+    def run(name, fetcher):
+        if thread_setup is not None:
+            thread_setup()
+        with stage(f"fetch: {name}"):
+            return fetcher()
+
+    executor = ThreadPoolExecutor(max_workers=len(fetchers), thread_name_prefix="civic-ingest")
+    start = time.monotonic()
+    futures = {name: executor.submit(run, name, fetcher) for name, fetcher in fetchers.items()}
+    deadlines = {name: start + timeouts.get(name, default_timeout) for name in futures}
+
+    results = {}
+    status = {}
+    try:
+        for name in sorted(futures, key=deadlines.get):
+            future = futures[name]
+            try:
+                results[name] = future.result(timeout=max(0.0, deadlines[name] - time.monotonic()))
+                status[name] = "ok"
+            except TimeoutError:
+                status[name] = "timeout"
+                with _abandoned_lock:
+                    _abandoned[future] = name
+                future.add_done_callback(_forget)
+            except Exception as e:
+                status[name] = f"error: {e}"
+    finally:
+        # Running fetches cannot be stopped; the pool's threads exit as they finish
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    return results, status
@@ -0,0 +1,111 @@
+"""Single-pass keyword matching for topics, secondary emotions and risk cues.
+
+Every keyword list the dashboards scan for is compiled into one alternation
+regex at import, so a post is lowercased and scanned once no matter how many
+lists it is checked against.
+"""
+import re
+
+TOPIC_KEYWORDS = {
+    "Education": ['school', 'teacher', 'student', 'education', 'university', 'college', 'campus', 'tuition'],
+    "Healthcare": ['hospital', 'health', 'medical', 'doctor', 'clinic', 'healthcare', 'medicine', 'patient'],
+    "Transportation": ['transit', 'bus', 'train', 'traffic', 'transportation', 'commute', 'subway', 'highway'],
+    "Environment": ['environment', 'pollution', 'green', 'sustainability', 'climate', 'recycling', 'clean energy'],
+    "Housing": ['housing', 'rent', 'apartment', 'homeless', 'affordable', 'eviction', 'mortgage'],
+    "Public Safety": ['safety', 'police', 'crime', 'emergency', 'fire', 'security', 'law enforcement']
+}
+
+# Order matters: the first two labels hit are kept as secondary emotions
+SECONDARY_EMOTION_KEYWORDS = {
+    "Excited": ['happy', 'great', 'excellent', 'love', 'amazing'],
+    "Anxious": ['worried', 'concerned', 'anxious', 'nervous'],
+    "Frustrated": ['angry', 'frustrated', 'mad', 'outrage'],
+    "Disappointed": ['sad', 'disappointed', 'unhappy', 'terrible'],
+    "Hopeful": ['hope', 'optimistic', 'looking forward', 'better'],
+}
+
+RISK_KEYWORDS = {
+    "unrest": ['protest', 'rally', 'demonstration', 'strike', 'outrage', 'anger', 'frustrated'],
+    "urgency": ['urgent', 'emergency', 'crisis', 'immediate', 'now'],
+}
+
+
+class KeywordMatcher:
+    """Match many labelled keyword lists in one pass over the text.
+
+    ``groups`` maps a group name to ``{label: [keywords]}``. Keywords match
+    case-insensitively on word boundaries, with an optional plural
+    ``s``/``es`` suffix, so "rent" matches "rents" but not "parent". A keyword
+    may belong to several labels and groups (e.g. "outrage" is both an
+    emotion and an unrest cue); one hit counts for all of them.
+    """
+
+    def __init__(self, groups):
+        self.groups = groups
+        self._labels = {}
+        for group, labels in groups.items():
+            for label, keywords in labels.items():
+                for keyword in keywords:
+                    self._labels.setdefault(self._normalize(keyword), []).append((group, label))
+
+        pattern = self._trie_pattern(self._labels)
+        self._regex = re.compile(rf"\b({pattern})(?:e?s)?\b", re.IGNORECASE)
+
+    @staticmethod
+    def _normalize(keyword):
+        return " ".join(keyword.lower().split())
+
+    @staticmethod
+    def _trie_pattern(keywords):
+        """Alternation factored by shared prefix, e.g. ``health(?:care)?``.
+
+        Python's regex engine tries a flat alternation branch by branch at
+        every position; sharing prefixes lets it reject most positions after
+        one character, which is several times faster on long keyword lists.
+        Greedy optional suffixes keep the longest keyword at each position.
+        """
+        trie = {}
+        for keyword in keywords:
+            node = trie
+            for char in keyword:
+                node = node.setdefault(char, {})
+            node[""] = {}
+
+        def build(node):
+            branches = [
+                re.escape(char).replace(r"\ ", r"\s+") + build(child)
+                for char, child in sorted(node.items()) if char
+            ]
+            if not branches:
+                return ""
+            body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+            return f"(?:{body})?" if "" in node else body
+
+        return build(trie)
+
+    def scan(self, text):
+        """Return ``{group: {label: hit_count}}`` for one text"""
+        hits = {group: {} for group in self.groups}
+        if not text:
+            return hits
+        for keyword in self._regex.findall(text):
+            keyword = keyword.lower()
+            if keyword not in self._labels:
+                # Multi-word keyword matched across irregular whitespace
+                keyword = self._normalize(keyword)
+            for group, label in self._labels[keyword]:
+                hits[group][label] = hits[group].get(label, 0) + 1
+        return hits
+
+    def scan_batch(self, texts):
+        """Scan a list of texts; duplicates are scanned once"""
+        seen = {}
+        return [seen[text] if text in seen else seen.setdefault(text, self.scan(text)) for text in texts]
+
+
+# Shared matcher covering every list above, compiled once per process
+civic_matcher = KeywordMatcher({
+    "topic": TOPIC_KEYWORDS,
+    "emotion": SECONDARY_EMOTION_KEYWORDS,
+    "risk": RISK_KEYWORDS,
+})
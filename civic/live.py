@@ -0,0 +1,185 @@
+"""Background polling of data sources with incremental merge.
+
+A ``LiveFeed`` runs the source fetchers on its own thread every
+``interval`` seconds (through ``civic.ingest.fetch_all``), drops posts whose
+``fingerprint`` (or ``id``) its ``SeenIndex`` already holds and folds
+only the new ones into its ``DashboardTotals``. It keeps the most recent posts for display but not the
+full history, so each poll costs in proportion to the posts it brings in.
+Pages read a ``snapshot()`` and never wait for a poll; ``versions()``
+tells them cheaply whether anything changed since they last drew.
+"""
+import copy
+import itertools
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+from civic.aggregate import DashboardTotals
+from civic.dedup import SeenIndex, duplicate_keys, fingerprint
+from civic.ingest import fetch_all
+from civic.store import PostStore
+
+# Posts kept for the raw-data view
+RECENT_POSTS = 500
+# Source messages kept for display
+MESSAGE_LOG_SIZE = 20
+
+# Tells feeds apart in ``versions()`` after a restart resets their counters
+_feed_ids = itertools.count(1)
+
+
+class MessageLog:
+    """Stand-in for ``st.sidebar`` in threads that cannot write to the page.
+
+    Supports the ``info``/``success``/``warning``/``error`` calls and
+    ``empty()`` placeholders the fetchers use, and keeps the latest messages.
+    """
+
+    def __init__(self, size=MESSAGE_LOG_SIZE):
+        self.messages = deque(maxlen=size)
+        self.version = 0
+        self._lock = threading.Lock()
+
+    def _log(self, level, text):
+        with self._lock:
+            self.messages.append((datetime.now(), level, str(text)))
+            self.version += 1
+
+    def info(self, text):
+        self._log("info", text)
+
+    def success(self, text):
+        self._log("success", text)
+
+    def warning(self, text):
+        self._log("warning", text)
+
+    def error(self, text):
+        self._log("error", text)
+
+    def empty(self):
+        return self
+
+    def latest(self):
+        with self._lock:
+            return list(self.messages)
+
+
+class LiveFeed:
+    """Polls ``fetchers`` in the background and merges new posts into running totals.
+
+    ``fetchers`` maps a source name to a zero-argument callable returning a
+    ``PostStore`` with an ``id`` column. Passing the same ``seen`` index to
+    the fetchers lets them skip repeats before scoring. ``interval`` is the polling period
+    in seconds; ``None`` polls once and then only on ``refresh()``. The
+    thread stops by itself when nobody has taken a snapshot for
+    ``idle_timeout`` seconds.
+    """
+
+    def __init__(self, fetchers, interval=None, timeouts=None, key=None, idle_timeout=None,
+                 recent=RECENT_POSTS, log=None, seen=None):
+        self.fetchers = dict(fetchers)
+        self.interval = interval
+        self.timeouts = timeouts or {}
+        self.key = key
+        self.idle_timeout = idle_timeout
+        self.log = log or MessageLog()
+        self._recent_size = recent
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self.seen = seen if seen is not None else SeenIndex()
+        self._totals = DashboardTotals()
+        self._recent = PostStore()
+        self._last_read = time.monotonic()
+        self.feed_id = next(_feed_ids)
+        self.version = 0
+        self.polls = 0
+        self.last_update = None
+        self.last_new = 0
+        self.status = {}
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="civic-live-feed", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive() and not self._stop.is_set()
+
+    def refresh(self):
+        """Poll as soon as possible instead of waiting for the next interval"""
+        self._wake.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.poll()
+            timeout = self.interval if self.interval is not None else self.idle_timeout
+            self._wake.wait(timeout)
+            self._wake.clear()
+            if self.idle_timeout is not None and time.monotonic() - self._last_read > self.idle_timeout:
+                self._stop.set()
+
+    def poll(self):
+        """Fetch every source once and merge the posts not seen before; returns how many were new"""
+        results, status = fetch_all(self.fetchers, self.timeouts)
+        fresh = []
+        for name in self.fetchers:
+            batch = results.get(name)
+            if batch is None or not len(batch):
+                continue
+            # Keep the first occurrence of each post, within the batch and across polls
+            if "fingerprint" in batch.columns:
+                keys = batch.column("fingerprint")
+            else:
+                keys = [fingerprint(post_id, "") for post_id in batch.column("id")]
+            keep = self.seen.claim(keys)
+            if keep.any():
+                batch = batch.filter(keep)
+                # Near-duplicates a kept post stands for are taken in with it
+                self.seen.add(duplicate_keys(batch))
+                fresh.append(batch)
+
+        new_posts = PostStore.concat(fresh)
+        with self._lock:
+            if len(new_posts):
+                self._totals.update(new_posts)
+                recent = PostStore.concat([self._recent, new_posts]).table
+                self._recent = PostStore(recent.slice(max(0, recent.num_rows - self._recent_size)))
+                self.version += 1
+            self.polls += 1
+            self.last_new = len(new_posts)
+            self.last_update = datetime.now()
+            self.status = status
+        return len(new_posts)
+
+    def versions(self):
+        """Change counters without copying anything: ``posts`` moves when new posts
+        are merged, ``polls`` after every poll and ``messages`` when a source logs"""
+        with self._lock:
+            self._last_read = time.monotonic()
+            return {"feed": self.feed_id, "posts": self.version, "polls": self.polls,
+                    "messages": self.log.version}
+
+    def snapshot(self):
+        """Consistent copy of the totals and recent posts as of the last poll"""
+        with self._lock:
+            self._last_read = time.monotonic()
+            return {
+                "version": self.version,
+                "polls": self.polls,
+                "totals": copy.deepcopy(self._totals),
+                "recent": self._recent,
+                "last_update": self.last_update,
+                "last_new": self.last_new,
+                "status": dict(self.status),
+                "messages": self.log.latest(),
+            }
@@ -0,0 +1,307 @@
+"""Local embedded store written by the headless collector.
+
+``civic.collector`` writes every new scored post to a SQLite file together
+with hourly pre-aggregates per (feed, source, topic), so a dashboard reads
+counts and sums instead of re-fetching and re-scoring. A feed is one
+(city, topic set) the collector polls. Posts are keyed by feed and ``id``;
+a post already stored for a feed is neither stored nor counted again.
+A post standing for a cluster of near-duplicates (``cluster_size``) counts
+that many times in the rollups; ``distinct_count`` counts it once.
+"""
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from civic.aggregate import NEGATIVE_THRESHOLD, DashboardTotals
+from civic.cache import DEFAULT_CACHE_DIR
+from civic.store import PostStore
+
+# Posts returned for the raw-data view
+RECENT_POSTS = 500
+
+# SQLite caps bound parameters per statement; stay well below it
+_SQL_CHUNK = 500
+
+# Rollup rows are keyed by the UTC hour the post was created in
+_HOUR_FORMAT = "%Y-%m-%dT%H:00:00Z"
+
+# Post fields kept in the store, in table order
+POST_FIELDS = [
+    "id", "source", "topic", "city", "text", "timestamp", "sentiment_score", "primary_emotion",
+    "risk_level", "urgency_level", "engagement", "verified", "url", "cluster_size",
+]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS feeds (
+    feed TEXT PRIMARY KEY, city TEXT NOT NULL, topics TEXT NOT NULL, sources TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS posts (
+    id TEXT NOT NULL, feed TEXT NOT NULL, source TEXT, topic TEXT, city TEXT, text TEXT,
+    timestamp TEXT, sentiment_score REAL, primary_emotion TEXT, risk_level TEXT,
+    urgency_level INTEGER, engagement INTEGER, verified INTEGER, url TEXT, collected_at TEXT NOT NULL,
+    cluster_size INTEGER NOT NULL DEFAULT 1,
+    PRIMARY KEY (feed, id)
+);
+CREATE INDEX IF NOT EXISTS posts_feed_time ON posts (feed, timestamp);
+CREATE TABLE IF NOT EXISTS rollups (
+    feed TEXT NOT NULL, hour TEXT NOT NULL, source TEXT NOT NULL, topic TEXT NOT NULL,
+    post_count INTEGER NOT NULL, sentiment_sum REAL NOT NULL, negative_count INTEGER NOT NULL,
+    high_risk_count INTEGER NOT NULL, urgency_count INTEGER NOT NULL, distinct_count INTEGER,
+    PRIMARY KEY (feed, hour, source, topic)
+);
+CREATE TABLE IF NOT EXISTS runs (
+    feed TEXT NOT NULL, started_at TEXT NOT NULL, finished_at TEXT NOT NULL,
+    new_posts INTEGER NOT NULL, status TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS runs_feed ON runs (feed, finished_at);
+"""
+
+# Columns added after the first release, for stores created before them;
+# rollup rows without ``distinct_count`` count each post once
+_ADDED_COLUMNS = {
+    "posts": {"cluster_size": "INTEGER NOT NULL DEFAULT 1"},
+    "rollups": {"distinct_count": "INTEGER"},
+}
+
+
+def default_store_path():
+    """Collector database under ``$CIVIC_CACHE_DIR`` (or ~/.cache)"""
+    return os.path.join(os.environ.get("CIVIC_CACHE_DIR", DEFAULT_CACHE_DIR), "collector.sqlite3")
+
+
+def feed_name(city, topics):
+    """Stable name of the feed for ``city`` and a topic set"""
+    return f"{city}|{','.join(sorted(topics))}"
+
+
+def _utc_text(moment):
+    return moment.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+
+
+def _in_clause(column, values):
+    return f" AND {column} IN ({','.join('?' * len(values))})", list(values)
+
+
+class LocalStore:
+    """SQLite store of scored posts, hourly rollups and collector runs.
+
+    The collector and any number of dashboard processes may open the same
+    file; WAL mode lets readers proceed while a run is being written.
+    """
+
+    def __init__(self, path):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(_SCHEMA)
+        for table, added in _ADDED_COLUMNS.items():
+            existing = {row[1] for row in self._db.execute(f"PRAGMA table_info({table})")}
+            for column, definition in added.items():
+                if column not in existing:
+                    self._db.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+        self._db.commit()
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def register_feed(self, city, topics, sources):
+        """Record what a feed collects; returns its name"""
+        feed = feed_name(city, topics)
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO feeds (feed, city, topics, sources) VALUES (?, ?, ?, ?)",
+                (feed, city, json.dumps(sorted(topics)), json.dumps(list(sources))),
+            )
+        return feed
+
+    def feeds(self, city=None):
+        """Registered feeds as dicts with ``feed``, ``city``, ``topics`` and ``sources``"""
+        query, params = "SELECT feed, city, topics, sources FROM feeds", []
+        if city is not None:
+            query, params = query + " WHERE city = ?", [city]
+        with self._lock:
+            rows = self._db.execute(query + " ORDER BY feed", params).fetchall()
+        return [
+            {"feed": feed, "city": city, "topics": json.loads(topics), "sources": json.loads(sources)}
+            for feed, city, topics, sources in rows
+        ]
+
+    def find_feed(self, city, topics):
+        """Smallest feed for ``city`` whose topics cover ``topics`` (``None`` if there is none)"""
+        covering = [feed for feed in self.feeds(city) if set(topics) <= set(feed["topics"])]
+        return min(covering, key=lambda feed: len(feed["topics"]), default=None)
+
+    def _known_ids(self, feed, ids):
+        known = set()
+        for start in range(0, len(ids), _SQL_CHUNK):
+            chunk = ids[start:start + _SQL_CHUNK]
+            rows = self._db.execute(
+                f"SELECT id FROM posts WHERE feed = ? AND id IN ({','.join('?' * len(chunk))})", [feed] + chunk
+            )
+            known.update(post_id for (post_id,) in rows)
+        return known
+
+    def write(self, feed, posts, collected_at=None):
+        """Store the posts of a ``PostStore`` not seen before and fold them into the rollups.
+
+        Returns the new posts as a ``PostStore``.
+        """
+        if not len(posts):
+            return PostStore()
+        collected_at = _utc_text(collected_at or datetime.now(timezone.utc))
+        df = posts.to_pandas()
+        for field in POST_FIELDS:
+            if field not in df:
+                df[field] = None
+        df = df[POST_FIELDS].astype(object).where(df[POST_FIELDS].notna(), None)
+        df = df.drop_duplicates("id")
+
+        with self._lock, self._db:
+            df = df[~df["id"].isin(self._known_ids(feed, df["id"].tolist()))]
+            if df.empty:
+                return PostStore()
+
+            stamps = pd.to_datetime(df["timestamp"], utc=True)
+            df["timestamp"] = stamps.dt.strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+            scores = df["sentiment_score"].astype(float).fillna(0.0)
+            weights = df["cluster_size"].astype(float).fillna(1.0).astype(int)
+            rows = [
+                (post["id"], feed, post["source"], post["topic"], post["city"], post["text"], post["timestamp"],
+                 float(score), post["primary_emotion"], post["risk_level"],
+                 None if post["urgency_level"] is None else int(bool(post["urgency_level"])),
+                 None if post["engagement"] is None else int(post["engagement"]),
+                 None if post["verified"] is None else int(bool(post["verified"])),
+                 post["url"], collected_at, int(weight))
+                for post, score, weight in zip(df.to_dict("records"), scores, weights)
+            ]
+            columns = ["id", "feed"] + POST_FIELDS[1:-1] + ["collected_at", "cluster_size"]
+            self._db.executemany(
+                f"INSERT INTO posts ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})", rows
+            )
+
+            # Posts without a topic are grouped as "General", as in ``DashboardTotals``
+            groups = pd.DataFrame({
+                "hour": stamps.dt.strftime(_HOUR_FORMAT),
+                "source": df["source"].fillna("Unknown"),
+                "topic": df["topic"].fillna("General"),
+                "post_count": weights,
+                "sentiment_sum": scores * weights,
+                "negative_count": (scores < NEGATIVE_THRESHOLD).astype(int) * weights,
+                "high_risk_count": (df["risk_level"] == "High").astype(int) * weights,
+                "urgency_count": df["urgency_level"].fillna(False).astype(bool).astype(int) * weights,
+                "distinct_count": 1,
+            }).groupby(["hour", "source", "topic"], as_index=False).sum()
+            self._db.executemany(
+                """INSERT INTO rollups (feed, hour, source, topic, post_count, sentiment_sum, negative_count,
+                                        high_risk_count, urgency_count, distinct_count)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                   ON CONFLICT (feed, hour, source, topic) DO UPDATE SET
+                       post_count = post_count + excluded.post_count,
+                       distinct_count = COALESCE(distinct_count, post_count) + excluded.distinct_count,
+                       sentiment_sum = sentiment_sum + excluded.sentiment_sum,
+                       negative_count = negative_count + excluded.negative_count,
+                       high_risk_count = high_risk_count + excluded.high_risk_count,
+                       urgency_count = urgency_count + excluded.urgency_count""",
+                [(feed, *(value.item() if isinstance(value, np.generic) else value for value in row))
+                 for row in groups.itertuples(index=False)],
+            )
+        # The first row of each new id, in the batch's own encoding
+        new_ids = set(df["id"])
+        keep = np.zeros(len(posts), dtype=bool)
+        for position, post_id in enumerate(posts.column("id")):
+            if post_id in new_ids:
+                new_ids.discard(post_id)
+                keep[position] = True
+        return posts.filter(keep)
+
+    def record_run(self, feed, started_at, finished_at, new_posts, status):
+        """Log one collector pass over a feed (``status`` maps source to fetch status)"""
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT INTO runs VALUES (?, ?, ?, ?, ?)",
+                (feed, _utc_text(started_at), _utc_text(finished_at), int(new_posts), json.dumps(status)),
+            )
+
+    def latest_run(self, feed):
+        """The feed's most recent run as a dict, or ``None``"""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT started_at, finished_at, new_posts, status, (SELECT COUNT(*) FROM runs WHERE feed = ?) "
+                "FROM runs WHERE feed = ? ORDER BY finished_at DESC LIMIT 1",
+                (feed, feed),
+            ).fetchone()
+        if row is None:
+            return None
+        started_at, finished_at, new_posts, status, runs = row
+        return {
+            "started_at": pd.Timestamp(started_at).to_pydatetime(),
+            "finished_at": pd.Timestamp(finished_at).to_pydatetime(),
+            "new_posts": new_posts,
+            "status": json.loads(status),
+            "runs": runs,
+        }
+
+    def totals(self, feed, since=None, sources=None, topics=None):
+        """``DashboardTotals`` for a feed from its rollups, optionally limited to
+        hours from ``since`` on and to some sources and topics"""
+        query = ("SELECT source, topic, SUM(post_count) AS post_count, SUM(sentiment_sum) AS sentiment_sum, "
+                 "SUM(negative_count) AS negative_count, SUM(high_risk_count) AS high_risk_count, "
+                 "SUM(urgency_count) AS urgency_count, SUM(COALESCE(distinct_count, post_count)) AS distinct_count "
+                 "FROM rollups WHERE feed = ?")
+        params = [feed]
+        if since is not None:
+            query += " AND hour >= ?"
+            params.append(since.astimezone(timezone.utc).strftime(_HOUR_FORMAT))
+        for column, values in (("source", sources), ("topic", topics)):
+            if values is not None:
+                clause, values = _in_clause(column, values)
+                query += clause
+                params += values
+        with self._lock:
+            groups = pd.read_sql_query(query + " GROUP BY source, topic", self._db, params=params)
+        return DashboardTotals.from_groups(groups)
+
+    def recent_posts(self, feed, limit=RECENT_POSTS, sources=None, topics=None):
+        """The feed's latest ``limit`` posts, oldest first, as a ``PostStore``"""
+        query, params = f"SELECT {', '.join(POST_FIELDS)} FROM posts WHERE feed = ?", [feed]
+        for column, values in (("source", sources), ("topic", topics)):
+            if values is not None:
+                clause, values = _in_clause(column, values)
+                query += clause
+                params += values
+        with self._lock:
+            df = pd.read_sql_query(query + " ORDER BY timestamp DESC LIMIT ?", self._db, params=params + [limit])
+        if df.empty:
+            return PostStore()
+        df = df.iloc[::-1]
+        columns = {field: df[field].tolist() for field in POST_FIELDS}
+        columns["timestamp"] = pd.to_datetime(df["timestamp"], utc=True)
+        for field in ("urgency_level", "verified"):
+            columns[field] = [None if value is None or value != value else bool(value) for value in columns[field]]
+        return PostStore.from_columns(columns)
+
+    def snapshot(self, feed, sources=None, topics=None, recent=RECENT_POSTS):
+        """Feed state in the shape of ``LiveFeed.snapshot()``, read from the store"""
+        run = self.latest_run(feed)
+        status = run["status"] if run else {}
+        return {
+            "version": run["runs"] if run else 0,
+            "polls": run["runs"] if run else 0,
+            "totals": self.totals(feed, sources=sources, topics=topics),
+            "recent": self.recent_posts(feed, recent, sources=sources, topics=topics),
+            "last_update": run["finished_at"].astimezone() if run else None,
+            "last_new": run["new_posts"] if run else 0,
+            "status": status,
+            "messages": [
+                (run["finished_at"], "warning", f"{source}: {state}")
+                for source, state in status.items() if state != "ok"
+            ],
+        }
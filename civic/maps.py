@@ -0,0 +1,172 @@
+"""Folium map layers that scale with point count, and cached map HTML.
+
+``point_layer`` draws up to ``CLUSTER_MAX_POINTS`` points as a client-side
+marker cluster; larger sets are pre-binned into grid cells on the server so
+the page carries one marker per occupied cell, not one per post.
+
+``show_map`` keys the serialized map HTML by ``civic.cache.data_fingerprint`` of the data it
+was built from: a rerun with the same data skips both building the
+``folium.Map`` and rendering it to HTML.
+"""
+import threading
+
+import folium
+import numpy as np
+import pandas as pd
+import streamlit.components.v1 as components
+from cachetools import LRUCache
+from folium.plugins import FastMarkerCluster, HeatMap
+
+# Above this many points, markers are pre-binned on the server
+CLUSTER_MAX_POINTS = 5_000
+# Grid cells per side when pre-binning
+DEFAULT_BINS = 64
+
+_html_cache = LRUCache(maxsize=32)
+_html_lock = threading.Lock()
+
+
+def sentiment_color(values):
+    """Marker colors for mean sentiment, matching the region markers"""
+    values = np.asarray(values, dtype=float)
+    return np.select([values > 0.1, values > -0.1], ["green", "orange"], "red")
+
+
+def bin_points(latitudes, longitudes, values=None, bins=DEFAULT_BINS):
+    """Aggregate points onto a ``bins`` x ``bins`` grid over their extent.
+
+    Returns a DataFrame with one row per occupied cell: ``latitude``,
+    ``longitude`` (mean position of the cell's points), ``count`` and
+    ``mean_value``.
+    """
+    lat = np.asarray(latitudes, dtype=float)
+    lng = np.asarray(longitudes, dtype=float)
+    values = np.zeros(len(lat)) if values is None else np.asarray(values, dtype=float)
+    keep = np.isfinite(lat) & np.isfinite(lng) & np.isfinite(values)
+    lat, lng, values = lat[keep], lng[keep], values[keep]
+    if not len(lat):
+        return pd.DataFrame(columns=["latitude", "longitude", "count", "mean_value"])
+
+    def cell_index(coords):
+        low, high = coords.min(), coords.max()
+        span = high - low or 1.0
+        return np.minimum(((coords - low) / span * bins).astype(np.int64), bins - 1)
+
+    cells = cell_index(lat) * bins + cell_index(lng)
+    _, codes = np.unique(cells, return_inverse=True)
+    count = np.bincount(codes)
+    return pd.DataFrame({
+        "latitude": np.bincount(codes, weights=lat) / count,
+        "longitude": np.bincount(codes, weights=lng) / count,
+        "count": count,
+        "mean_value": np.bincount(codes, weights=values) / count,
+    })
+
+
+def point_layer(latitudes, longitudes, values=None, name="Posts", max_markers=CLUSTER_MAX_POINTS,
+                bins=DEFAULT_BINS, show=True):
+    """Feature group drawing many points as clusters or pre-binned cells"""
+    layer = folium.FeatureGroup(name=name, show=show)
+    lat = np.asarray(latitudes, dtype=float)
+    lng = np.asarray(longitudes, dtype=float)
+
+    if len(lat) <= max_markers:
+        keep = np.isfinite(lat) & np.isfinite(lng)
+        FastMarkerCluster(np.column_stack([lat[keep], lng[keep]]).tolist()).add_to(layer)
+        return layer
+
+    # One GeoJSON layer for all cells; far cheaper to build and ship than a marker per cell
+    cells = bin_points(lat, lng, values, bins)
+    colors = sentiment_color(cells["mean_value"])
+    radii = 4 + 3 * np.log10(cells["count"].to_numpy(dtype=float))
+    features = [
+        {
+            "type": "Feature",
+            "geometry": {"type": "Point", "coordinates": [float(cell.longitude), float(cell.latitude)]},
+            "properties": {
+                "posts": int(cell.count),
+                "sentiment": round(float(cell.mean_value), 2),
+                "color": str(color),
+                "radius": round(float(radius), 1),
+            },
+        }
+        for cell, color, radius in zip(cells.itertuples(index=False), colors, radii)
+    ]
+    folium.GeoJson(
+        {"type": "FeatureCollection", "features": features},
+        marker=folium.CircleMarker(fill=True, fill_opacity=0.5, weight=1),
+        style_function=lambda feature: {
+            "color": feature["properties"]["color"],
+            "fillColor": feature["properties"]["color"],
+            "radius": feature["properties"]["radius"],
+        },
+        tooltip=folium.GeoJsonTooltip(["posts", "sentiment"], aliases=["Posts", "Avg sentiment"]),
+    ).add_to(layer)
+    return layer
+
+
+def density_layer(heat_points, name="Negative sentiment density", show=True):
+    """Heatmap of pre-smoothed ``[lat, lng, weight]`` cells from ``DensityGrid.heat_points``"""
+    layer = folium.FeatureGroup(name=name, show=show)
+    if heat_points:
+        HeatMap(heat_points, min_opacity=0.3, radius=25, blur=20, max_zoom=13).add_to(layer)
+    return layer
+
+
+def grid_layer(cells, name="Grid statistics", show=False):
+    """Rectangles for ``GridPyramid.cells`` rows, colored by mean sentiment"""
+    features = [
+        {
+            "type": "Feature",
+            "geometry": {"type": "Polygon", "coordinates": [[
+                [cell.lng_min, cell.lat_min], [cell.lng_max, cell.lat_min],
+                [cell.lng_max, cell.lat_max], [cell.lng_min, cell.lat_max],
+                [cell.lng_min, cell.lat_min],
+            ]]},
+            "properties": {
+                "posts": int(cell.post_count),
+                "sentiment": round(float(cell.mean_sentiment), 2),
+                "negative": round(float(cell.negative_pct), 1),
+                "high_risk": int(cell.high_risk_count),
+                "color": str(color),
+            },
+        }
+        for cell, color in zip(cells.itertuples(index=False), sentiment_color(cells["mean_sentiment"]))
+    ]
+    layer = folium.FeatureGroup(name=name, show=show)
+    if features:
+        folium.GeoJson(
+            {"type": "FeatureCollection", "features": features},
+            style_function=lambda feature: {
+                "color": feature["properties"]["color"],
+                "fillColor": feature["properties"]["color"],
+                "weight": 0.5,
+                "fillOpacity": 0.35,
+            },
+            tooltip=folium.GeoJsonTooltip(
+                ["posts", "sentiment", "negative", "high_risk"],
+                aliases=["Posts", "Avg sentiment", "% negative", "High-risk posts"]
+            ),
+        ).add_to(layer)
+    return layer
+
+
+def render_map_html(key, build_map):
+    """HTML for the map ``build_map()`` returns, cached under ``key``"""
+    with _html_lock:
+        html = _html_cache.get(key)
+    if html is None:
+        html = folium.Figure().add_child(build_map()).render()
+        with _html_lock:
+            _html_cache[key] = html
+    return html
+
+
+def show_map(key, build_map, width=1000, height=500):
+    """Embed a cached map in the page, like ``streamlit_folium.folium_static``"""
+    components.html(render_map_html(key, build_map), width=width, height=height + 10)
+
+
+def clear_map_cache():
+    with _html_lock:
+        _html_cache.clear()
@@ -0,0 +1,53 @@
+"""Per-stage wall-time accounting for dashboard reruns.
+
+The dashboards wrap their pipeline steps in ``with stage("name"):``. Time
+accumulates per stage name until ``stage_timer.reset()``, so a harness can
+reset before a rerun and read ``stage_timer.snapshot()`` after it. Stages
+may run in worker threads (concurrent fetches) and may be re-entered;
+repeated entries add up.
+"""
+import threading
+import time
+from contextlib import contextmanager
+
+
+class StageTimer:
+    """Accumulates seconds spent per named stage"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._seconds = {}
+        self._calls = {}
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self._seconds[name] = self._seconds.get(name, 0.0) + elapsed
+                self._calls[name] = self._calls.get(name, 0) + 1
+
+    def reset(self):
+        with self._lock:
+            self._seconds.clear()
+            self._calls.clear()
+
+    def snapshot(self):
+        """``{stage: {"seconds": total, "calls": n}}`` in first-entered order"""
+        with self._lock:
+            return {
+                name: {"seconds": seconds, "calls": self._calls[name]}
+                for name, seconds in self._seconds.items()
+            }
+
+
+# Process-wide timer shared by the dashboards and the rerun harness
+stage_timer = StageTimer()
+
+
+def stage(name):
+    """Time a block under ``name`` on the shared timer"""
+    return stage_timer.stage(name)
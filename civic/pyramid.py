@@ -0,0 +1,196 @@
+"""Multi-resolution square-cell aggregates of posts for map views.
+
+A ``GridPyramid`` covers a city's bounding box with ``2**level`` x
+``2**level`` cells at every level up to ``max_level``. Posts are binned
+once, at the finest level; each coarser level is the 2x2 roll-up of the
+level below, built lazily and kept until more posts arrive. A map view
+reads the level that matches its zoom and only the cells inside its
+bounds, so interactions never touch raw posts.
+
+Posts added with timestamps are also kept as per-(hour, cell) sums, so
+``window(hours)`` answers "last 24 hours" or "last 7 days" from the same
+pyramid without re-binning posts.
+"""
+import math
+import threading
+
+import numpy as np
+import pandas as pd
+from cachetools import LRUCache
+
+from civic.aggregate import NEGATIVE_THRESHOLD
+from civic.density import DensityGrid, negative_weights
+from civic.timebuckets import hour_numbers
+
+DEFAULT_MAX_LEVEL = 8
+# ``negative_weight`` sums ``density.negative_weights`` for density surfaces
+FIELDS = ("count", "sentiment_sum", "negative_count", "high_risk_count", "negative_weight")
+# Window pyramids kept per pyramid (one per time range in use)
+WINDOW_CACHE_SIZE = 4
+
+# Cells per 256px map tile when picking a level for a zoom
+CELLS_PER_TILE = 8
+
+
+class GridPyramid:
+    """Counts, sentiment sums and risk counts at several grid resolutions"""
+
+    def __init__(self, bounds, max_level=DEFAULT_MAX_LEVEL):
+        self.lat_min, self.lat_max, self.lng_min, self.lng_max = map(float, bounds)
+        self.max_level = int(max_level)
+        size = 2 ** self.max_level
+        self._levels = {self.max_level: {field: np.zeros((size, size)) for field in FIELDS}}
+        self.latest_hour = None
+        # Sorted (hour * cells + cell) keys and their field sums, for windows
+        self._timed_keys = np.zeros(0, dtype=np.int64)
+        self._timed = {field: np.zeros(0) for field in FIELDS}
+        self._windows = LRUCache(maxsize=WINDOW_CACHE_SIZE)
+        self._lock = threading.RLock()
+
+    @classmethod
+    def around(cls, center, radius_deg=0.3, max_level=DEFAULT_MAX_LEVEL):
+        """Square pyramid of ``radius_deg`` around a ``(lat, lng)`` center"""
+        lat, lng = center
+        return cls((lat - radius_deg, lat + radius_deg, lng - radius_deg, lng + radius_deg), max_level)
+
+    def add(self, latitudes, longitudes, sentiment_scores, risk_levels=None, timestamps=None):
+        """Bin a batch of posts into the finest level; points outside the bounds are ignored.
+
+        With ``timestamps`` the posts also count toward ``window`` queries.
+        """
+        lat = np.asarray(latitudes, dtype=float)
+        lng = np.asarray(longitudes, dtype=float)
+        scores = np.asarray(sentiment_scores, dtype=float)
+        high_risk = (np.zeros(len(lat), dtype=bool) if risk_levels is None
+                     else np.asarray(risk_levels, dtype=object) == "High")
+        size = 2 ** self.max_level
+
+        row = np.floor((lat - self.lat_min) / (self.lat_max - self.lat_min) * size)
+        col = np.floor((lng - self.lng_min) / (self.lng_max - self.lng_min) * size)
+        inside = (row >= 0) & (row < size) & (col >= 0) & (col < size) & np.isfinite(scores)
+        cells = row[inside].astype(np.int64) * size + col[inside].astype(np.int64)
+        scores = scores[inside]
+
+        weights = {
+            "count": np.ones(len(cells)),
+            "sentiment_sum": scores,
+            "negative_count": (scores < NEGATIVE_THRESHOLD).astype(float),
+            "high_risk_count": high_risk[inside].astype(float),
+            "negative_weight": negative_weights(scores),
+        }
+        with self._lock:
+            finest = self._levels[self.max_level]
+            for field in FIELDS:
+                finest[field] += np.bincount(cells, weights=weights[field], minlength=size * size).reshape(size, size)
+            # Coarser levels and windows are stale now
+            self._levels = {self.max_level: finest}
+            self._windows.clear()
+            if timestamps is not None:
+                self._add_timed(hour_numbers(timestamps)[inside], cells, weights)
+        return self
+
+    def _add_timed(self, hours, cells, weights):
+        """Merge a batch into the per-(hour, cell) sums"""
+        if not len(hours):
+            return
+        keys = np.concatenate([self._timed_keys, hours * 4 ** self.max_level + cells])
+        self._timed_keys, inverse = np.unique(keys, return_inverse=True)
+        self._timed = {
+            field: np.bincount(inverse, weights=np.concatenate([self._timed[field], weights[field]]),
+                               minlength=len(self._timed_keys))
+            for field in FIELDS
+        }
+        newest = int(hours.max())
+        self.latest_hour = newest if self.latest_hour is None else max(self.latest_hour, newest)
+
+    def window(self, hours, now=None):
+        """Pyramid of the timestamped posts in the ``hours`` hours ending at ``now``
+        (default: the newest post's hour), cached until more posts arrive"""
+        with self._lock:
+            if self.latest_hour is None:
+                return GridPyramid(self.bounds, self.max_level)
+            end = self.latest_hour if now is None else int(hour_numbers([now])[0])
+            start = end - int(hours) + 1
+            window = self._windows.get((start, end))
+            if window is None:
+                cells_per_hour = 4 ** self.max_level
+                first, last = np.searchsorted(self._timed_keys, [start * cells_per_hour, (end + 1) * cells_per_hour])
+                cells = self._timed_keys[first:last] % cells_per_hour
+                size = 2 ** self.max_level
+                window = GridPyramid(self.bounds, self.max_level)
+                window._levels[self.max_level] = {
+                    field: np.bincount(cells, weights=self._timed[field][first:last],
+                                       minlength=cells_per_hour).reshape(size, size)
+                    for field in FIELDS
+                }
+                self._windows[(start, end)] = window
+            return window
+
+    @property
+    def bounds(self):
+        return self.lat_min, self.lat_max, self.lng_min, self.lng_max
+
+    def density_grid(self, level=None):
+        """``DensityGrid`` of post counts and negative weights at ``level`` (default: finest)"""
+        level = self.max_level if level is None else level
+        grid = self.level(level)
+        density = DensityGrid(self.bounds, (2 ** level, 2 ** level))
+        density.counts = grid["count"].astype(np.int64)
+        density.weights = grid["negative_weight"].copy()
+        return density
+
+    def level(self, level):
+        """``{field: 2D array}`` at ``level``, rolled up from the level below"""
+        if not 0 <= level <= self.max_level:
+            raise ValueError(f"level must be between 0 and {self.max_level}")
+        with self._lock:
+            if level not in self._levels:
+                finer = self.level(level + 1)
+                half = 2 ** level
+                self._levels[level] = {
+                    field: values.reshape(half, 2, half, 2).sum(axis=(1, 3)) for field, values in finer.items()
+                }
+            return self._levels[level]
+
+    def level_for_zoom(self, zoom):
+        """Finest level whose cells are no smaller than 1/``CELLS_PER_TILE`` of a web-map tile"""
+        cell_deg = 360.0 / 2 ** zoom / CELLS_PER_TILE
+        span = max(self.lat_max - self.lat_min, self.lng_max - self.lng_min)
+        return int(min(self.max_level, max(0, math.floor(math.log2(span / cell_deg)))))
+
+    def cells(self, level, bounds=None):
+        """Non-empty cells at ``level`` inside ``bounds`` (lat_min, lat_max, lng_min, lng_max).
+
+        Only the rows and columns overlapping the view are read. Returns one
+        row per cell with its edges, ``post_count``, ``mean_sentiment``,
+        ``negative_pct`` and ``high_risk_count``.
+        """
+        grid = self.level(level)
+        size = 2 ** level
+        lat_step = (self.lat_max - self.lat_min) / size
+        lng_step = (self.lng_max - self.lng_min) / size
+
+        row_lo, row_hi, col_lo, col_hi = 0, size, 0, size
+        if bounds is not None:
+            view_lat_min, view_lat_max, view_lng_min, view_lng_max = bounds
+            row_lo = max(0, int(np.floor((view_lat_min - self.lat_min) / lat_step)))
+            row_hi = min(size, int(np.ceil((view_lat_max - self.lat_min) / lat_step)))
+            col_lo = max(0, int(np.floor((view_lng_min - self.lng_min) / lng_step)))
+            col_hi = min(size, int(np.ceil((view_lng_max - self.lng_min) / lng_step)))
+
+        view = {field: values[row_lo:row_hi, col_lo:col_hi] for field, values in grid.items()}
+        rows, cols = np.nonzero(view["count"])
+        count = view["count"][rows, cols]
+        rows, cols = rows + row_lo, cols + col_lo
+        return pd.DataFrame({
+            "row": rows,
+            "col": cols,
+            "lat_min": self.lat_min + rows * lat_step,
+            "lat_max": self.lat_min + (rows + 1) * lat_step,
+            "lng_min": self.lng_min + cols * lng_step,
+            "lng_max": self.lng_min + (cols + 1) * lng_step,
+            "post_count": count.astype(np.int64),
+            "mean_sentiment": view["sentiment_sum"][rows - row_lo, cols - col_lo] / count,
+            "negative_pct": view["negative_count"][rows - row_lo, cols - col_lo] / count * 100,
+            "high_risk_count": view["high_risk_count"][rows - row_lo, cols - col_lo].astype(np.int64),
+        })
@@ -0,0 +1,94 @@
+"""Batched VADER scoring with columnar emotion buckets."""
+import numpy as np
+import pandas as pd
+from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+
+from civic.cache import cached_scores
+from civic.keywords import SECONDARY_EMOTION_KEYWORDS, civic_matcher
+
+# One analyzer per process, so the VADER lexicon and emoji table are parsed once
+vader_analyzer = SentimentIntensityAnalyzer()
+
+# Compound-score edges shared by every scheme; bucket 0 is the most negative.
+# np.digitize puts a score equal to an edge in the upper bucket, matching the
+# `compound >= edge` chains the apps used before.
+EMOTION_BUCKET_EDGES = np.array([-0.5, -0.1, 0.1, 0.5])
+
+WEATHER_ANALOGIES = np.array(["Stormy", "Rainy", "Cloudy", "Partly Cloudy", "Sunny"], dtype=object)
+EMOTION_ICONS = np.array(["😠", "😟", "😐", "🙂", "😊"], dtype=object)
+RISK_LEVELS = np.array(["High", "Medium", "Low", "Low", "Low"], dtype=object)
+
+# Primary emotion labels per app, indexed by bucket
+EMOTION_SCHEMES = {
+    "weather": ["Angry", "Concerned", "Neutral", "Content", "Joy"],
+    "civic": [
+        "Public Frustration",
+        "Community Concerns",
+        "Neutral Discussion",
+        "General Contentment",
+        "Community Satisfaction",
+    ],
+}
+
+# Label used by the civic scheme when unrest keywords meet strongly negative text
+CIVIL_UNREST_LABEL = "Civil Unrest Risk"
+CIVIL_UNREST_THRESHOLD = -0.3
+
+
+def _keyword_flags(hits):
+    """Secondary emotions plus unrest/urgency flags from one matcher scan"""
+    secondary = [emotion for emotion in SECONDARY_EMOTION_KEYWORDS if emotion in hits["emotion"]]
+    return secondary[:2], "unrest" in hits["risk"], "urgency" in hits["risk"]
+
+
+def vader_compound(text):
+    """Raw VADER compound score for one text"""
+    return vader_analyzer.polarity_scores(text)['compound']
+
+
+def score_texts(texts, scheme="weather", cache=None):
+    """Score a batch of texts and return one array per output field.
+
+    Duplicate texts are scored once, and compound scores already in the
+    sentiment cache (see ``civic.cache``) are not recomputed. The returned
+    dict holds equal-length arrays: ``sentiment_score``, ``intensity``,
+    ``emotion_code``, ``primary_emotion``, ``emotion_icon``,
+    ``weather_analogy``, ``risk_level``, ``secondary_emotions``,
+    ``unrest_risk`` and ``urgency_level``.
+    """
+    labels = np.array(EMOTION_SCHEMES[scheme] + [CIVIL_UNREST_LABEL], dtype=object)
+
+    codes, unique_texts = pd.factorize(pd.Series(texts, dtype=object), use_na_sentinel=False)
+    unique_count = len(unique_texts)
+
+    unique_texts = ["" if text is None else str(text) for text in unique_texts]
+    unique_compound = np.array(cached_scores("vader", unique_texts, vader_compound, cache), dtype=float)
+    unique_secondary = np.empty(unique_count, dtype=object)
+    unique_unrest = np.zeros(unique_count, dtype=bool)
+    unique_urgent = np.zeros(unique_count, dtype=bool)
+    for i, hits in enumerate(civic_matcher.scan_batch(unique_texts)):
+        unique_secondary[i], unique_unrest[i], unique_urgent[i] = _keyword_flags(hits)
+
+    compound = unique_compound[codes]
+    unrest = unique_unrest[codes]
+    buckets = np.digitize(compound, EMOTION_BUCKET_EDGES)
+
+    emotion_code = buckets.copy()
+    risk_level = RISK_LEVELS[buckets]
+    if scheme == "civic":
+        unrest_rows = unrest & (compound < CIVIL_UNREST_THRESHOLD)
+        emotion_code[unrest_rows] = len(labels) - 1
+        risk_level[unrest_rows] = "High"
+
+    return {
+        "sentiment_score": compound,
+        "intensity": np.abs(compound),
+        "emotion_code": emotion_code.astype(np.int8),
+        "primary_emotion": labels[emotion_code],
+        "emotion_icon": EMOTION_ICONS[buckets],
+        "weather_analogy": WEATHER_ANALOGIES[buckets],
+        "risk_level": risk_level,
+        "secondary_emotions": unique_secondary[codes],
+        "unrest_risk": unrest,
+        "urgency_level": unique_urgent[codes],
+    }
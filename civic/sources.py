@@ -0,0 +1,364 @@
+"""Post sources shared by the Pro dashboard and the headless collector.
+
+Every fetcher returns a scored ``PostStore`` and falls back to mock posts
+when its API is not configured or fails. Nothing here touches Streamlit:
+progress goes to a ``notify`` target with ``info``/``success``/``warning``/
+``error`` methods and ``empty()`` placeholders, which is ``st.sidebar`` in
+the dashboard and a logger in the collector.
+
+Every post carries a stable ``fingerprint`` (``civic.dedup``). Given a
+``seen`` index, the Twitter and News fetchers drop items it already holds
+before scoring them; recording what was kept is left to the caller. They
+also collapse near-duplicate items with the same sentiment sign
+(``civic.neardup``) into one representative with a ``cluster_size`` weight
+and the ``duplicates`` fingerprints it stands for.
+"""
+import logging
+from datetime import datetime
+
+import numpy as np
+import pyarrow as pa
+
+from civic import http_client
+from civic.aggregate import RunningSummary
+from civic.dedup import fingerprints
+from civic.neardup import collapse
+from civic.scoring import score_texts
+from civic.store import PostStore
+from civic.synthetic import generate_posts
+from civic.topics import classify_topics
+from civic.twitter import TwitterAPIError, iter_recent_search_pages
+
+NEWS_API_URL = "https://newsapi.org/v2/everything"
+
+# Twitter search terms per policy topic
+TOPIC_QUERIES = {
+    "Education": "(school OR teacher OR education OR student)",
+    "Healthcare": "(hospital OR health OR medical OR doctor)",
+    "Transportation": "(transit OR traffic OR commute OR transportation)",
+    "Environment": "(environment OR climate OR pollution OR green)",
+    "Housing": "(housing OR rent OR apartment OR homeless)",
+    "Public Safety": "(safety OR police OR crime OR emergency)",
+}
+
+# Mock headlines per topic; {city} is filled in per post
+CIVIC_ISSUES = {
+    "Education": [
+        "School funding debate heats up in {city}",
+        "{city} teachers demand better resources",
+        "New education initiative announced for {city} schools",
+        "Parent concerns about {city} school safety",
+        "Student achievements celebrated across {city}",
+    ],
+    "Healthcare": [
+        "Hospital capacity concerns in {city}",
+        "New healthcare clinic opens in {city}",
+        "{city} residents struggle with medical costs",
+        "Mental health services expand in {city}",
+        "Healthcare workers protest in {city}",
+    ],
+    "Transportation": [
+        "Public transit improvements needed in {city}",
+        "{city} commuters face daily traffic challenges",
+        "New bike lanes welcomed in {city}",
+        "Infrastructure projects underway across {city}",
+        "Transportation access issues in {city} neighborhoods",
+    ],
+    "Environment": [
+        "Air quality concerns raised in {city}",
+        "{city} launches new sustainability initiative",
+        "Community gardens thriving across {city}",
+        "Environmental protection efforts in {city}",
+        "Green space preservation in {city}",
+    ],
+    "Housing": [
+        "Affordable housing crisis in {city}",
+        "New housing developments in {city}",
+        "Rent control discussions in {city} council",
+        "Housing accessibility issues in {city}",
+        "Community housing projects in {city}",
+    ],
+    "Public Safety": [
+        "Public safety initiatives in {city}",
+        "Community policing efforts in {city}",
+        "Emergency response improvements in {city}",
+        "Neighborhood watch programs in {city}",
+        "Public safety concerns addressed in {city}",
+    ],
+}
+
+
+class LogNotifier:
+    """``notify`` target that writes fetcher progress to a logger"""
+
+    def __init__(self, logger=None):
+        self.logger = logger or logging.getLogger("civic.sources")
+
+    def info(self, text):
+        self.logger.info(text)
+
+    def success(self, text):
+        self.logger.info(text)
+
+    def warning(self, text):
+        self.logger.warning(text)
+
+    def error(self, text):
+        self.logger.error(text)
+
+    def empty(self):
+        return self
+
+
+def twitter_query(city, topics):
+    """Recent-search query for posts about ``topics`` in ``city``"""
+    topic_filters = [TOPIC_QUERIES[topic] for topic in topics if topic in TOPIC_QUERIES]
+    if not topic_filters:
+        topic_filters = ["(community OR city OR local)"]
+    return f"({' OR '.join(topic_filters)}) ({city}) lang:en -is:retweet -is:reply"
+
+
+def fetch_twitter_data(city, topics, count=50, cache_ttl=None, notify=None, bearer_token="", seen=None):
+    """Real Twitter API v2 recent search, scored page by page; mock posts without a token"""
+    notify = notify or LogNotifier()
+    try:
+        if not bearer_token:
+            notify.warning("🐦 Twitter API not configured - using mock data")
+            return generate_mock_social_data(city, topics, count, "Twitter")
+
+        query = twitter_query(city, topics)
+        notify.info(f"🐦 Searching Twitter for: {', '.join(topics)} in {city}...")
+
+        # Score and summarize each page as it arrives; only one raw page is
+        # held at a time and the running totals update while later pages load.
+        # Copies often land on different pages, so near-duplicates are
+        # collapsed once over the whole batch; until then every tweet counts
+        # once, which is what its cluster's weight adds up to
+        progress = notify.empty()
+        summary = RunningSummary()
+        tweet_pages = []
+        fetched = 0
+        try:
+            client = http_client.shared_client()
+            for page in iter_recent_search_pages(client, query, bearer_token, budget=count, ttl=cache_ttl):
+                fetched += len(page.get("data", []))
+                page_tweets = process_twitter_data(page, city, topics, seen)
+                if not len(page_tweets):
+                    continue
+                tweet_pages.append(page_tweets)
+                summary.update(page_tweets.column("sentiment_score"), page_tweets.column("risk_level"))
+                progress.info(
+                    f"🐦 {summary.count} tweets so far · avg sentiment {summary.mean_sentiment:+.2f} · "
+                    f"{summary.negative_pct:.0f}% negative · {summary.high_risk_count} high-risk"
+                )
+        except TwitterAPIError as e:
+            if tweet_pages:
+                notify.warning(f"🐦 Twitter paging stopped early ({e}) - keeping {summary.count} tweets")
+            elif not fetched:
+                # Nothing arrived: say why before falling back, as the other sources do
+                progress.empty()
+                notify.error(f"🐦 Twitter API error ({e}) - using mock data")
+                return generate_mock_social_data(city, topics, count, "Twitter")
+            else:
+                progress.empty()
+
+        processed_tweets = collapse_posts(PostStore.concat(tweet_pages))
+        if len(processed_tweets):
+            notify.success(f"✅ Fetched {len(processed_tweets)} real tweets!")
+            return processed_tweets
+        if fetched:
+            notify.info(f"🐦 No new tweets among {fetched} fetched")
+            return processed_tweets
+
+        notify.warning("🔍 No tweets found for current filters - using mock data")
+        return generate_mock_social_data(city, topics, count, "Twitter")
+
+    except Exception as e:
+        notify.error(f"🐦 Twitter API error: {str(e)[:100]}...")
+        return generate_mock_social_data(city, topics, count, "Twitter")
+
+
+def collapse_posts(posts):
+    """One post per near-duplicate cluster of a scored ``PostStore``, with its
+    ``cluster_size`` and the ``duplicates`` fingerprints it stands for"""
+    if not len(posts):
+        return posts
+    leaders, cluster_sizes, duplicates = collapse(
+        posts.column("text"), posts.column("fingerprint"), posts.column("sentiment_score"))
+    table = posts.table.take(pa.array(leaders))
+    position = table.column_names.index("fingerprint") + 1
+    table = table.add_column(position, "cluster_size", pa.array(cluster_sizes))
+    table = table.add_column(position + 1, "duplicates", pa.array(duplicates, type=pa.list_(pa.string())))
+    return PostStore(table)
+
+
+def process_twitter_data(twitter_response, city, topics, seen=None):
+    """Process raw Twitter API response into our columnar format, skipping tweets in ``seen``.
+
+    Every tweet is kept; ``collapse_posts`` merges near-duplicates once the
+    whole batch has arrived.
+    """
+    users = {user["id"]: user for user in twitter_response.get("includes", {}).get("users", [])}
+
+    tweets = twitter_response["data"]
+    ids = [f"twitter_{tweet['id']}" for tweet in tweets]
+    keys = fingerprints(ids, [tweet["text"] for tweet in tweets])
+    if seen is not None:
+        fresh = seen.unseen(keys)
+        tweets = [tweet for tweet, new in zip(tweets, fresh) if new]
+        ids = [post_id for post_id, new in zip(ids, fresh) if new]
+        keys = [key for key, new in zip(keys, fresh) if new]
+        if not tweets:
+            return PostStore()
+
+    texts = [tweet["text"] for tweet in tweets]
+    scores = score_texts(texts, scheme="civic")
+    tweet_topics, topic_confidence = classify_topics(texts, topics)
+
+    authors = [users.get(tweet.get("author_id", ""), {}) for tweet in tweets]
+    metrics = [tweet["public_metrics"] for tweet in tweets]
+
+    return PostStore.from_columns({
+        "id": ids,
+        "fingerprint": keys,
+        # Truncate long tweets for display
+        "text": [text if len(text) <= 280 else text[:277] + "..." for text in texts],
+        "source": ["Twitter"] * len(tweets),
+        "topic": tweet_topics,
+        "topic_confidence": topic_confidence,
+        "city": [city] * len(tweets),
+        "timestamp": [datetime.fromisoformat(tweet["created_at"].replace("Z", "+00:00")) for tweet in tweets],
+        "sentiment_score": scores["sentiment_score"],
+        "primary_emotion": scores["primary_emotion"],
+        "engagement": [m["like_count"] + m["retweet_count"] for m in metrics],
+        "verified": [author.get("verified", False) for author in authors],
+        "risk_level": scores["risk_level"],
+        "urgency_level": scores["urgency_level"],
+        "user_followers": [author.get("public_metrics", {}).get("followers_count", 0) for author in authors],
+        "retweet_count": [m["retweet_count"] for m in metrics],
+        "like_count": [m["like_count"] for m in metrics],
+    })
+
+
+def fetch_news_data(city, topics, count=30, cache_ttl=None, notify=None, api_key="", seen=None):
+    """News API articles about ``topics`` in ``city``, scored; mock posts without a key"""
+    notify = notify or LogNotifier()
+    try:
+        if not api_key:
+            notify.warning("📰 News API not configured - using mock data")
+            return generate_mock_social_data(city, topics, count, "News")
+
+        query_terms = " OR ".join([f'"{topic}"' for topic in topics])
+        query = f"({query_terms}) AND ({city})"
+        params = {
+            "q": query,
+            "pageSize": min(count, 30),
+            "sortBy": "publishedAt",
+            "language": "en",
+            "apiKey": api_key,
+        }
+
+        notify.info(f"📰 Fetching news about {', '.join(topics)} in {city}...")
+
+        status_code, data = http_client.shared_client().get_json(NEWS_API_URL, params=params, ttl=cache_ttl)
+        data = data or {}
+
+        if data.get("status") == "ok" and data.get("articles"):
+            articles = data["articles"]
+            # Combine title and description for sentiment analysis
+            article_texts = [f"{article['title']} - {article.get('description', '')}" for article in articles]
+            # Articles are identified by URL (publisher and time if there is none)
+            keys = fingerprints(
+                [article.get("url") or f"{article.get('source', {}).get('name')}|{article.get('publishedAt')}"
+                 for article in articles],
+                article_texts,
+            )
+            if seen is not None:
+                fresh = seen.unseen(keys)
+                articles = [article for article, new in zip(articles, fresh) if new]
+                article_texts = [text for text, new in zip(article_texts, fresh) if new]
+                keys = [key for key, new in zip(keys, fresh) if new]
+                if not articles:
+                    notify.info(f"📰 No new articles among {len(fresh)} fetched")
+                    return PostStore()
+
+            # Syndicated blurbs with the same sentiment sign collapse into one
+            scores = score_texts(article_texts, scheme="civic")
+            leaders, cluster_sizes, duplicates = collapse(article_texts, keys, scores["sentiment_score"])
+            articles = [articles[i] for i in leaders]
+            article_texts = [article_texts[i] for i in leaders]
+            keys = [keys[i] for i in leaders]
+            scores = {field: values[leaders] for field, values in scores.items()}
+            article_topics, topic_confidence = classify_topics([article["title"] or "" for article in articles], topics)
+
+            processed_articles = PostStore.from_columns({
+                "id": [f"news_{key}" for key in keys],
+                "fingerprint": keys,
+                "cluster_size": cluster_sizes,
+                "duplicates": pa.array(duplicates, type=pa.list_(pa.string())),
+                "text": [f"{article['title']} - {article.get('description', 'No description')}" for article in articles],
+                "source": ["News"] * len(articles),
+                "topic": article_topics,
+                "topic_confidence": topic_confidence,
+                "city": [city] * len(articles),
+                "timestamp": [
+                    datetime.fromisoformat(article["publishedAt"].replace("Z", "+00:00"))
+                    if article.get("publishedAt") else datetime.now().astimezone()
+                    for article in articles
+                ],
+                "sentiment_score": scores["sentiment_score"],
+                "primary_emotion": scores["primary_emotion"],
+                "engagement": [0] * len(articles),  # News articles don't have engagement metrics
+                "verified": [True] * len(articles),
+                "risk_level": scores["risk_level"],
+                "urgency_level": scores["urgency_level"],
+                "url": [article.get("url", "") for article in articles],
+                "source_name": [article.get("source", {}).get("name", "Unknown") for article in articles],
+            })
+
+            notify.success(f"✅ Fetched {len(processed_articles)} real news articles")
+            return processed_articles
+
+        notify.warning(f"No news articles found for: {query}")
+        return generate_mock_social_data(city, topics, count, "News")
+
+    except Exception as e:
+        notify.error(f"News API Error: {e}")
+        return generate_mock_social_data(city, topics, count, "News")
+
+
+def generate_mock_social_data(city, topics, count, source):
+    """Generate realistic social media and news data"""
+    now = datetime.now()
+    columns = generate_posts(
+        count,
+        cities=[city],
+        topics=topics,
+        templates=CIVIC_ISSUES,
+        text_format="{text}",
+        window_hours=72,
+        engagement_median=100 if source == "Twitter" else 25,
+        max_engagement=1000 if source == "Twitter" else 100,
+        now=now,
+    )
+
+    scores = score_texts(columns["text"], scheme="civic")
+    verified = np.random.default_rng().random(count) < 0.5 if source == "Twitter" else np.ones(count, dtype=bool)
+
+    # Each generated batch stands for new posts, so ids are unique per call
+    ids = [f"{source.lower()}_{now:%Y%m%d%H%M%S%f}_{i}" for i in range(count)]
+    return PostStore.from_columns({
+        "id": ids,
+        "fingerprint": fingerprints(ids, columns["text"]),
+        "text": columns["text"],
+        "source": [source] * count,
+        "topic": columns["focus_area"],
+        "city": columns["city"],
+        "timestamp": columns["created_at"],
+        "sentiment_score": scores["sentiment_score"],
+        "primary_emotion": scores["primary_emotion"],
+        "engagement": columns["engagement"],
+        "verified": verified,
+        "risk_level": scores["risk_level"],
+        "urgency_level": scores["urgency_level"],
+    })
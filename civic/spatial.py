@@ -0,0 +1,115 @@
+"""Assign geotagged posts to neighborhoods with a KD-tree over region centroids.
+
+Region definitions live in ``civic/data/regions.json`` (per city: name,
+centroid, population, income level). ``region_index(city)`` builds a
+``scipy.spatial.cKDTree`` for a city once and keeps it until that city's
+definitions change; ``RegionIndex.assign`` maps whole coordinate arrays to
+regions with one vectorized nearest-neighbour query.
+"""
+import hashlib
+import json
+import os
+import threading
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_REGIONS_PATH = os.path.join(PACKAGE_DIR, "data", "regions.json")
+
+# Kilometres per degree of latitude
+KM_PER_DEGREE = 111.32
+
+_definitions = {}
+_indexes = {}
+_lock = threading.Lock()
+
+
+def load_region_definitions(path=DEFAULT_REGIONS_PATH):
+    """``{city: [region, ...]}`` from the regions file, re-read only when it changes"""
+    mtime = os.path.getmtime(path)
+    with _lock:
+        cached = _definitions.get(path)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+    with open(path, encoding="utf-8") as f:
+        cities = json.load(f)["cities"]
+    with _lock:
+        _definitions[path] = (mtime, cities)
+    return cities
+
+
+def _fingerprint(regions):
+    keys = [(region["name"], float(region["latitude"]), float(region["longitude"])) for region in regions]
+    return hashlib.blake2b(json.dumps(keys).encode(), digest_size=16).hexdigest()
+
+
+class RegionIndex:
+    """Nearest-centroid lookup for one city's regions.
+
+    Coordinates are projected to kilometres (longitude scaled by the cosine
+    of the city's mean latitude), so distances are comparable in every
+    direction across a city.
+    """
+
+    def __init__(self, regions):
+        if not regions:
+            raise ValueError("a region index needs at least one region")
+        self.regions = list(regions)
+        self.names = np.array([region["name"] for region in self.regions], dtype=object)
+        self.fingerprint = _fingerprint(self.regions)
+        lat = np.array([region["latitude"] for region in self.regions], dtype=float)
+        lng = np.array([region["longitude"] for region in self.regions], dtype=float)
+        self._lng_scale = np.cos(np.radians(lat.mean()))
+        self._tree = cKDTree(self._project(lat, lng))
+
+    def _project(self, latitudes, longitudes):
+        lat = np.asarray(latitudes, dtype=float)
+        lng = np.asarray(longitudes, dtype=float)
+        return np.column_stack([lat * KM_PER_DEGREE, lng * KM_PER_DEGREE * self._lng_scale])
+
+    def query(self, latitudes, longitudes, max_distance_km=None):
+        """Region codes (positions in ``regions``) and distances in km.
+
+        Points farther than ``max_distance_km`` from every centroid, or with
+        missing coordinates, get code -1.
+        """
+        points = self._project(latitudes, longitudes)
+        codes = np.full(len(points), -1, dtype=np.int64)
+        distances = np.full(len(points), np.inf)
+        valid = np.isfinite(points).all(axis=1)
+        if valid.any():
+            bound = np.inf if max_distance_km is None else max_distance_km
+            found_distance, found_code = self._tree.query(points[valid], distance_upper_bound=bound)
+            hit = np.isfinite(found_distance)
+            codes[np.flatnonzero(valid)[hit]] = found_code[hit]
+            distances[np.flatnonzero(valid)[hit]] = found_distance[hit]
+        return codes, distances
+
+    def assign(self, latitudes, longitudes, max_distance_km=None):
+        """Region name per point (``None`` where no region is close enough)"""
+        codes, _ = self.query(latitudes, longitudes, max_distance_km)
+        names = self.names[np.maximum(codes, 0)]
+        names[codes < 0] = None
+        return names
+
+
+def region_index(city, path=DEFAULT_REGIONS_PATH, regions=None):
+    """Shared ``RegionIndex`` for ``city``, rebuilt only when its regions change.
+
+    ``regions`` overrides the definitions file (e.g. for cities it does not
+    cover); the index is keyed on the regions' names and centroids.
+    """
+    if regions is None:
+        regions = load_region_definitions(path).get(city)
+        if regions is None:
+            raise KeyError(f"no region definitions for {city!r} in {path}")
+    fingerprint = _fingerprint(regions)
+    with _lock:
+        cached = _indexes.get(city)
+        if cached is not None and cached.fingerprint == fingerprint:
+            return cached
+    index = RegionIndex(regions)
+    with _lock:
+        _indexes[city] = index
+    return index
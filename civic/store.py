@@ -0,0 +1,117 @@
+"""Columnar storage for scored posts.
+
+Generators and fetchers hand their fields over as whole columns instead of
+one dict per post. Low-cardinality string fields (and post text, which
+repeats heavily in mock and syndicated data) are dictionary-encoded, so a
+column of 100k region names costs one byte per post plus the distinct names.
+Coordinates and other display-only numbers are stored as 32-bit values;
+sentiment scores stay 64-bit because they are compared against thresholds.
+Text that rarely repeats gains nothing from its dictionary: each distinct
+string is still stored once, so such text sets the floor on memory.
+"""
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+# String fields stored as Arrow dictionaries / pandas categoricals
+CATEGORICAL_COLUMNS = {
+    "city", "region", "focus_area", "topic", "source", "source_name", "user",
+    "primary_emotion", "emotion_icon", "weather_analogy", "risk_level", "text", "sentiment_class",
+}
+
+# Numeric fields stored narrower than NumPy's default (float32 keeps coordinates to about a metre)
+NARROW_COLUMNS = {
+    "latitude": pa.float32(),
+    "longitude": pa.float32(),
+    "emotion_intensity": pa.float32(),
+    "topic_confidence": pa.float32(),
+    "engagement": pa.int32(),
+}
+
+# Fields stored as UTC timestamps; naive datetimes are read as local time
+TIMESTAMP_COLUMNS = {"timestamp", "created_at"}
+
+
+def _local_timezone():
+    return datetime.now().astimezone().tzinfo
+
+
+def _to_arrow(name, values):
+    """Convert one column to an Arrow array with the store's encoding"""
+    if isinstance(values, (pa.Array, pa.ChunkedArray)):
+        return values
+    if name in TIMESTAMP_COLUMNS:
+        stamps = pd.to_datetime(pd.Series(values), utc=False)
+        if stamps.dt.tz is None:
+            stamps = stamps.dt.tz_localize(_local_timezone())
+        return pa.array(stamps.dt.tz_convert("UTC"), type=pa.timestamp("us", tz="UTC"))
+    if name in CATEGORICAL_COLUMNS:
+        return pa.array(pd.Categorical(values))
+    if name in NARROW_COLUMNS:
+        values = values if isinstance(values, np.ndarray) else list(values)
+        return pa.array(values).cast(NARROW_COLUMNS[name])
+    if isinstance(values, np.ndarray) and values.dtype != object:
+        return pa.array(values)
+    return pa.array(list(values))
+
+
+class PostStore:
+    """Immutable columnar batch of posts backed by a ``pyarrow.Table``"""
+
+    def __init__(self, table=None):
+        self.table = table if table is not None else pa.table({})
+
+    @classmethod
+    def from_columns(cls, columns):
+        """Build a store from ``{field: sequence}`` with equal-length columns"""
+        return cls(pa.table({name: _to_arrow(name, values) for name, values in columns.items()}))
+
+    @classmethod
+    def from_records(cls, records):
+        """Build a store from a list of post dicts (for small, irregular batches)"""
+        if not records:
+            return cls()
+        names = list(dict.fromkeys(name for record in records for name in record))
+        return cls.from_columns({name: [record.get(name) for record in records] for name in names})
+
+    @classmethod
+    def concat(cls, stores):
+        """Stack stores row-wise; missing columns are filled with nulls"""
+        tables = [store.table for store in stores if len(store)]
+        if not tables:
+            return cls()
+        return cls(pa.concat_tables(tables, promote_options="permissive"))
+
+    def __len__(self):
+        return self.table.num_rows
+
+    @property
+    def columns(self):
+        return self.table.column_names
+
+    @property
+    def nbytes(self):
+        return self.table.nbytes
+
+    def filter(self, mask):
+        """Rows where the boolean ``mask`` is true, as a new store"""
+        return PostStore(self.table.filter(pa.array(np.asarray(mask, dtype=bool))))
+
+    def column(self, name):
+        """One column as a NumPy array (categoricals decoded to objects)"""
+        column = self.table.column(name)
+        if pa.types.is_dictionary(column.type):
+            # Decode through the dictionary so nulls stay None
+            column = column.cast(column.type.value_type)
+        return column.to_numpy()
+
+    def to_pandas(self):
+        """DataFrame view; dictionary columns become pandas categoricals.
+
+        Numeric columns without nulls are handed over without copying.
+        """
+        if not self.table.num_columns:
+            return pd.DataFrame()
+        return self.table.to_pandas(split_blocks=True)
@@ -0,0 +1,373 @@
+"""Seedable synthetic civic discourse for demos and load testing.
+
+Every field is drawn for the whole batch at once from one
+``numpy.random.Generator``, so a given seed and configuration always yields
+the same posts, and millions of posts take seconds rather than minutes.
+Text, region, topic and user columns come back as pandas categoricals built
+from codes, ready for ``PostStore.from_columns``. Load-test workloads can
+mix templates with openers, names and numbers (``text_variants``) so that,
+like real feeds, most texts occur once; the command line does so by default.
+
+Write a reproducible workload to Parquet with::
+
+    python -m civic.synthetic --posts 1000000 --seed 7 --now 2024-06-01T12:00 --out posts.parquet
+
+The seed and clock are stored in the file's schema metadata.
+"""
+import argparse
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from civic.spatial import load_region_definitions
+
+SENTIMENT_CLASSES = ("positive", "neutral", "negative")
+
+# Roughly the tone mix of the original hand-written mock posts
+DEFAULT_SENTIMENT_MIX = {"positive": 0.4, "neutral": 0.2, "negative": 0.4}
+
+CITY_CENTERS = {
+    "New York": (40.7128, -74.0060),
+    "Los Angeles": (34.0522, -118.2437),
+    "Chicago": (41.8781, -87.6298),
+    "Houston": (29.7604, -95.3698),
+    "Phoenix": (33.4484, -112.0740),
+    "Philadelphia": (39.9526, -75.1652),
+    "San Antonio": (29.4241, -98.4936),
+    "San Diego": (32.7157, -117.1611),
+    "Dallas": (32.7767, -96.7970),
+    "San Jose": (37.3382, -121.8863),
+    "Austin": (30.2672, -97.7431),
+    "Jacksonville": (30.3322, -81.6557)
+}
+
+# Clock for the command-line workload, so a seed alone reproduces the file
+DEFAULT_NOW = datetime(2024, 6, 1, 12, 0)
+
+# Center used for cities not listed above (geographic center of the US)
+FALLBACK_CENTER = (39.8283, -98.5795)
+
+NEIGHBORHOOD_NAMES = [
+    "Downtown", "Uptown", "East Side", "West End", "North Hills",
+    "South Park", "Central District", "Riverfront", "Metro Center",
+    "University District", "Historic Quarter", "Business Park"
+]
+
+# Post templates per topic and tone
+DEFAULT_TEMPLATES = {
+    "Education": {
+        "positive": [
+            "Teachers are doing amazing work despite challenges",
+            "Proud of our students' achievements this year",
+        ],
+        "neutral": [
+            "Need better after-school programs for our kids",
+            "School board meeting on the new curriculum is next week",
+        ],
+        "negative": [
+            "School funding needs serious improvement in our district",
+            "Concerned about classroom sizes and resources",
+        ],
+    },
+    "Healthcare": {
+        "positive": [
+            "Grateful for our healthcare workers' dedication",
+            "New clinic opening brings hope to our community",
+        ],
+        "neutral": [
+            "Mental health services need more funding",
+            "County health department posted updated clinic hours",
+        ],
+        "negative": [
+            "Hospital wait times are becoming unacceptable",
+            "Frustrated with insurance coverage limitations",
+        ],
+    },
+    "Transportation": {
+        "positive": [
+            "Excited about new bike lane installations",
+            "Appreciate the improved bus schedules",
+        ],
+        "neutral": [
+            "Road repairs needed urgently in our neighborhood",
+            "Transit authority released the new route map",
+        ],
+        "negative": [
+            "Public transit delays are affecting daily commute",
+            "Traffic congestion getting worse every day",
+        ],
+    },
+    "Environment": {
+        "positive": [
+            "Community garden project bringing people together",
+            "Park maintenance has improved significantly",
+        ],
+        "neutral": [
+            "Need more recycling facilities in our area",
+            "City council reviewing the new climate plan",
+        ],
+        "negative": [
+            "Air quality concerns in industrial areas",
+            "Worried about pollution levels in local rivers",
+        ],
+    },
+    "Housing": {
+        "positive": [
+            "New affordable housing project gives hope",
+            "Neighborhood revitalization showing positive results",
+        ],
+        "neutral": [
+            "Homelessness crisis needs immediate attention",
+            "Housing authority opened applications for the new units",
+        ],
+        "negative": [
+            "Rent prices becoming unaffordable for families",
+            "Frustrated with lack of rental protections",
+        ],
+    },
+    "Public Safety": {
+        "positive": [
+            "Community watch program making streets safer",
+            "Fire department doing excellent work in our area",
+        ],
+        "neutral": [
+            "Police response times need improvement",
+            "Need better street lighting in residential areas",
+        ],
+        "negative": [
+            "Concerned about recent crime spike",
+            "Worried about break-ins on our block",
+        ],
+    },
+}
+
+
+# Fragments mixed into every text; the first entry of each list leaves the text as written
+TEXT_OPENERS = ["", "Update:", "PSA:", "Noticed:", "Quick note:", "Thread:", "Re: last meeting,", "Heads up:"]
+TEXT_DETAILS = [
+    "", "cc @{handle}", "({number} replies so far)", "h/t {name}", "Meeting #{number} on this",
+    "Day {number} of this", "via @{handle}", "{name} raised this at the {number}th street meeting",
+]
+RESIDENT_NAMES = [
+    "Maria", "James", "Aisha", "Wei", "Carlos", "Priya", "Daniel", "Fatima", "Kevin", "Sofia",
+    "Omar", "Rosa", "Luis", "Mei", "Andre", "Nadia", "Tom", "Yuki", "Ibrahim", "Elena",
+]
+# Distinct fragment combinations a template can take in load-test workloads
+WORKLOAD_TEXT_VARIANTS = 100_000
+
+
+def _fragments(variant):
+    """``(prefix, suffix)`` for the opener, detail, name and number encoded in ``variant``"""
+    variant, opener = divmod(variant, len(TEXT_OPENERS))
+    variant, detail = divmod(variant, len(TEXT_DETAILS))
+    number, name = divmod(variant, len(RESIDENT_NAMES))
+    name = RESIDENT_NAMES[name]
+    detail = TEXT_DETAILS[detail].format(name=name, handle=f"{name.lower()}{number + 2}", number=number + 2)
+    return (TEXT_OPENERS[opener] + " " if TEXT_OPENERS[opener] else "", " " + detail if detail else "")
+
+
+def _weights(spec, default_names):
+    """Names and normalized probabilities from a ``{name: weight}`` dict or a list"""
+    if spec is None:
+        spec = default_names
+    if isinstance(spec, dict):
+        names, weights = list(spec), np.asarray(list(spec.values()), dtype=float)
+    else:
+        names, weights = list(spec), np.ones(len(spec))
+    if not names or weights.sum() <= 0:
+        raise ValueError("at least one name with a positive weight is required")
+    return names, weights / weights.sum()
+
+
+def _categorical(codes, categories):
+    return pd.Categorical.from_codes(codes, categories=categories)
+
+
+def default_regions(city, count=8, seed=None):
+    """Neighborhoods scattered around a city center, like ``generate_city_regions``"""
+    rng = np.random.default_rng(seed)
+    base_lat, base_lng = CITY_CENTERS.get(city, FALLBACK_CENTER)
+    offsets = rng.uniform(-0.2, 0.2, size=(count, 2))
+    return [
+        {
+            "name": NEIGHBORHOOD_NAMES[i % len(NEIGHBORHOOD_NAMES)],
+            "latitude": base_lat + offsets[i, 0],
+            "longitude": base_lng + offsets[i, 1],
+        }
+        for i in range(count)
+    ]
+
+
+def _sample_ages(rng, n, window_hours, hourly_profile, now):
+    """Post ages in hours; ``hourly_profile`` weights the local hour of day"""
+    if hourly_profile is None:
+        return rng.uniform(0, window_hours, n)
+    profile = np.asarray(hourly_profile, dtype=float)
+    if profile.shape != (24,) or profile.max() <= 0:
+        raise ValueError("hourly_profile needs 24 non-negative weights")
+    accept_prob = profile / profile.max()
+    now_hour = now.hour + now.minute / 60 + now.second / 3600
+
+    # Rejection sampling: draw uniform ages, keep each with its hour's weight
+    ages = np.empty(n)
+    filled = 0
+    while filled < n:
+        batch = max(int((n - filled) / accept_prob.mean() * 1.1), 1024)
+        candidates = rng.uniform(0, window_hours, batch)
+        hours = np.floor(now_hour - candidates).astype(np.int64) % 24
+        kept = candidates[rng.random(batch) < accept_prob[hours]]
+        take = min(len(kept), n - filled)
+        ages[filled:filled + take] = kept[:take]
+        filled += take
+    return ages
+
+
+def generate_posts(n, seed=None, cities=None, regions=None, topics=None, sentiment_mix=None,
+                   templates=None, window_hours=168, hourly_profile=None, engagement_median=30,
+                   engagement_sigma=1.0, max_engagement=None, user_pool=9000, location_jitter=0.01,
+                   text_format="{text} in {region}", text_variants=1, now=None):
+    """Draw ``n`` synthetic posts as a dict of columns.
+
+    ``cities``, ``topics`` and ``sentiment_mix`` accept a list (uniform) or a
+    ``{name: weight}`` dict. ``regions`` maps each city to a list of
+    ``{"name", "latitude", "longitude"}`` dicts with an optional
+    ``"weight"``; other cities use ``civic/data/regions.json``, or
+    ``default_regions`` if it does not list them. Each
+    ``templates`` topic maps tone (positive/neutral/negative) to texts, or
+    is a plain list used for every tone; templates and ``text_format`` may
+    use ``{city}`` and ``{region}`` placeholders. With ``text_variants``
+    above 1, each post's text is then one of that many mixes of openers,
+    names and numbers; the default keeps the bare templates. Timestamps are spread over the
+    last ``window_hours`` before ``now`` (default: the current time),
+    weighted by ``hourly_profile`` if given, and
+    engagement is log-normal around ``engagement_median``.
+
+    Columns: ``post_id``, ``city``, ``region``, ``focus_area``,
+    ``sentiment_class``, ``text``, ``latitude``, ``longitude``, ``user``,
+    ``created_at``, ``engagement``.
+    """
+    rng = np.random.default_rng(seed)
+    now = now or datetime.now()
+    templates = templates or DEFAULT_TEMPLATES
+    city_names, city_p = _weights(cities, list(CITY_CENTERS))
+    topic_names, topic_p = _weights(topics, list(templates))
+    tone_names, tone_p = _weights(sentiment_mix or DEFAULT_SENTIMENT_MIX, SENTIMENT_CLASSES)
+
+    # Flatten regions of all cities; region codes index these tables
+    regions = regions or {}
+    region_city, region_names, region_lat, region_lng, region_weight = [], [], [], [], []
+    defined = load_region_definitions()
+    for c, city in enumerate(city_names):
+        city_regions = regions.get(city) or defined.get(city) or default_regions(city, seed=rng.integers(2 ** 32))
+        for region in city_regions:
+            region_city.append(c)
+            region_names.append(region["name"])
+            region_lat.append(region["latitude"])
+            region_lng.append(region["longitude"])
+            region_weight.append(region.get("weight", 1.0))
+    region_city = np.array(region_city)
+    region_weight = np.array(region_weight, dtype=float)
+
+    city_codes = rng.choice(len(city_names), size=n, p=city_p)
+    # Pick a region within each post's city: uniform draw over that city's cumulative weights
+    region_order = np.argsort(region_city, kind="stable")
+    cumulative = np.cumsum(region_weight[region_order])
+    city_start = np.searchsorted(region_city[region_order], np.arange(len(city_names)))
+    city_end = np.searchsorted(region_city[region_order], np.arange(len(city_names)), side="right")
+    low = np.where(city_start > 0, cumulative[city_start - 1], 0.0)
+    high = cumulative[city_end - 1]
+    draws = low[city_codes] + rng.random(n) * (high - low)[city_codes]
+    region_codes = region_order[np.minimum(np.searchsorted(cumulative, draws, side="right"), len(cumulative) - 1)]
+
+    # Template pool: every (topic, tone, text) combination, laid out contiguously
+    topic_codes = rng.choice(len(topic_names), size=n, p=topic_p)
+    tone_codes = rng.choice(len(tone_names), size=n, p=tone_p)
+    pool, pool_start, pool_size = [], [], []
+    for topic in topic_names:
+        by_tone = templates.get(topic, [f"Community discussion about {topic.lower()}"])
+        for tone in tone_names:
+            texts = by_tone if isinstance(by_tone, list) else (by_tone.get(tone) or sum(by_tone.values(), []))
+            pool_start.append(len(pool))
+            pool_size.append(len(texts))
+            pool.extend(texts)
+    slot = topic_codes * len(tone_names) + tone_codes
+    pool_codes = np.asarray(pool_start)[slot] + (rng.random(n) * np.asarray(pool_size)[slot]).astype(np.int64)
+
+    # Format only the distinct (template, region) combinations that were drawn
+    variant_codes = rng.integers(0, max(text_variants, 1), n)
+    combined, base_codes = np.unique(pool_codes * len(region_names) + region_codes, return_inverse=True)
+    base_texts = []
+    for c in combined.tolist():
+        template, r = divmod(c, len(region_names))
+        region, city = region_names[r], city_names[region_city[r]]
+        text = pool[template].format(city=city, region=region)
+        base_texts.append(text_format.format(text=text, city=city, region=region))
+
+    # Wrap each in its variant's fragments, joining strings only once per distinct (text, variant)
+    variants, variant_codes = np.unique(variant_codes, return_inverse=True)
+    prefixes, suffixes = (np.array(parts, dtype=object) for parts in zip(*map(_fragments, variants.tolist())))
+    combined, text_codes = np.unique(base_codes * len(variants) + variant_codes, return_inverse=True)
+    base, variant = np.divmod(combined, len(variants))
+    label_codes, text_labels = pd.factorize(prefixes[variant] + np.array(base_texts, dtype=object)[base] + suffixes[variant])
+    text_codes = label_codes[text_codes]
+
+    region_labels, region_label_codes = np.unique(np.array(region_names, dtype=object), return_inverse=True)
+    latitude = np.asarray(region_lat)[region_codes] + rng.normal(0, location_jitter, n)
+    longitude = np.asarray(region_lng)[region_codes] + rng.normal(0, location_jitter, n)
+
+    user_ids, user_codes = np.unique(rng.integers(0, user_pool, n), return_inverse=True)
+    ages = _sample_ages(rng, n, window_hours, hourly_profile, now)
+    created_at = np.datetime64(now, "us") - (ages * 3_600_000_000).astype("timedelta64[us]")
+
+    engagement = np.rint(rng.lognormal(np.log(engagement_median), engagement_sigma, n)).astype(np.int64)
+    if max_engagement is not None:
+        np.minimum(engagement, max_engagement, out=engagement)
+
+    return {
+        "post_id": np.arange(1, n + 1),
+        "city": _categorical(city_codes, city_names),
+        "region": _categorical(region_label_codes[region_codes], region_labels),
+        "focus_area": _categorical(topic_codes, topic_names),
+        "sentiment_class": _categorical(tone_codes, tone_names),
+        "text": _categorical(text_codes, text_labels),
+        "latitude": latitude,
+        "longitude": longitude,
+        "user": _categorical(user_codes, [f"resident_{1000 + u}" for u in user_ids]),
+        "created_at": created_at,
+        "engagement": engagement,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write a reproducible synthetic post workload")
+    parser.add_argument("--posts", type=int, default=1_000_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--cities", nargs="+", help="cities to draw from (default: all known cities)")
+    parser.add_argument("--window-hours", type=float, default=168)
+    parser.add_argument("--now", type=datetime.fromisoformat, default=DEFAULT_NOW,
+                        help=f"end of the time window, ISO format (default {DEFAULT_NOW.isoformat()})")
+    parser.add_argument("--text-variants", type=int, default=WORKLOAD_TEXT_VARIANTS,
+                        help="fragment mixes per template; 1 keeps the bare templates")
+    parser.add_argument("--out", required=True, help="Parquet file to write")
+    args = parser.parse_args(argv)
+
+    import pyarrow.parquet as pq
+    from civic.store import PostStore
+
+    store = PostStore.from_columns(generate_posts(
+        args.posts, seed=args.seed, cities=args.cities, window_hours=args.window_hours,
+        text_variants=args.text_variants, now=args.now))
+    # Keep the clock with the seed so the file can be regenerated exactly
+    table = store.table.replace_schema_metadata({
+        **(store.table.schema.metadata or {}),
+        b"civic.synthetic.seed": str(args.seed).encode(),
+        b"civic.synthetic.now": args.now.isoformat().encode(),
+        b"civic.synthetic.text_variants": str(args.text_variants).encode(),
+    })
+    pq.write_table(table, args.out)
+    print(f"Wrote {len(store):,} posts (seed {args.seed}, now {args.now.isoformat()}) -> {args.out}")
+
+
+if __name__ == "__main__":
+    main()
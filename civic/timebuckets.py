@@ -0,0 +1,351 @@
+"""Hourly rolling aggregates of scored posts.
+
+A ``HourlyRollup`` keeps one ring buffer of hourly buckets per
+(city, region, topic) key: post count, sentiment sum, negative count and an
+emotion histogram. Adding a batch sums its posts per touched (key, hour)
+cell and scatters only those cells into the buffers, so the cost follows
+the batch, not the number of keys. Each day's hours are also kept summed in a daily ring, so a
+window query such as "last 30 days" reads whole days plus the partial hours
+at either end: switching time ranges never touches raw posts. Buckets older
+than the ring's capacity are dropped as time advances.
+"""
+import numpy as np
+import pandas as pd
+
+from civic.aggregate import NEGATIVE_THRESHOLD
+
+# Default ring length: 30 days of hourly buckets
+DEFAULT_HOURS = 720
+KEY_FIELDS = ("city", "region", "topic")
+# Per-bucket fields; "emotions" has one trailing column per emotion
+FIELDS = ("post_count", "sentiment_sum", "negative_count", "emotions")
+
+
+def hour_numbers(timestamps):
+    """Absolute hour numbers (hours since the epoch) for a column of timestamps; naive values are UTC"""
+    values = np.asarray(timestamps)
+    if not np.issubdtype(values.dtype, np.datetime64):
+        values = pd.to_datetime(pd.Series(timestamps), utc=True).dt.tz_localize(None).to_numpy()
+    return values.astype("datetime64[h]").astype(np.int64)
+
+
+def _hour(moment):
+    stamp = pd.Timestamp(moment)
+    if stamp.tzinfo is not None:
+        stamp = stamp.tz_convert("UTC").tz_localize(None)
+    return int(stamp.to_datetime64().astype("datetime64[h]").astype(np.int64))
+
+
+def _empty(rows, length, emotions=0):
+    return {
+        "post_count": np.zeros((rows, length), dtype=np.int64),
+        "sentiment_sum": np.zeros((rows, length)),
+        "negative_count": np.zeros((rows, length), dtype=np.int64),
+        "emotions": np.zeros((rows, length, emotions), dtype=np.int64),
+    }
+
+
+def _ring_slices(first, last, length):
+    """Absolute positions ``first..last`` of a ring of ``length`` as at most two slices"""
+    if first > last:
+        return []
+    start, size = first % length, last - first + 1
+    if start + size <= length:
+        return [slice(start, start + size)]
+    return [slice(start, length), slice(0, start + size - length)]
+
+
+class HourlyRollup:
+    """Per-hour counts, sentiment sums and emotion histograms per (city, region, topic)"""
+
+    def __init__(self, hours=DEFAULT_HOURS):
+        self.capacity = int(hours)
+        # Enough day buckets for every day the hourly ring can touch
+        self.day_capacity = self.capacity // 24 + 2
+        self.latest_hour = None
+        self.dropped = 0
+        self._rows = {}
+        self._labels = {field: [] for field in KEY_FIELDS}
+        self._label_codes = {field: {} for field in KEY_FIELDS}
+        self._key_codes = np.zeros((0, len(KEY_FIELDS)), dtype=np.int64)
+        self._emotions = {}
+        self._hourly = _empty(0, self.capacity)
+        self._daily = _empty(0, self.day_capacity)
+
+    def __len__(self):
+        return int(self._hourly["post_count"].sum())
+
+    @property
+    def emotions(self):
+        return sorted(self._emotions, key=str)
+
+    def _label_code(self, field, label):
+        codes = self._label_codes[field]
+        if label not in codes:
+            codes[label] = len(self._labels[field])
+            self._labels[field].append(label)
+        return codes[label]
+
+    def _grow(self, rows=0, emotions=0):
+        for tier in (self._hourly, self._daily):
+            for field, buffer in tier.items():
+                pad = [(0, rows), (0, 0)] + ([(0, emotions)] if field == "emotions" else [])
+                tier[field] = np.pad(buffer, pad)
+
+    def _row(self, key):
+        """Buffer row for a key, growing the buffers when a new key appears"""
+        row = self._rows.get(key)
+        if row is None:
+            row = self._rows[key] = len(self._rows)
+            codes = [self._label_code(field, label) for field, label in zip(KEY_FIELDS, key)]
+            self._key_codes = np.vstack([self._key_codes, codes])
+            allocated = len(self._hourly["post_count"])
+            if row >= allocated:
+                self._grow(rows=max(8, allocated))
+        return row
+
+    def _emotion_column(self, emotion):
+        column = self._emotions.get(emotion)
+        if column is None:
+            column = self._emotions[emotion] = len(self._emotions)
+            self._grow(emotions=1)
+        return column
+
+    def _advance(self, hour):
+        """Move the newest bucket to ``hour``, dropping hours that fall out of the ring"""
+        if self.latest_hour is not None and hour <= self.latest_hour:
+            return
+        if self.latest_hour is None or hour - self.latest_hour >= self.capacity:
+            for tier in (self._hourly, self._daily):
+                for buffer in tier.values():
+                    buffer[:] = 0
+        else:
+            # Take the expiring hours out of their day totals before reusing their slots
+            expiring = np.arange(self.latest_hour + 1, hour + 1) - self.capacity
+            slots = expiring % self.capacity
+            days = (expiring // 24) % self.day_capacity
+            for field, buffer in self._hourly.items():
+                np.subtract.at(self._daily[field], (slice(None), days), buffer[:, slots])
+                buffer[:, slots] = 0
+            # Day slots being entered for the first time held a day that is long gone
+            for day in range(self.latest_hour // 24 + 1, hour // 24 + 1):
+                for buffer in self._daily.values():
+                    buffer[:, day % self.day_capacity] = 0
+        self.latest_hour = int(hour)
+
+    def add(self, timestamps, cities, regions, topics, sentiment_scores, emotions):
+        """Fold a batch of posts into their hourly buckets.
+
+        Posts older than the ring's capacity (relative to the newest post
+        seen so far) are counted in ``dropped``.
+        """
+        hours = hour_numbers(timestamps)
+        if not len(hours):
+            return self
+        self._advance(hours.max())
+        keep = hours > self.latest_hour - self.capacity
+        self.dropped += int((~keep).sum())
+        hours = hours[keep]
+
+        # Factorize the key columns once, then map each distinct key to its row
+        key_codes, key_labels = zip(*(
+            pd.factorize(np.asarray(values, dtype=object)[keep], use_na_sentinel=False)
+            for values in (cities, regions, topics)
+        ))
+        sizes = [max(len(labels), 1) for labels in key_labels]
+        combined = (key_codes[0] * sizes[1] + key_codes[1]) * sizes[2] + key_codes[2]
+        distinct, inverse = np.unique(combined, return_inverse=True)
+        rows = np.array([
+            self._row((key_labels[0][code // (sizes[1] * sizes[2])],
+                       key_labels[1][code // sizes[2] % sizes[1]],
+                       key_labels[2][code % sizes[2]]))
+            for code in distinct
+        ], dtype=np.int64)[inverse]
+
+        emotion_codes, emotion_labels = pd.factorize(np.asarray(emotions, dtype=object)[keep], use_na_sentinel=False)
+        columns = np.array([self._emotion_column(label) for label in emotion_labels], dtype=np.int64)[emotion_codes]
+        scores = np.asarray(sentiment_scores, dtype=float)[keep]
+
+        for tier, positions in [(self._hourly, hours % self.capacity),
+                                (self._daily, (hours // 24) % self.day_capacity)]:
+            n_emotions = tier["emotions"].shape[2]
+            # Sum per touched (row, slot) cell, then scatter just those cells
+            cells, cell_codes = np.unique(rows * self.capacity + positions, return_inverse=True)
+            cell_rows, cell_slots = np.divmod(cells, self.capacity)
+            for field, weights in [("post_count", None), ("sentiment_sum", scores),
+                                   ("negative_count", scores < NEGATIVE_THRESHOLD)]:
+                added = np.bincount(cell_codes, weights=weights, minlength=len(cells))
+                np.add.at(tier[field], (cell_rows, cell_slots), added.astype(tier[field].dtype))
+            emotion_cells, counts = np.unique(cell_codes * n_emotions + columns, return_counts=True)
+            cell, column = np.divmod(emotion_cells, n_emotions)
+            np.add.at(tier["emotions"], (cell_rows[cell], cell_slots[cell], column), counts)
+        return self
+
+    def _span(self, hours, now):
+        """Absolute first and last hour of the window, clipped to the hours still held"""
+        end = self.latest_hour if now is None else min(_hour(now), self.latest_hour)
+        start = max(end - int(hours) + 1, self.latest_hour - self.capacity + 1)
+        return start, end
+
+    def window_start(self, hours, now=None):
+        """First timestamp covered by a ``hours`` window ending at ``now`` (default: the newest bucket)"""
+        end = self.latest_hour if now is None else _hour(now)
+        return np.datetime64(int(end - hours + 1), "h")
+
+    def _keys(self, filters):
+        """Key rows matching ``filters``"""
+        match = np.ones(len(self._rows), dtype=bool)
+        for field, value in filters.items():
+            if value is not None:
+                code = self._label_codes[field].get(value, -1)
+                match &= self._key_codes[:, KEY_FIELDS.index(field)] == code
+        return np.flatnonzero(match)
+
+    def _window(self, hours, now, filters):
+        """Key rows matching ``filters`` and their sums over the window.
+
+        Whole days inside the window come from the daily ring and the
+        partial days at either end from the hourly ring.
+        """
+        keys = self._keys(filters)
+        parts = []
+        if self.latest_hour is not None:
+            start, end = self._span(hours, now)
+            first_day, last_day = -(-start // 24), (end + 1) // 24 - 1
+            if first_day > last_day:
+                parts = [(self._hourly, part) for part in _ring_slices(start, end, self.capacity)]
+            else:
+                parts = (
+                    [(self._hourly, part) for part in _ring_slices(start, first_day * 24 - 1, self.capacity)]
+                    + [(self._daily, part) for part in _ring_slices(first_day, last_day, self.day_capacity)]
+                    + [(self._hourly, part) for part in _ring_slices((last_day + 1) * 24, end, self.capacity)]
+                )
+        sums = {}
+        for field in FIELDS:
+            buffer = self._hourly[field]
+            total = np.zeros((len(buffer),) + buffer.shape[2:], dtype=buffer.dtype)
+            for tier, part in parts:
+                total += tier[field][:, part].sum(axis=1)
+            sums[field] = total[keys]
+        return keys, sums
+
+    def _group_codes(self, keys, field, labels):
+        """Group code per key row for ``field`` (``-1`` for labels outside ``labels``) and the group labels"""
+        codes = self._key_codes[keys, KEY_FIELDS.index(field)]
+        known = self._labels[field]
+        if labels is None:
+            labels = sorted({known[code] for code in codes}, key=str)
+        position = {label: i for i, label in enumerate(labels)}
+        lookup = np.array([position.get(label, -1) for label in known], dtype=np.int64)
+        return lookup[codes], list(labels)
+
+    def _emotion_table(self, sums):
+        """Per-key emotion counts with columns in ``emotions`` order"""
+        return sums["emotions"][:, [self._emotions[name] for name in self.emotions]]
+
+    def totals(self, hours, now=None, **filters):
+        """Window totals over all keys matching ``filters`` (``city=``, ``region=``, ``topic=``)"""
+        _, sums = self._window(hours, now, filters)
+        count = int(sums["post_count"].sum())
+        emotion_counts = {
+            emotion: total for emotion, total in zip(self.emotions, self._emotion_table(sums).sum(axis=0).tolist())
+            if total
+        }
+        return {
+            "post_count": count,
+            "mean_sentiment": float(sums["sentiment_sum"].sum()) / count if count else 0.0,
+            "negative_pct": int(sums["negative_count"].sum()) / count * 100 if count else 0.0,
+            "emotion_counts": emotion_counts,
+            "dominant_emotion": max(emotion_counts, key=emotion_counts.get) if emotion_counts else None,
+        }
+
+    def group(self, hours, by="region", labels=None, now=None, **filters):
+        """Window statistics per ``by`` value.
+
+        ``labels`` fixes the row order and includes groups with no posts.
+        Returns ``post_count``, ``mean_sentiment``, ``negative_pct`` and
+        ``dominant_emotion`` indexed by ``by``.
+        """
+        keys, sums = self._window(hours, now, filters)
+        codes, labels = self._group_codes(keys, by, labels)
+        inside = codes >= 0
+        n_groups = len(labels)
+        count = np.bincount(codes[inside], weights=sums["post_count"][inside], minlength=n_groups)
+        sentiment = np.bincount(codes[inside], weights=sums["sentiment_sum"][inside], minlength=n_groups)
+        negative = np.bincount(codes[inside], weights=sums["negative_count"][inside], minlength=n_groups)
+        names = self.emotions
+        emotions = np.zeros((n_groups, len(names)), dtype=np.int64)
+        np.add.at(emotions, codes[inside], self._emotion_table(sums)[inside])
+
+        # Ties go to the first emotion in sorted order
+        dominant = (np.array(names, dtype=object)[emotions.argmax(axis=1)] if names
+                    else np.full(n_groups, None, dtype=object))
+        dominant[count == 0] = None
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return pd.DataFrame({
+                "post_count": count.astype(np.int64),
+                "mean_sentiment": sentiment / count,
+                "negative_pct": negative / count * 100,
+                "dominant_emotion": dominant,
+            }, index=pd.Index(labels, name=by))
+
+    def counts(self, hours, by="region", columns="emotion", labels=None, now=None, **filters):
+        """Window post counts as a ``by`` x ``columns`` table (``columns`` is ``"emotion"`` or a key field)"""
+        keys, sums = self._window(hours, now, filters)
+        codes, labels = self._group_codes(keys, by, labels)
+        inside = codes >= 0
+        if columns == "emotion":
+            names = self.emotions
+            per_key = self._emotion_table(sums)
+        else:
+            column_codes, names = self._group_codes(keys, columns, None)
+            per_key = np.zeros((len(keys), len(names)), dtype=np.int64)
+            per_key[np.arange(len(keys)), column_codes] = sums["post_count"]
+        table = np.zeros((len(labels), len(names)), dtype=np.int64)
+        np.add.at(table, codes[inside], per_key[inside])
+        return pd.DataFrame(table, index=pd.Index(labels, name=by), columns=pd.Index(names, name=columns))
+
+    def hourly(self, hours, now=None, **filters):
+        """Per-hour ``post_count`` and ``mean_sentiment`` for the window, indexed by hour (UTC)"""
+        keys = self._keys(filters)
+        if self.latest_hour is None:
+            start, end = 0, -1
+        else:
+            start, end = self._span(hours, now)
+        slots = np.arange(start, end + 1) % self.capacity
+        count = self._hourly["post_count"][keys][:, slots].sum(axis=0)
+        sentiment = self._hourly["sentiment_sum"][keys][:, slots].sum(axis=0)
+        index = pd.DatetimeIndex(np.arange(start, end + 1).astype("datetime64[h]"), name="hour")
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return pd.DataFrame({"post_count": count, "mean_sentiment": sentiment / count}, index=index)
+
+    def closed_day(self):
+        """Day number (days since the epoch) of the newest complete day, or ``None``"""
+        if self.latest_hour is None:
+            return None
+        return (self.latest_hour + 1) // 24 - 1
+
+    def daily_counts(self, days, by="region", labels=None, **filters):
+        """Emotion counts per complete day, one row per (``by`` value, emotion).
+
+        Covers the last ``days`` complete days still held in full (the
+        current, partial day is left out). Columns are the days (UTC).
+        """
+        names = self.emotions
+        if self.latest_hour is None:
+            first, last = 0, -1
+        else:
+            last = self.closed_day()
+            # The oldest day in the ring may have lost its first hours already
+            oldest = -(-(self.latest_hour - self.capacity + 1) // 24)
+            first = max(last - int(days) + 1, oldest)
+        keys = self._keys(filters)
+        codes, labels = self._group_codes(keys, by, labels)
+        inside = codes >= 0
+        slots = np.arange(first, last + 1) % self.day_capacity
+        per_key = self._daily["emotions"][keys][:, slots][:, :, [self._emotions[name] for name in names]]
+        table = np.zeros((len(labels), len(slots), len(names)), dtype=np.int64)
+        np.add.at(table, codes[inside], per_key[inside])
+        index = pd.MultiIndex.from_product([labels, names], names=[by, "emotion"])
+        columns = pd.DatetimeIndex(np.arange(first, last + 1).astype("datetime64[D]"), name="day")
+        return pd.DataFrame(table.transpose(0, 2, 1).reshape(len(index), len(slots)), index=index, columns=columns)
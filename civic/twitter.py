@@ -0,0 +1,58 @@
+"""Paginated Twitter API v2 recent search."""
+RECENT_SEARCH_URL = "https://api.twitter.com/2/tweets/search/recent"
+
+# Limits the recent search endpoint puts on max_results
+MIN_PAGE_SIZE = 10
+MAX_PAGE_SIZE = 100
+
+TWEET_FIELDS = "created_at,public_metrics,context_annotations,author_id"
+
+
+class TwitterAPIError(Exception):
+    """Recent search returned something other than a usable page"""
+
+    def __init__(self, status_code, payload=None):
+        detail = ""
+        if isinstance(payload, dict):
+            detail = payload.get("title") or payload.get("detail") or ""
+        super().__init__(f"HTTP {status_code} {detail}".strip())
+        self.status_code = status_code
+
+
+def iter_recent_search_pages(client, query, bearer_token, budget, page_size=MAX_PAGE_SIZE, ttl=None):
+    """Yield recent-search response pages until ``budget`` tweets are seen.
+
+    Follows ``meta.next_token`` and yields each page as soon as it arrives,
+    so callers can score and aggregate incrementally and drop the raw page
+    before the next request. Each page keeps its own ``includes`` block.
+    ``client`` is a ``CachedHttpClient``; pages are cached with ``ttl``.
+    Raises ``TwitterAPIError`` on a non-200 response.
+    """
+    headers = {"Authorization": f"Bearer {bearer_token}"}
+    remaining = budget
+    next_token = None
+
+    while remaining > 0:
+        params = {
+            "query": query,
+            "max_results": max(MIN_PAGE_SIZE, min(page_size, remaining, MAX_PAGE_SIZE)),
+            "tweet.fields": TWEET_FIELDS,
+            "expansions": "author_id",
+        }
+        if next_token:
+            params["next_token"] = next_token
+
+        status_code, page = client.get_json(RECENT_SEARCH_URL, params=params, headers=headers, ttl=ttl)
+        if status_code != 200 or not isinstance(page, dict):
+            raise TwitterAPIError(status_code, page)
+        if not page.get("data"):
+            return
+
+        # Copy rather than trim in place: the client may have cached this dict
+        tweets = page["data"][:remaining]
+        remaining -= len(tweets)
+        next_token = page.get("meta", {}).get("next_token")
+        yield {**page, "data": tweets}
+
+        if not next_token:
+            return
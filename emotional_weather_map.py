@@ -1,14 +1,21 @@
 import streamlit as st
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
 import folium
-from streamlit_folium import folium_static
-from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
 import random
-from datetime import datetime, timedelta
 import numpy as np
 
+from civic.cache import data_fingerprint
+from civic.charts import show_chart
+from civic.forecast import RollupForecast
+from civic.maps import density_layer, grid_layer, point_layer, show_map
+from civic.pyramid import GridPyramid
+from civic.profiling import stage
+from civic.scoring import CIVIL_UNREST_LABEL, score_texts
+from civic.spatial import load_region_definitions, region_index
+from civic.store import PostStore
+from civic.synthetic import generate_posts
+from civic.timebuckets import HourlyRollup
+
 # Configure the page for full-width emotional weather map
 st.set_page_config(
     page_title="Emotional Weather Map",
@@ -64,9 +71,6 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-# Initialize VADER sentiment analyzer
-vader_analyzer = SentimentIntensityAnalyzer()
-
 # Title with weather theme
 st.markdown('<h1 class="main-header">🌤️ Emotional Weather Map</h1>', unsafe_allow_html=True)
 st.markdown("### Real-time Civic Sentiment & Emotion Forecasting")
@@ -92,9 +96,16 @@ show_heatmap = st.sidebar.checkbox("Show Emotion Heatmap", True)
 show_forecast = st.sidebar.checkbox("Show 7-day Emotion Forecast", True)
 alert_threshold = st.sidebar.slider("Alert Threshold (% Negative):", 30, 80, 50)
 
-# Generate mock geographic data for the selected city
+# Initial zoom of the weather map; grid statistics are read at the matching level
+MAP_ZOOM = 10
+
+# Neighborhood definitions for the selected city
 def generate_city_regions(city, count=8):
-    """Generate realistic neighborhood/region data for a city"""
+    """Neighborhood centroids for a city from civic/data/regions.json (random layout for unlisted cities)"""
+    defined = load_region_definitions().get(city)
+    if defined:
+        return [dict(region) for region in defined[:count]]
+    
     base_coords = {
         "New York": (40.7128, -74.0060),
         "Los Angeles": (34.0522, -118.2437),
@@ -139,144 +150,80 @@ def generate_city_regions(city, count=8):
 # Enhanced emotion detection beyond basic sentiment
 def analyze_advanced_emotions(text):
     """Analyze text for specific emotions beyond positive/negative"""
-    scores = vader_analyzer.polarity_scores(text)
-    compound = scores['compound']
-    
-    # Enhanced emotion classification
-    if compound >= 0.5:
-        primary_emotion = "Joy"
-        emotion_icon = "😊"
-        weather_analogy = "Sunny"
-    elif compound >= 0.1:
-        primary_emotion = "Content"
-        emotion_icon = "🙂"
-        weather_analogy = "Partly Cloudy"
-    elif compound >= -0.1:
-        primary_emotion = "Neutral"
-        emotion_icon = "😐"
-        weather_analogy = "Cloudy"
-    elif compound >= -0.5:
-        primary_emotion = "Concerned"
-        emotion_icon = "😟"
-        weather_analogy = "Rainy"
-    else:
-        primary_emotion = "Angry"
-        emotion_icon = "😠"
-        weather_analogy = "Stormy"
-    
-    # Secondary emotions based on text content
-    text_lower = text.lower()
-    secondary_emotions = []
-    
-    if any(word in text_lower for word in ['happy', 'great', 'excellent', 'love', 'amazing']):
-        secondary_emotions.append("Excited")
-    if any(word in text_lower for word in ['worried', 'concerned', 'anxious', 'nervous']):
-        secondary_emotions.append("Anxious")
-    if any(word in text_lower for word in ['angry', 'frustrated', 'mad', 'outrage']):
-        secondary_emotions.append("Frustrated")
-    if any(word in text_lower for word in ['sad', 'disappointed', 'unhappy', 'terrible']):
-        secondary_emotions.append("Disappointed")
-    if any(word in text_lower for word in ['hope', 'optimistic', 'looking forward', 'better']):
-        secondary_emotions.append("Hopeful")
+    scores = score_texts([text], scheme="weather")
     
     return {
-        "primary_emotion": primary_emotion,
-        "emotion_icon": emotion_icon,
-        "weather_analogy": weather_analogy,
-        "sentiment_score": compound,
-        "secondary_emotions": secondary_emotions[:2],  # Limit to top 2
-        "intensity": abs(compound)  # Emotion intensity
+        "primary_emotion": scores["primary_emotion"][0],
+        "emotion_icon": scores["emotion_icon"][0],
+        "weather_analogy": scores["weather_analogy"][0],
+        "sentiment_score": float(scores["sentiment_score"][0]),
+        "secondary_emotions": scores["secondary_emotions"][0],  # Limit to top 2
+        "intensity": float(scores["intensity"][0])  # Emotion intensity
     }
 
+# Time range selector mapped to a window of hourly buckets
+TIME_RANGE_HOURS = {
+    "Last 24 hours": 24,
+    "Last 7 days": 168,
+    "Last 30 days": 720
+}
+
+# Posts are ingested once for the longest range; shorter ranges are windows over it
+HISTORY_HOURS = max(TIME_RANGE_HOURS.values())
+POSTS_PER_DAY = 40
+
+# Generate mock civic discourse data with geographic context (unscored)
+def draft_emotional_data(city, regions, focus_areas, post_count=100, window_hours=168, seed=None):
+    """Generate realistic civic discourse with geographic context, as columns"""
+    columns = generate_posts(
+        post_count,
+        seed=seed,
+        cities=[city],
+        regions={city: regions},
+        topics=focus_areas,
+        window_hours=window_hours,
+        engagement_median=60,
+        max_engagement=200,
+        location_jitter=0.015
+    )
+    
+    # Place each geotagged post in its nearest neighborhood
+    index = region_index(city, regions=regions)
+    columns["region"] = pd.Categorical(index.assign(columns["latitude"], columns["longitude"]))
+    return columns
+
+# Attach emotion analysis to drafted posts
+def score_emotional_data(columns):
+    """Run advanced emotion analysis over drafted post columns in one call"""
+    scores = score_texts(columns["text"], scheme="weather")
+    
+    return PostStore.from_columns({
+        **columns,
+        "sentiment_score": scores["sentiment_score"],
+        "primary_emotion": scores["primary_emotion"],
+        "emotion_icon": scores["emotion_icon"],
+        "weather_analogy": scores["weather_analogy"],
+        "secondary_emotions": scores["secondary_emotions"],
+        "emotion_intensity": scores["intensity"],
+        "risk_level": scores["risk_level"]
+    })
+
 # Generate mock civic discourse data with geographic and emotional context
-def generate_emotional_data(city, regions, focus_areas, post_count=100):
+def generate_emotional_data(city, regions, focus_areas, post_count=100, window_hours=168, seed=None):
     """Generate realistic civic discourse with emotional and geographic context"""
-    
-    civic_topics = {
-        "Education": [
-            "School funding needs serious improvement in our district",
-            "Teachers are doing amazing work despite challenges",
-            "Concerned about classroom sizes and resources",
-            "Proud of our students' achievements this year",
-            "Need better after-school programs for our kids"
-        ],
-        "Healthcare": [
-            "Hospital wait times are becoming unacceptable",
-            "Grateful for our healthcare workers' dedication",
-            "Mental health services need more funding",
-            "New clinic opening brings hope to our community",
-            "Frustrated with insurance coverage limitations"
-        ],
-        "Transportation": [
-            "Public transit delays are affecting daily commute",
-            "Excited about new bike lane installations",
-            "Road repairs needed urgently in our neighborhood",
-            "Traffic congestion getting worse every day",
-            "Appreciate the improved bus schedules"
-        ],
-        "Environment": [
-            "Air quality concerns in industrial areas",
-            "Community garden project bringing people together",
-            "Need more recycling facilities in our area",
-            "Park maintenance has improved significantly",
-            "Worried about pollution levels in local rivers"
-        ],
-        "Housing": [
-            "Rent prices becoming unaffordable for families",
-            "New affordable housing project gives hope",
-            "Homelessness crisis needs immediate attention",
-            "Neighborhood revitalization showing positive results",
-            "Frustrated with lack of rental protections"
-        ],
-        "Public Safety": [
-            "Police response times need improvement",
-            "Community watch program making streets safer",
-            "Concerned about recent crime spike",
-            "Fire department doing excellent work in our area",
-            "Need better street lighting in residential areas"
-        ]
-    }
-    
-    posts = []
-    
-    for i in range(post_count):
-        # Select random focus area and region
-        focus = random.choice(focus_areas)
-        region = random.choice(regions)
-        
-        # Get appropriate text samples
-        text_options = civic_topics.get(focus, ["Community discussion about local issues"])
-        text = random.choice(text_options)
-        
-        # Add geographic/local context
-        text = f"{text} in {region['name']}"
-        
-        # Advanced emotion analysis
-        emotion_data = analyze_advanced_emotions(text)
-        
-        posts.append({
-            "post_id": i + 1,
-            "text": text,
-            "focus_area": focus,
-            "region": region['name'],
-            "latitude": region['latitude'],
-            "longitude": region['longitude'],
-            "user": f"resident_{random.randint(1000, 9999)}",
-            "created_at": datetime.now() - timedelta(hours=random.randint(1, 168)),
-            "sentiment_score": emotion_data["sentiment_score"],
-            "primary_emotion": emotion_data["primary_emotion"],
-            "emotion_icon": emotion_data["emotion_icon"],
-            "weather_analogy": emotion_data["weather_analogy"],
-            "secondary_emotions": emotion_data["secondary_emotions"],
-            "emotion_intensity": emotion_data["intensity"],
-            "engagement": random.randint(5, 200)
-        })
-    
-    return posts
+    drafts = draft_emotional_data(city, regions, focus_areas, post_count, window_hours, seed)
+    return score_emotional_data(drafts)
 
 # Create emotional weather map using Folium
-def create_emotional_weather_map(city, posts, regions):
-    """Create an interactive map showing emotional weather across regions"""
+def create_emotional_weather_map(city, region_summary, regions, posts=None, heat_points=None, grid_cells=None):
+    """Create an interactive map showing emotional weather across regions.
+
+    ``region_summary`` is the per-region table from ``aggregate_stage`` (``HourlyRollup.group``).
+    If ``posts`` is given, individual posts are added as a toggleable layer;
+    ``heat_points`` (from ``DensityGrid.heat_points``) adds the negative
+    sentiment density heatmap and ``grid_cells`` (from ``GridPyramid.cells``)
+    a toggleable layer of per-cell statistics.
+    """
     
     base_coords = {
         "New York": (40.7128, -74.0060),
@@ -289,7 +236,7 @@ def create_emotional_weather_map(city, posts, regions):
     center_lat, center_lng = base_coords.get(city, (39.8283, -98.5795))
     
     # Create base map
-    m = folium.Map(location=[center_lat, center_lng], zoom_start=10)
+    m = folium.Map(location=[center_lat, center_lng], zoom_start=MAP_ZOOM)
     
     # Weather analogy colors
     weather_colors = {
@@ -311,14 +258,13 @@ def create_emotional_weather_map(city, posts, regions):
     
     # Add region markers with emotional data
     for region in regions:
-        region_posts = [p for p in posts if p['region'] == region['name']]
+        stats = region_summary.loc[region['name']] if region['name'] in region_summary.index else None
         
-        if region_posts:
-            # Calculate regional emotion metrics
-            avg_sentiment = np.mean([p['sentiment_score'] for p in region_posts])
-            dominant_emotion = max(set([p['primary_emotion'] for p in region_posts]), 
-                                 key=[p['primary_emotion'] for p in region_posts].count)
-            post_count = len(region_posts)
+        if stats is not None and stats['post_count'] > 0:
+            # Regional emotion metrics from the aggregation engine
+            avg_sentiment = stats['mean_sentiment']
+            dominant_emotion = stats['dominant_emotion']
+            post_count = int(stats['post_count'])
             
             # Determine marker color based on average sentiment
             if avg_sentiment > 0.1:
@@ -347,46 +293,215 @@ def create_emotional_weather_map(city, posts, regions):
                 weight=2
             ).add_to(m)
     
-    return m
-
-# Generate emotion forecast
-def generate_emotion_forecast(current_data, days=7):
-    """Generate a 7-day emotion forecast based on current trends"""
-    forecast = []
+    # Negative sentiment density surface
+    if heat_points:
+        density_layer(heat_points).add_to(m)
+    
+    # Pre-aggregated grid cells at the map's zoom level
+    if grid_cells is not None and len(grid_cells):
+        grid_layer(grid_cells).add_to(m)
     
-    current_emotions = [post['primary_emotion'] for post in current_data]
-    emotion_counts = {emotion: current_emotions.count(emotion) for emotion in set(current_emotions)}
-    total_posts = len(current_emotions)
+    # Individual posts, clustered (or pre-binned for large batches)
+    if posts is not None and len(posts):
+        point_layer(
+            posts['latitude'], posts['longitude'], posts['sentiment_score'],
+            name="Individual posts", show=False
+        ).add_to(m)
     
-    base_date = datetime.now()
+    if (posts is not None and len(posts)) or (grid_cells is not None and len(grid_cells)):
+        folium.LayerControl(collapsed=True).add_to(m)
     
-    for day in range(days):
-        forecast_date = base_date + timedelta(days=day+1)
+    return m
+
+# Emotions that make a forecast day look worse
+NEGATIVE_EMOTIONS = ["Angry", "Concerned", CIVIL_UNREST_LABEL]
+POSITIVE_EMOTIONS = ["Content", "Joy"]
+FORECAST_DAYS = 7
+
+# Summarize the statistical emotion forecast day by day
+def generate_emotion_forecast(city_forecast, recent_counts, days=FORECAST_DAYS):
+    """Daily outlook from forecast city-wide emotion counts.
+
+    ``city_forecast`` holds ``mean``/``lower``/``upper`` per (emotion, day);
+    the outlook compares each day's forecast negative share with the share
+    in ``recent_counts`` (emotion counts over the last complete days).
+    """
+    forecast = []
+    if city_forecast.empty:
+        return forecast
+    
+    recent_total = recent_counts.sum()
+    recent_negative = recent_counts.reindex(NEGATIVE_EMOTIONS, fill_value=0).sum() / recent_total if recent_total else 0.0
+    
+    means = city_forecast['mean'].unstack('day')
+    for forecast_date in means.columns[-days:]:
+        day_emotions = means[forecast_date]
+        total = day_emotions.sum()
+        negative_share = day_emotions.reindex(NEGATIVE_EMOTIONS, fill_value=0).sum() / total if total else 0.0
+        positive_share = day_emotions.reindex(POSITIVE_EMOTIONS, fill_value=0).sum() / total if total else 0.0
         
-        # Simulate emotion trends with some randomness
-        day_emotions = {}
-        for emotion, count in emotion_counts.items():
-            # Add some variation to simulate trends
-            variation = random.uniform(0.8, 1.2)
-            day_emotions[emotion] = int(count * variation)
+        # Shifts of more than 5 points in the negative share set the outlook
+        if negative_share > recent_negative + 0.05:
+            outlook = "Concerning"
+        elif negative_share < recent_negative - 0.05:
+            outlook = "Improving"
+        elif positive_share >= 0.5:
+            outlook = "Positive"
+        else:
+            outlook = "Stable"
         
+        dominant = day_emotions.idxmax()
+        low, high = city_forecast.loc[(dominant, forecast_date), ['lower', 'upper']]
         forecast.append({
-            "date": forecast_date,
-            "emotions": day_emotions,
-            "dominant_emotion": max(day_emotions, key=day_emotions.get),
-            "outlook": random.choice(["Improving", "Stable", "Concerning", "Positive"])
+            "date": forecast_date.to_pydatetime(),
+            "emotions": {emotion: int(round(count)) for emotion, count in day_emotions.items() if round(count) > 0},
+            "dominant_emotion": dominant,
+            "dominant_range": (low, high),
+            "outlook": outlook
         })
     
     return forecast
 
+# Cached pipeline stages: ingest -> score -> rollup -> aggregate -> forecast.
+# Each stage is keyed only on the widgets it depends on and pulls its inputs
+# from the upstream stage, so moving the alert threshold or toggling the
+# forecast reruns none of them. Posts are ingested and scored once per city
+# and focus areas; the time range only picks a window of hourly buckets.
+@st.cache_data(show_spinner=False, max_entries=32)
+def load_regions_stage(city):
+    """Region layout for a city, fixed for the life of the cache entry"""
+    return generate_city_regions(city)
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def ingest_stage(city, focus):
+    """Unscored posts for the selected city and focus areas over the full history"""
+    regions = load_regions_stage(city)
+    post_count = POSTS_PER_DAY * HISTORY_HOURS // 24
+    return draft_emotional_data(city, regions, list(focus), post_count, HISTORY_HOURS)
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def score_stage(city, focus):
+    """Posts from the ingest stage with emotion analysis attached"""
+    return score_emotional_data(ingest_stage(city, focus))
+
+@st.cache_resource(show_spinner=False, max_entries=32)
+def rollup_stage(city, focus):
+    """Hourly buckets of the scored posts per region and focus area (shared, read-only)"""
+    posts = score_stage(city, focus)
+    return HourlyRollup(HISTORY_HOURS).add(
+        posts.column('created_at'), posts.column('city'), posts.column('region'),
+        posts.column('focus_area'), posts.column('sentiment_score'), posts.column('primary_emotion')
+    )
+
+def window_stage(city, focus, time_range):
+    """Scored posts inside the selected time range"""
+    posts = score_stage(city, focus)
+    start = rollup_stage(city, focus).window_start(TIME_RANGE_HOURS[time_range])
+    return posts.filter(posts.column('created_at') >= start)
+
+def aggregate_stage(city, focus, time_range):
+    """Per-region summary and region x emotion counts for the time range, read from the hourly buckets.
+
+    Window queries take well under a millisecond, so they are not cached.
+    """
+    rollup = rollup_stage(city, focus)
+    hours = TIME_RANGE_HOURS[time_range]
+    names = [region['name'] for region in load_regions_stage(city)]
+    summary = rollup.group(hours, by='region', labels=names)
+    focus_counts = rollup.counts(hours, by='region', columns='topic', labels=names)
+    summary['dominant_focus'] = (
+        focus_counts.idxmax(axis=1).astype(object).where(focus_counts.sum(axis=1) > 0, None)
+        if len(focus_counts.columns) else None
+    )
+    return summary, rollup.counts(hours, by='region', labels=names)
+
+def regions_center(regions):
+    """Mean centroid of a city's regions"""
+    return (
+        np.mean([region['latitude'] for region in regions]),
+        np.mean([region['longitude'] for region in regions])
+    )
+
+@st.cache_resource(show_spinner=False, max_entries=32)
+def pyramid_stage(city, focus):
+    """Multi-resolution grid aggregates of all scored posts around the city's regions (shared).
+
+    Built once per city and focus areas; time ranges are read with ``window``.
+    """
+    posts = score_stage(city, focus)
+    pyramid = GridPyramid.around(regions_center(load_regions_stage(city)), radius_deg=0.3)
+    return pyramid.add(
+        posts.column('latitude'), posts.column('longitude'), posts.column('sentiment_score'),
+        posts.column('risk_level'), posts.column('created_at')
+    )
+
+def grid_window_stage(city, focus, time_range):
+    """The pyramid restricted to the time range (cached inside the pyramid)"""
+    return pyramid_stage(city, focus).window(TIME_RANGE_HOURS[time_range])
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def density_stage(city, focus, time_range):
+    """Negative-sentiment density surface for the time range, downsampled for the client"""
+    return grid_window_stage(city, focus, time_range).density_grid().heat_points()
+
+@st.cache_resource(show_spinner=False, max_entries=32)
+def forecaster_stage(city, focus):
+    """Holt-Winters forecasters over the daily buckets, per region and city-wide (shared)"""
+    rollup = rollup_stage(city, focus)
+    names = [region['name'] for region in load_regions_stage(city)]
+    return RollupForecast(rollup, by='region', labels=names), RollupForecast(rollup, by='city', labels=[city])
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def forecast_stage(city, focus, closed_day):
+    """Daily outlook city-wide and the most likely emotion per region and day.
+
+    ``closed_day`` (the rollup's newest complete day) is part of the cache
+    key, so the models only fold in new data once a day closes. Today is the
+    first forecast day; the dashboard shows the days after it.
+    """
+    by_region, citywide = forecaster_stage(city, focus)
+    recent = rollup_stage(city, focus).daily_counts(FORECAST_DAYS, by='city', labels=[city])
+    outlook = generate_emotion_forecast(
+        citywide.forecast(FORECAST_DAYS + 1).droplevel('city'), recent.droplevel('city').sum(axis=1)
+    )
+    region_forecast = by_region.forecast(FORECAST_DAYS + 1)
+    if region_forecast.empty:
+        return outlook, None
+    dominant_by_region = region_forecast['mean'].unstack('emotion').idxmax(axis=1).unstack('day')
+    dominant_by_region = dominant_by_region.iloc[:, -FORECAST_DAYS:]
+    dominant_by_region.columns = [day.strftime('%b %d') for day in dominant_by_region.columns]
+    return outlook, dominant_by_region
+
+# Chart drawing; each function only reads the data it is given
+def draw_region_emotions(ax, region_emotion):
+    region_emotion.plot(kind='bar', stacked=True, ax=ax, 
+                        color=['#FFD700', '#98FB98', '#B0C4DE', '#4682B4', '#8B0000'])
+    ax.set_title('Emotion Distribution Across Regions')
+    ax.set_xlabel('Region')
+    ax.set_ylabel('Number of Posts')
+    ax.tick_params(axis='x', labelrotation=45)
+
+def draw_focus_sentiment(ax, focus_sentiment):
+    colors = ['red' if x < 0 else 'green' for x in focus_sentiment.values]
+    focus_sentiment.plot(kind='barh', color=colors, ax=ax)
+    ax.set_title('Average Sentiment by Focus Area')
+    ax.set_xlabel('Sentiment Score')
+    ax.axvline(x=0, color='black', linestyle='--', alpha=0.3)
+
 # Main application
 def main():
-    # Generate data based on user selection
-    regions = generate_city_regions(selected_city)
-    posts = generate_emotional_data(selected_city, regions, selected_focus, 150)
-    
-    # Convert to DataFrame for analysis
-    df = pd.DataFrame(posts)
+    # Pull data for the current selection through the cached stages
+    focus = tuple(selected_focus)
+    with stage("regions"):
+        regions = load_regions_stage(selected_city)
+    with stage("score"):
+        posts = window_stage(selected_city, focus, time_range)
+    with stage("aggregate"):
+        region_summary, region_emotion_counts = aggregate_stage(selected_city, focus, time_range)
+        climate = rollup_stage(selected_city, focus).totals(TIME_RANGE_HOURS[time_range])
+    
+    # Columnar view for analysis; categorical columns stay dictionary-encoded
+    df = posts.to_pandas()
     
     # Overall metrics
     st.header("🌡️ City Emotional Climate")
@@ -394,7 +509,7 @@ def main():
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        avg_sentiment = df['sentiment_score'].mean()
+        avg_sentiment = climate['mean_sentiment']
         emotion_color = "emotion-sunny" if avg_sentiment > 0.1 else "emotion-cloudy" if avg_sentiment > -0.1 else "emotion-rainy"
         st.markdown(f'<div class="weather-card {emotion_color}">', unsafe_allow_html=True)
         st.markdown('<div class="metric-value">' + f"{avg_sentiment:.2f}" + '</div>', unsafe_allow_html=True)
@@ -402,21 +517,21 @@ def main():
         st.markdown('</div>', unsafe_allow_html=True)
     
     with col2:
-        dominant_emotion = df['primary_emotion'].mode()[0] if not df.empty else "Neutral"
+        dominant_emotion = climate['dominant_emotion'] or "Neutral"
         st.markdown(f'<div class="weather-card emotion-calm">', unsafe_allow_html=True)
         st.markdown('<div class="metric-value">' + f"{dominant_emotion}" + '</div>', unsafe_allow_html=True)
         st.markdown('<div class="metric-label">Dominant Emotion</div>', unsafe_allow_html=True)
         st.markdown('</div>', unsafe_allow_html=True)
     
     with col3:
-        total_posts = len(df)
+        total_posts = climate['post_count']
         st.markdown(f'<div class="weather-card">', unsafe_allow_html=True)
         st.markdown('<div class="metric-value">' + f"{total_posts}" + '</div>', unsafe_allow_html=True)
         st.markdown('<div class="metric-label">Civic Posts Analyzed</div>', unsafe_allow_html=True)
         st.markdown('</div>', unsafe_allow_html=True)
     
     with col4:
-        negative_pct = len(df[df['sentiment_score'] < -0.1]) / len(df) * 100 if len(df) > 0 else 0
+        negative_pct = climate['negative_pct']
         alert_color = "emotion-stormy" if negative_pct > alert_threshold else ""
         st.markdown(f'<div class="weather-card {alert_color}">', unsafe_allow_html=True)
         st.markdown('<div class="metric-value">' + f"{negative_pct:.1f}%" + '</div>', unsafe_allow_html=True)
@@ -426,9 +541,27 @@ def main():
     # Emotional Weather Map
     st.header("🗺️ Emotional Weather Map")
     
+    heat_points = None
     if show_heatmap:
-        emotional_map = create_emotional_weather_map(selected_city, posts, regions)
-        folium_static(emotional_map, width=1000, height=500)
+        with stage("density"):
+            heat_points = density_stage(selected_city, focus, time_range)
+    
+    with stage("grid"):
+        pyramid = grid_window_stage(selected_city, focus, time_range)
+        grid_cells = pyramid.cells(pyramid.level_for_zoom(MAP_ZOOM))
+    
+    with stage("map"):
+        # Identical data reuses the serialized map instead of rebuilding it
+        map_posts = df[['latitude', 'longitude', 'sentiment_score']]
+        map_key = data_fingerprint(selected_city, region_summary, regions, map_posts, heat_points, grid_cells)
+        show_map(
+            map_key,
+            lambda: create_emotional_weather_map(
+                selected_city, region_summary, regions, map_posts, heat_points, grid_cells
+            ),
+            width=1000,
+            height=500
+        )
     
     # Emotion Analysis by Region
     st.header("🏘️ Regional Emotion Analysis")
@@ -439,38 +572,33 @@ def main():
         st.subheader("Emotion Distribution by Region")
         
         # Create emotion distribution chart
-        region_emotion = df.groupby(['region', 'primary_emotion']).size().unstack(fill_value=0)
+        region_emotion = region_emotion_counts[region_summary['post_count'] > 0].sort_index()
         if not region_emotion.empty:
-            fig, ax = plt.subplots(figsize=(10, 6))
-            region_emotion.plot(kind='bar', stacked=True, ax=ax, 
-                              color=['#FFD700', '#98FB98', '#B0C4DE', '#4682B4', '#8B0000'])
-            ax.set_title('Emotion Distribution Across Regions')
-            ax.set_xlabel('Region')
-            ax.set_ylabel('Number of Posts')
-            plt.xticks(rotation=45)
-            st.pyplot(fig)
+            with stage("charts"):
+                show_chart("region_emotions", region_emotion, draw_region_emotions, figsize=(10, 6))
     
     with col2:
         st.subheader("Focus Area Sentiment")
         
         # Sentiment by focus area
-        focus_sentiment = df.groupby('focus_area')['sentiment_score'].mean().sort_values()
+        focus_sentiment = (
+            rollup_stage(selected_city, focus).group(TIME_RANGE_HOURS[time_range], by='topic')['mean_sentiment']
+            .dropna().rename_axis('focus_area').sort_values()
+        )
         
-        fig, ax = plt.subplots(figsize=(10, 6))
-        colors = ['red' if x < 0 else 'green' for x in focus_sentiment.values]
-        focus_sentiment.plot(kind='barh', color=colors, ax=ax)
-        ax.set_title('Average Sentiment by Focus Area')
-        ax.set_xlabel('Sentiment Score')
-        ax.axvline(x=0, color='black', linestyle='--', alpha=0.3)
-        st.pyplot(fig)
+        with stage("charts"):
+            show_chart("focus_sentiment", focus_sentiment, draw_focus_sentiment, figsize=(10, 6))
     
     # Emotion Forecast
     if show_forecast:
         st.header("📈 7-Day Emotion Forecast")
         
-        forecast = generate_emotion_forecast(posts)
+        with stage("forecast"):
+            forecast, region_outlook = forecast_stage(
+                selected_city, focus, rollup_stage(selected_city, focus).closed_day()
+            )
         
-        forecast_cols = st.columns(7)
+        forecast_cols = st.columns(FORECAST_DAYS)
         for i, day_forecast in enumerate(forecast):
             with forecast_cols[i]:
                 date_str = day_forecast['date'].strftime('%b %d')
@@ -485,31 +613,36 @@ def main():
                     "Positive": "☀️"
                 }
                 
+                low, high = day_forecast['dominant_range']
                 st.metric(
                     label=f"{date_str} {outlook_icons.get(outlook, '🌤️')}",
                     value=dominant,
-                    delta=outlook
+                    delta=outlook,
+                    help=f"About {day_forecast['emotions'].get(dominant, 0)} {dominant} posts expected "
+                         f"(80% interval {low:.0f}–{high:.0f})"
                 )
+        
+        if region_outlook is not None:
+            with st.expander("Forecast by region"):
+                # Most likely emotion per region and day
+                st.dataframe(region_outlook)
     
     # Civic Alerts
     st.header("🚨 Civic Attention Needed")
     
     # Identify areas with high negative sentiment
-    negative_hotspots = []
-    for region in regions:
-        region_posts = [p for p in posts if p['region'] == region['name']]
-        if region_posts:
-            negative_count = len([p for p in region_posts if p['sentiment_score'] < -0.1])
-            negative_pct = (negative_count / len(region_posts)) * 100
-            
-            if negative_pct > alert_threshold:
-                negative_hotspots.append({
-                    'region': region['name'],
-                    'negative_pct': negative_pct,
-                    'total_posts': len(region_posts),
-                    'dominant_issue': max(set([p['focus_area'] for p in region_posts]), 
-                                        key=[p['focus_area'] for p in region_posts].count)
-                })
+    hotspots = region_summary[
+        (region_summary['post_count'] > 0) & (region_summary['negative_pct'] > alert_threshold)
+    ]
+    negative_hotspots = [
+        {
+            'region': region_name,
+            'negative_pct': stats['negative_pct'],
+            'total_posts': int(stats['post_count']),
+            'dominant_issue': stats['dominant_focus']
+        }
+        for region_name, stats in hotspots.iterrows()
+    ]
     
     if negative_hotspots:
         for hotspot in sorted(negative_hotspots, key=lambda x: x['negative_pct'], reverse=True):
@@ -1,16 +1,21 @@
 import streamlit as st
-import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
-import folium
-from streamlit_folium import folium_static
-from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
-import requests
-import json
 from datetime import datetime, timedelta
-import numpy as np
 import time
 import random  # Missing import!
+import threading
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+
+from civic import sources
+from civic.aggregate import DashboardTotals
+from civic.charts import show_chart
+from civic.dedup import SeenIndex
+from civic.http_client import shared_client
+from civic.profiling import stage
+from civic.ingest import abandoned_fetches, fetch_all
+from civic.live import LiveFeed, MessageLog
+from civic.localstore import LocalStore, default_store_path
+from civic.sources import generate_mock_social_data
+from civic.store import PostStore
 
 # Configure the page for professional deployment
 st.set_page_config(
@@ -60,9 +65,6 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-# Initialize analyzer
-vader_analyzer = SentimentIntensityAnalyzer()
-
 # Title
 st.markdown('<h1 class="main-header">🌤️ Emotional Weather Map Pro</h1>', unsafe_allow_html=True)
 st.markdown("### Real-time Civic Intelligence Platform with Multi-Source Data Integration")
@@ -93,167 +95,57 @@ enable_needs_detection = st.sidebar.checkbox("Enable Community Needs Detection",
 st.sidebar.header("⚡ Real-time Processing")
 update_frequency = st.sidebar.selectbox("Update Frequency:", ["5 minutes", "15 minutes", "1 hour", "Manual"])
 auto_refresh = st.sidebar.checkbox("Auto-refresh Dashboard", False)
+use_collector = st.sidebar.checkbox(
+    "Read from local collector", False,
+    help="Show what `python -m civic.collector` has stored instead of fetching in this session"
+)
+twitter_budget = st.sidebar.slider("Max Tweets per Refresh:", 10, 1000, 100, step=10)
+
+# API responses are reused until the next scheduled update; "Manual" keeps
+# them until the user asks for fresh data
+UPDATE_FREQUENCY_SECONDS = {"5 minutes": 300, "15 minutes": 900, "1 hour": 3600, "Manual": None}
+api_cache_ttl = UPDATE_FREQUENCY_SECONDS[update_frequency]
+refresh_now = st.sidebar.button("🔄 Refresh Data Now")
+if refresh_now:
+    shared_client().clear_cache()
+
+# How often the live dashboard checks the background feed for new posts
+LIVE_CHECK_SECONDS = 5
+# A live feed nobody has looked at for this long stops polling
+LIVE_IDLE_SECONDS = 600
+
+# Post ``source`` values written by each data source
+POST_SOURCES = {
+    "Mock Civic Data": "Civic Platform",
+    "Twitter API": "Twitter",
+    "News API": "News"
+}
+
+# Per-source deadlines (seconds) for concurrent ingestion
+SOURCE_TIMEOUTS = {
+    "Mock Civic Data": 5,
+    "Twitter API": 10,
+    "News API": 10,
+    "Open Government Data": 5
+}
+
+# API credentials stay in the dashboard; the shared fetchers take them as arguments
+NEWS_API_KEY = "37cbeae280284824a36609781595ff4f"
 
-# Mock API functions (replace with real APIs in production)
-def fetch_twitter_data(city, topics, count=50):
-    """Real Twitter API v2 with proper error handling"""
+def fetch_twitter_data(city, topics, count=50, cache_ttl=None, notify=None, seen=None):
+    """Twitter recent search with the token from Streamlit secrets; progress messages go to ``notify`` (default: the sidebar)"""
+    notify = notify or st.sidebar
     try:
         # Get from Streamlit secrets (secure)
         bearer_token = st.secrets.get("TWITTER_BEARER_TOKEN", "")
-        
-        if not bearer_token:
-            st.sidebar.warning("🐦 Twitter API not configured - using mock data")
-            return generate_mock_social_data(city, topics, count, "Twitter")
-        
-        # Build smart search query based on topics
-        topic_queries = {
-            "Education": "(school OR teacher OR education OR student)",
-            "Healthcare": "(hospital OR health OR medical OR doctor)", 
-            "Transportation": "(transit OR traffic OR commute OR transportation)",
-            "Environment": "(environment OR climate OR pollution OR green)",
-            "Housing": "(housing OR rent OR apartment OR homeless)",
-            "Public Safety": "(safety OR police OR crime OR emergency)"
-        }
-        
-        # Combine selected topics
-        topic_filters = []
-        for topic in topics:
-            if topic in topic_queries:
-                topic_filters.append(topic_queries[topic])
-        
-        if not topic_filters:
-            topic_filters = ["(community OR city OR local)"]
-        
-        query = f"({' OR '.join(topic_filters)}) ({city}) lang:en -is:retweet -is:reply"
-        
-        headers = {"Authorization": f"Bearer {bearer_token}"}
-        params = {
-            "query": query,
-            "max_results": min(count, 50),  # Increased from 10 to 50
-            "tweet.fields": "created_at,public_metrics,context_annotations,author_id",
-            "expansions": "author_id"
-        }
-        
-        st.sidebar.info(f"🐦 Searching Twitter for: {', '.join(topics)} in {city}...")
-        
-        response = requests.get(
-            "https://api.twitter.com/2/tweets/search/recent",
-            headers=headers,
-            params=params
-        )
-        
-        if response.status_code == 200:
-            data = response.json()
-            if data.get('data'):
-                processed_tweets = process_twitter_data(data, city, topics)
-                if processed_tweets:
-                    st.sidebar.success(f"✅ Fetched {len(processed_tweets)} real tweets!")
-                    return processed_tweets
-        
-        # If no tweets found or error
-        st.sidebar.warning(f"🔍 No tweets found for current filters - using mock data")
-        return generate_mock_social_data(city, topics, count, "Twitter")
-            
     except Exception as e:
-        st.sidebar.error(f"🐦 Twitter API error: {str(e)[:100]}...")
+        notify.error(f"🐦 Twitter API error: {str(e)[:100]}...")
         return generate_mock_social_data(city, topics, count, "Twitter")
+    return sources.fetch_twitter_data(city, topics, count, cache_ttl, notify, bearer_token, seen)
 
-
-def process_twitter_data(twitter_response, city, topics):
-    """Process raw Twitter API response into our format"""
-    processed = []
-    
-    # Get user data if available
-    users = {}
-    if 'includes' in twitter_response and 'users' in twitter_response['includes']:
-        for user in twitter_response['includes']['users']:
-            users[user['id']] = user
-    
-    for tweet in twitter_response['data']:
-        # Get user info if available
-        author_info = users.get(tweet.get('author_id', ''), {})
-        
-        emotion_data = analyze_advanced_emotions(tweet['text'])
-        
-        # Truncate long tweets for display
-        display_text = tweet['text']
-        if len(display_text) > 280:
-            display_text = display_text[:277] + "..."
-        
-        processed.append({
-            "id": f"twitter_{tweet['id']}",
-            "text": display_text,
-            "source": "Twitter",
-            "topic": classify_topic(tweet['text'], topics),
-            "city": city,
-            "timestamp": datetime.fromisoformat(tweet['created_at'].replace('Z', '+00:00')),
-            "sentiment_score": emotion_data["sentiment_score"],
-            "primary_emotion": emotion_data["primary_emotion"],
-            "engagement": tweet['public_metrics']['like_count'] + tweet['public_metrics']['retweet_count'],
-            "verified": author_info.get('verified', False),
-            "risk_level": emotion_data["risk_level"],
-            "urgency_level": emotion_data["urgency_level"],
-            "user_followers": author_info.get('public_metrics', {}).get('followers_count', 0),
-            "retweet_count": tweet['public_metrics']['retweet_count'],
-            "like_count": tweet['public_metrics']['like_count']
-        })
-    
-    return processed
-
-def fetch_news_data(city, topics, count=30):
-    """Real News API integration"""
-    try:
-        # Use your actual News API key
-        api_key = "37cbeae280284824a36609781595ff4f"
-        
-        # Build query - search for topics in the city
-        query_terms = " OR ".join([f'"{topic}"' for topic in topics])
-        query = f"({query_terms}) AND ({city})"
-        
-        # News API endpoint
-        url = f"https://newsapi.org/v2/everything?q={query}&pageSize={min(count, 30)}&sortBy=publishedAt&language=en&apiKey={api_key}"
-        
-        st.sidebar.info(f"📰 Fetching news about {', '.join(topics)} in {city}...")
-        
-        response = requests.get(url)
-        data = response.json()
-        
-        if data.get('status') == 'ok' and data.get('articles'):
-            processed_articles = []
-            for article in data['articles']:
-                # Combine title and description for sentiment analysis
-                article_text = f"{article['title']} - {article.get('description', '')}"
-                
-                emotion_data = analyze_advanced_emotions(article_text)
-                
-                processed_articles.append({
-                    "id": f"news_{article.get('publishedAt', '')}_{hash(article_text)}",
-                    "text": f"{article['title']} - {article.get('description', 'No description')}",
-                    "source": "News",
-                    "topic": classify_topic(article['title'], topics),
-                    "city": city,
-                    "timestamp": datetime.fromisoformat(article['publishedAt'].replace('Z', '+00:00')) if article.get('publishedAt') else datetime.now(),
-                    "sentiment_score": emotion_data["sentiment_score"],
-                    "primary_emotion": emotion_data["primary_emotion"],
-                    "engagement": 0,  # News articles don't have engagement metrics
-                    "verified": True,
-                    "risk_level": emotion_data["risk_level"],
-                    "urgency_level": emotion_data["urgency_level"],
-                    "url": article.get('url', ''),
-                    "source_name": article.get('source', {}).get('name', 'Unknown')
-                })
-            
-            st.sidebar.success(f"✅ Fetched {len(processed_articles)} real news articles")
-            return processed_articles
-        else:
-            st.sidebar.warning(f"No news articles found for: {query}")
-            # Fallback to mock data if no real articles found
-            return generate_mock_social_data(city, topics, count, "News")
-            
-    except Exception as e:
-        st.sidebar.error(f"News API Error: {e}")
-        # Fallback to mock data on error
-        return generate_mock_social_data(city, topics, count, "News")
+def fetch_news_data(city, topics, count=30, cache_ttl=None, notify=None, seen=None):
+    """News API articles; progress messages go to ``notify`` (default: the sidebar)"""
+    return sources.fetch_news_data(city, topics, count, cache_ttl, notify or st.sidebar, NEWS_API_KEY, seen)
 
 def fetch_government_data(city, count=20):
     """Simulate Open Government Data API"""
@@ -263,126 +155,6 @@ def fetch_government_data(city, count=20):
     
     return generate_mock_government_data(city, count)
 
-def generate_mock_social_data(city, topics, count, source):
-    """Generate realistic social media and news data"""
-    posts = []
-    
-    civic_issues = {
-        "Education": [
-            f"School funding debate heats up in {city}",
-            f"{city} teachers demand better resources",
-            f"New education initiative announced for {city} schools",
-            f"Parent concerns about {city} school safety",
-            f"Student achievements celebrated across {city}"
-        ],
-        "Healthcare": [
-            f"Hospital capacity concerns in {city}",
-            f"New healthcare clinic opens in {city}",
-            f"{city} residents struggle with medical costs",
-            f"Mental health services expand in {city}",
-            f"Healthcare workers protest in {city}"
-        ],
-        "Transportation": [
-            f"Public transit improvements needed in {city}",
-            f"{city} commuters face daily traffic challenges",
-            f"New bike lanes welcomed in {city}",
-            f"Infrastructure projects underway across {city}",
-            f"Transportation access issues in {city} neighborhoods"
-        ],
-        "Environment": [
-            f"Air quality concerns raised in {city}",
-            f"{city} launches new sustainability initiative",
-            f"Community gardens thriving across {city}",
-            f"Environmental protection efforts in {city}",
-            f"Green space preservation in {city}"
-        ],
-        "Housing": [
-            f"Affordable housing crisis in {city}",
-            f"New housing developments in {city}",
-            f"Rent control discussions in {city} council",
-            f"Housing accessibility issues in {city}",
-            f"Community housing projects in {city}"
-        ],
-        "Public Safety": [
-            f"Public safety initiatives in {city}",
-            f"Community policing efforts in {city}",
-            f"Emergency response improvements in {city}",
-            f"Neighborhood watch programs in {city}",
-            f"Public safety concerns addressed in {city}"
-        ]
-    }
-    
-    for i in range(count):
-        topic = random.choice(topics)
-        text_options = civic_issues.get(topic, [f"Community discussion in {city}"])
-        text = random.choice(text_options)
-        
-        emotion_data = analyze_advanced_emotions(text)
-        
-        posts.append({
-            "id": f"{source.lower()}_{i}",
-            "text": text,
-            "source": source,
-            "topic": topic,
-            "city": city,
-            "timestamp": datetime.now() - timedelta(hours=random.randint(0, 72)),
-            "sentiment_score": emotion_data["sentiment_score"],
-            "primary_emotion": emotion_data["primary_emotion"],
-            "engagement": random.randint(10, 1000) if source == "Twitter" else random.randint(5, 100),
-            "verified": random.choice([True, False]) if source == "Twitter" else True,
-            "risk_level": emotion_data["risk_level"],
-            "urgency_level": emotion_data["urgency_level"]
-        })
-    
-    return posts
-
-
-def classify_topic(title, topics):
-    """Heuristic topic classifier for news titles.
-
-    Returns the first topic that appears in the title (case-insensitive),
-    otherwise returns a random topic from the provided list or 'General'.
-    """
-    if not title:
-        return topics[0] if topics else "General"
-
-    title_lower = title.lower()
-    for t in topics:
-        if t.lower() in title_lower:
-            return t
-
-    return random.choice(topics) if topics else "General"
-
-def classify_topic(text, available_topics):
-    """Classify text into one of the available topics based on keywords"""
-    if not text:
-        return random.choice(available_topics) if available_topics else "General"
-    
-    text_lower = text.lower()
-    
-    # Topic keywords mapping
-    topic_keywords = {
-        "Education": ['school', 'teacher', 'student', 'education', 'university', 'college', 'campus', 'tuition'],
-        "Healthcare": ['hospital', 'health', 'medical', 'doctor', 'clinic', 'healthcare', 'medicine', 'patient'],
-        "Transportation": ['transit', 'bus', 'train', 'traffic', 'transportation', 'commute', 'subway', 'highway'],
-        "Environment": ['environment', 'pollution', 'green', 'sustainability', 'climate', 'recycling', 'clean energy'],
-        "Housing": ['housing', 'rent', 'apartment', 'homeless', 'affordable', 'eviction', 'mortgage'],
-        "Public Safety": ['safety', 'police', 'crime', 'emergency', 'fire', 'security', 'law enforcement']
-    }
-    
-    # Count keyword matches for each topic
-    topic_scores = {}
-    for topic in available_topics:
-        if topic in topic_keywords:
-            score = sum(1 for keyword in topic_keywords[topic] if keyword in text_lower)
-            topic_scores[topic] = score
-    
-    # Return topic with highest score, or random if no matches
-    if topic_scores and max(topic_scores.values()) > 0:
-        return max(topic_scores, key=topic_scores.get)
-    else:
-        return random.choice(available_topics) if available_topics else "General"
-
 def generate_mock_government_data(city, count):
     """Generate realistic government open data"""
     reports = []
@@ -409,140 +181,37 @@ def generate_mock_government_data(city, count):
     
     return reports
 
-def analyze_advanced_emotions(text):
-    """Enhanced emotion detection with civil unrest indicators"""
-    scores = vader_analyzer.polarity_scores(text)
-    compound = scores['compound']
-    
-    # Civil unrest indicators
-    unrest_keywords = ['protest', 'rally', 'demonstration', 'strike', 'outrage', 'anger', 'frustrated']
-    urgency_keywords = ['urgent', 'emergency', 'crisis', 'immediate', 'now']
-    
-    text_lower = text.lower()
-    unrest_risk = any(keyword in text_lower for keyword in unrest_keywords)
-    urgency_level = any(keyword in text_lower for keyword in urgency_keywords)
-    
-    # Enhanced emotion classification
-    if unrest_risk and compound < -0.3:
-        primary_emotion = "Civil Unrest Risk"
-        risk_level = "High"
-    elif compound >= 0.5:
-        primary_emotion = "Community Satisfaction"
-        risk_level = "Low"
-    elif compound >= 0.1:
-        primary_emotion = "General Contentment" 
-        risk_level = "Low"
-    elif compound >= -0.1:
-        primary_emotion = "Neutral Discussion"
-        risk_level = "Low"
-    elif compound >= -0.5:
-        primary_emotion = "Community Concerns"
-        risk_level = "Medium"
-    else:
-        primary_emotion = "Public Frustration"
-        risk_level = "High"
-    
-    return {
-        "primary_emotion": primary_emotion,
-        "sentiment_score": compound,
-        "unrest_risk": unrest_risk,
-        "urgency_level": urgency_level,
-        "risk_level": risk_level,
-        "emotion_intensity": abs(compound)
-    }
+# Chart drawing; each function only reads the data it is given
+def draw_source_pie(ax, source_counts):
+    source_counts.plot(kind='pie', autopct='%1.1f%%', ax=ax)
+    ax.set_ylabel('')
 
-def predict_civil_unrest_risk(data):
-    """Predict civil unrest risk based on emotional data"""
-    if not data:
-        return {"risk_level": "Low", "confidence": 0.0, "factors": []}
-    
-    high_risk_posts = [p for p in data if p.get('risk_level') == 'High']
-    medium_risk_posts = [p for p in data if p.get('risk_level') == 'Medium']
-    
-    risk_ratio = len(high_risk_posts) / len(data) if data else 0
-    urgency_count = len([p for p in data if p.get('urgency_level')])
-    
-    if risk_ratio > 0.3:
-        risk_level = "High"
-        confidence = min(risk_ratio * 2, 0.95)
-    elif risk_ratio > 0.15:
-        risk_level = "Medium"
-        confidence = risk_ratio * 1.5
-    else:
-        risk_level = "Low" 
-        confidence = 1 - risk_ratio
-    
-    factors = []
-    if risk_ratio > 0.2:
-        factors.append("High volume of negative sentiment")
-    if urgency_count > 5:
-        factors.append("Multiple urgent community concerns")
-    if len(high_risk_posts) > 10:
-        factors.append("Significant civil unrest indicators")
-    
-    return {
-        "risk_level": risk_level,
-        "confidence": confidence,
-        "factors": factors,
-        "high_risk_count": len(high_risk_posts),
-        "total_posts": len(data)
-    }
+def draw_topic_sentiment(ax, topic_sentiment):
+    colors = ['red' if x < 0 else 'green' for x in topic_sentiment.values]
+    topic_sentiment.plot(kind='barh', color=colors, ax=ax)
+    ax.axvline(x=0, color='black', linestyle='--', alpha=0.3)
+    ax.set_xlabel('Average Sentiment Score')
 
-def detect_community_needs(data):
-    """Detect specific community needs from data"""
-    if not data:
-        return []
-    
-    # Analyze by topic and sentiment
-    topic_sentiment = {}
-    for post in data:
-        topic = post.get('topic', 'General')
-        sentiment = post.get('sentiment_score', 0)
-        
-        if topic not in topic_sentiment:
-            topic_sentiment[topic] = []
-        topic_sentiment[topic].append(sentiment)
-    
-    # Identify needs (topics with high negative sentiment)
-    needs = []
-    for topic, sentiments in topic_sentiment.items():
-        avg_sentiment = np.mean(sentiments)
-        if avg_sentiment < -0.2 and len(sentiments) > 5:
-            severity = "High" if avg_sentiment < -0.4 else "Medium"
-            needs.append({
-                "topic": topic,
-                "severity": severity,
-                "avg_sentiment": avg_sentiment,
-                "post_count": len(sentiments),
-                "recommendation": f"Address {topic.lower()} concerns in community outreach"
-            })
-    
-    return sorted(needs, key=lambda x: x['avg_sentiment'])[:5]  # Top 5 needs
-
-# Main application
-def main():
-    # Data collection from multiple sources
-    all_data = []
+def post_fetchers(notify=None, seen=None):
+    """Fetchers for the selected post sources (government reports are handled separately);
+    Twitter and News skip items already in ``seen`` before scoring them"""
+    fetchers = {}
     
     if "Mock Civic Data" in data_sources:
-        mock_data = generate_mock_social_data(selected_city, selected_focus, 100, "Civic Platform")
-        all_data.extend(mock_data)
+        fetchers["Mock Civic Data"] = lambda: generate_mock_social_data(selected_city, selected_focus, 100, "Civic Platform")
     
     if "Twitter API" in data_sources:
-        twitter_data = fetch_twitter_data(selected_city, selected_focus, 50)
-        all_data.extend(twitter_data)
+        fetchers["Twitter API"] = lambda: fetch_twitter_data(selected_city, selected_focus, twitter_budget, api_cache_ttl, notify, seen)
     
     if "News API" in data_sources:
-        news_data = fetch_news_data(selected_city, selected_focus, 30)
-        all_data.extend(news_data)
-    
-    if "Open Government Data" in data_sources:
-        gov_data = fetch_government_data(selected_city, 20)
-        # Government data needs different processing
-        st.sidebar.info(f"📊 Processed {len(gov_data)} government reports")
+        fetchers["News API"] = lambda: fetch_news_data(selected_city, selected_focus, 30, api_cache_ttl, notify, seen)
     
-    # Convert to DataFrame
-    df = pd.DataFrame(all_data)
+    return fetchers
+
+# Dashboard sections; everything except the raw-data table reads running totals
+def render_totals(totals, last_update):
+    """Render the dashboard header and key metrics from ``DashboardTotals``"""
+    summary = totals.summary
     
     # Real-time dashboard header
     st.header("🌡️ Real-time Civic Intelligence Dashboard")
@@ -551,30 +220,36 @@ def main():
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        total_posts = len(df)
-        st.metric("Total Posts Analyzed", f"{total_posts:,}", "Multi-source")
+        total_posts = summary.count
+        # Near-duplicates count toward the total; the delta shows how many posts were distinct
+        distinct = f"{totals.distinct_count:,} distinct" if totals.distinct_count != total_posts else "Multi-source"
+        st.metric("Total Posts Analyzed", f"{total_posts:,}", distinct)
     
     with col2:
-        data_sources_count = len(set(df['source'].unique())) if not df.empty else 0
+        data_sources_count = len(totals.source_counts)
         st.metric("Data Sources", data_sources_count, "Integrated")
     
     with col3:
-        if not df.empty:
-            avg_sentiment = df['sentiment_score'].mean()
+        if summary.count:
+            avg_sentiment = summary.mean_sentiment
             st.metric("Avg Community Sentiment", f"{avg_sentiment:.2f}", 
                      "Positive" if avg_sentiment > 0 else "Needs Attention")
         else:
             st.metric("Avg Community Sentiment", "N/A", "No data")
     
     with col4:
-        last_update = datetime.now().strftime("%H:%M:%S")
-        st.metric("Last Update", last_update, "Real-time")
+        st.metric("Last Update", last_update.strftime("%H:%M:%S") if last_update else "Pending", "Real-time")
+
+def render_analysis(totals, raw_df):
+    """Render the risk and needs analytics, source charts and raw data table"""
+    summary = totals.summary
     
     # Civil Unrest Prediction
-    if enable_forecasting and not df.empty:
+    if enable_forecasting and summary.count:
         st.header("🚨 Civil Unrest Risk Assessment")
         
-        unrest_prediction = predict_civil_unrest_risk(all_data)
+        with stage("analytics"):
+            unrest_prediction = totals.unrest_risk()
         
         risk_col1, risk_col2, risk_col3 = st.columns(3)
         
@@ -603,10 +278,11 @@ def main():
             st.success("No significant risk factors detected.")
     
     # Community Needs Detection
-    if enable_needs_detection and not df.empty:
+    if enable_needs_detection and summary.count:
         st.header("🏘️ Community Needs Assessment")
         
-        community_needs = detect_community_needs(all_data)
+        with stage("analytics"):
+            community_needs = totals.community_needs()
         
         if community_needs:
             for need in community_needs:
@@ -623,39 +299,229 @@ def main():
     # Data source breakdown
     st.header("📊 Data Source Analysis")
     
-    if not df.empty:
+    if summary.count:
         col1, col2 = st.columns(2)
         
         with col1:
             st.subheader("Posts by Source")
-            source_counts = df['source'].value_counts()
-            fig, ax = plt.subplots(figsize=(8, 6))
-            source_counts.plot(kind='pie', autopct='%1.1f%%', ax=ax)
-            ax.set_ylabel('')
-            st.pyplot(fig)
+            source_counts = totals.source_breakdown()
+            with stage("charts"):
+                show_chart("source_pie", source_counts, draw_source_pie, figsize=(8, 6))
         
         with col2:
             st.subheader("Sentiment by Topic")
-            topic_sentiment = df.groupby('topic')['sentiment_score'].mean().sort_values()
-            fig, ax = plt.subplots(figsize=(10, 6))
-            colors = ['red' if x < 0 else 'green' for x in topic_sentiment.values]
-            topic_sentiment.plot(kind='barh', color=colors, ax=ax)
-            ax.axvline(x=0, color='black', linestyle='--', alpha=0.3)
-            ax.set_xlabel('Average Sentiment Score')
-            st.pyplot(fig)
+            topic_sentiment = totals.topic_sentiment()
+            with stage("charts"):
+                show_chart("topic_sentiment", topic_sentiment, draw_topic_sentiment, figsize=(10, 6))
     
     # Real-time data table
     with st.expander("🔍 View Raw Multi-Source Data"):
-        if not df.empty:
-            st.dataframe(df[['source', 'topic', 'text', 'primary_emotion', 'sentiment_score', 'timestamp']])
+        if not raw_df.empty:
+            st.dataframe(raw_df[['source', 'topic', 'text', 'primary_emotion', 'sentiment_score', 'timestamp']])
         else:
             st.info("No data available from selected sources")
+
+def render_dashboard(totals, raw_df, last_update):
+    """Render the metrics, analytics and charts from ``DashboardTotals``"""
+    render_totals(totals, last_update)
+    render_analysis(totals, raw_df)
+
+def live_feed():
+    """This session's background feed for the current settings, restarted when they change"""
+    key = (tuple(data_sources), selected_city, tuple(selected_focus), twitter_budget, update_frequency)
+    feed = st.session_state.get("live_feed")
+    if feed is None or feed.key != key or not feed.running:
+        if feed is not None:
+            feed.stop()
+        log = MessageLog()
+        seen = SeenIndex()
+        feed = LiveFeed(
+            post_fetchers(notify=log, seen=seen),
+            interval=UPDATE_FREQUENCY_SECONDS[update_frequency],
+            timeouts=SOURCE_TIMEOUTS,
+            key=key,
+            idle_timeout=LIVE_IDLE_SECONDS,
+            log=log,
+            seen=seen
+        ).start()
+        st.session_state["live_feed"] = feed
+    return feed
+
+def stop_live_feed():
+    feed = st.session_state.pop("live_feed", None)
+    if feed is not None:
+        feed.stop()
+
+@st.cache_resource
+def collector_store():
+    """Read handle on the local store filled by ``python -m civic.collector``"""
+    return LocalStore(default_store_path())
+
+def collector_snapshot():
+    """Stored totals and recent posts for the current settings (``None`` without a matching feed)"""
+    store = collector_store()
+    feed = store.find_feed(selected_city, selected_focus)
+    if feed is None:
+        return None
+    post_sources = [POST_SOURCES[source] for source in data_sources if source in POST_SOURCES]
+    # A feed covering more topics is narrowed to the selected focus areas
+    topics = None if set(feed["topics"]) == set(selected_focus) else selected_focus
+    with stage("fetch"):
+        return store.snapshot(feed["feed"], sources=post_sources, topics=topics)
+
+def collector_versions():
+    """Change counters for the collector feed matching the current settings, one per live panel"""
+    store = collector_store()
+    feed = store.find_feed(selected_city, selected_focus)
+    run = store.latest_run(feed["feed"]) if feed else None
+    version = (feed and feed["feed"], tuple(data_sources), tuple(selected_focus), run["runs"] if run else 0)
+    return dict.fromkeys(("totals", "messages", "analysis"), version)
+
+def feed_versions(feed):
+    """Change counters of a ``LiveFeed``, one per live panel"""
+    versions = feed.versions()
+    return {
+        "totals": (versions["feed"], versions["polls"]),
+        "messages": (versions["feed"], versions["messages"]),
+        "analysis": (versions["feed"], versions["posts"]),
+    }
+
+def render_status(snapshot):
+    """Poll status and key metrics for a feed snapshot; ``False`` while there is nothing to show"""
+    if snapshot is None:
+        st.warning(
+            f"No collector feed for {selected_city} covers the selected focus areas - start one with "
+            f"`python -m civic.collector --cities \"{selected_city}\"`"
+        )
+        return False
+    if not snapshot["polls"]:
+        st.info("⏳ Waiting for the first poll of the selected sources...")
+        return False
+    
+    status = ", ".join(f"{source}: {state}" for source, state in snapshot["status"].items())
+    st.caption(
+        f"🔄 Live · last poll {snapshot['last_update']:%H:%M:%S} · {snapshot['last_new']} new posts · {status}"
+    )
+    render_totals(snapshot["totals"], snapshot["last_update"])
+    return True
+
+def render_messages(snapshot):
+    """Recent source warnings and errors from a feed snapshot"""
+    for _, level, text in snapshot["messages"][-3:]:
+        if level in ("warning", "error"):
+            getattr(st, level)(text)
+
+def render_snapshot(snapshot):
+    """Poll status, recent source warnings and the dashboard for a feed snapshot"""
+    if render_status(snapshot):
+        render_messages(snapshot)
+        render_analysis(snapshot["totals"], snapshot["recent"].to_pandas())
+
+def panel_inputs(panel, versions, read_snapshot, prepare):
+    """What a live panel draws, rebuilt only when its counter in ``versions`` moved on.
+
+    ``prepare`` turns a snapshot into the panel's inputs; panels that change
+    together share one snapshot read.
+    """
+    drawn = st.session_state.setdefault("live_panels", {})
+    if panel not in drawn or drawn[panel][0] != versions[panel]:
+        latest = st.session_state.get("live_snapshot")
+        if latest is None or latest[0] != versions:
+            latest = st.session_state["live_snapshot"] = (versions, read_snapshot())
+        drawn[panel] = (versions[panel], prepare(latest[1]))
+    return drawn[panel][1]
+
+def ready(snapshot):
+    return snapshot is not None and snapshot["polls"] > 0
+
+# Each live panel is its own fragment: every few seconds it compares its
+# counter and only re-reads and rebuilds its inputs when that moved on
+@st.fragment(run_every=LIVE_CHECK_SECONDS)
+def live_totals(read_versions, read_snapshot):
+    """Poll status and key metrics, rebuilt after every poll"""
+    render_status(panel_inputs("totals", read_versions(), read_snapshot, lambda snapshot: snapshot))
+
+@st.fragment(run_every=LIVE_CHECK_SECONDS)
+def live_messages(read_versions, read_snapshot):
+    """Source warnings, rebuilt when a source logged a message"""
+    snapshot = panel_inputs("messages", read_versions(), read_snapshot,
+                            lambda snapshot: snapshot if ready(snapshot) else None)
+    if snapshot is not None:
+        render_messages(snapshot)
+
+@st.fragment(run_every=LIVE_CHECK_SECONDS)
+def live_analysis(read_versions, read_snapshot):
+    """Analytics, charts and raw data, rebuilt when new posts were merged"""
+    inputs = panel_inputs("analysis", read_versions(), read_snapshot,
+                          lambda snapshot: (snapshot["totals"], snapshot["recent"].to_pandas())
+                          if ready(snapshot) else None)
+    if inputs is not None:
+        render_analysis(*inputs)
+
+def live_dashboard(read_versions, read_snapshot):
+    """Live panels for a feed: status and metrics, source warnings, analytics"""
+    live_totals(read_versions, read_snapshot)
+    live_messages(read_versions, read_snapshot)
+    live_analysis(read_versions, read_snapshot)
+
+# Main application
+def main():
+    if use_collector:
+        # Posts were fetched, scored and aggregated by the collector process;
+        # the dashboard only reads its rollups and latest posts
+        stop_live_feed()
+        if auto_refresh:
+            live_dashboard(collector_versions, collector_snapshot)
+        else:
+            render_snapshot(collector_snapshot())
+        return
     
-    # Auto-refresh simulation
     if auto_refresh:
+        # A background thread polls at the update frequency and merges only
+        # new posts; the dashboard fragment re-renders from its totals
         st.sidebar.info("🔄 Auto-refresh enabled")
-        time.sleep(2)  # Simulate processing time
-        st.rerun()
+        feed = live_feed()
+        if refresh_now:
+            feed.refresh()
+        live_dashboard(lambda: feed_versions(feed), feed.snapshot)
+        return
+    
+    stop_live_feed()
+    
+    # Data collection from multiple sources, fetched concurrently
+    fetchers = post_fetchers()
+    
+    if "Open Government Data" in data_sources:
+        fetchers["Open Government Data"] = lambda: fetch_government_data(selected_city, 20)
+    
+    # Worker threads need the script context so their sidebar messages render
+    script_ctx = get_script_run_ctx()
+    with stage("fetch"):
+        results, source_status = fetch_all(
+            fetchers,
+            SOURCE_TIMEOUTS,
+            thread_setup=lambda: add_script_run_ctx(threading.current_thread(), script_ctx)
+        )
+    
+    all_data = PostStore.concat([
+        results[source] for source in ["Mock Civic Data", "Twitter API", "News API"] if source in results
+    ])
+    
+    if "Open Government Data" in results:
+        gov_data = results["Open Government Data"]
+        # Government data needs different processing
+        st.sidebar.info(f"📊 Processed {len(gov_data)} government reports")
+    
+    for source, status in source_status.items():
+        if status == "timeout":
+            st.sidebar.warning(f"⏱️ {source} did not respond within {SOURCE_TIMEOUTS[source]}s - showing partial results")
+        elif status != "ok":
+            st.sidebar.error(f"{source} failed: {status[len('error: '):][:100]}")
+    still_running = abandoned_fetches()
+    if still_running:
+        st.sidebar.caption(f"Still finishing in the background: {', '.join(still_running)}")
+    
+    render_dashboard(DashboardTotals().update(all_data), all_data.to_pandas(), datetime.now())
 
 if __name__ == "__main__":
     main()